@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Analytics Rollups
+Daily event facts behind the /admin/analytics/* dashboard endpoints.
+
+event_daily_facts holds one row per (event date, category, secondary category, host,
+state, city) with the number of events and their interest/view totals. Event writes keep
+it current inside the same transaction:
+
+    adjust_event_facts(cursor, placeholder, [event_id], -1)   # before UPDATE / DELETE
+    ... write the event ...
+    adjust_event_facts(cursor, placeholder, [event_id], +1)   # after INSERT / UPDATE
+
+interest_count/view_count change outside those paths (write-behind engagement tracking),
+so the totals drift until the scheduled reconcile rebuilds the table from events.
+Text key columns store '' and created_by stores 0 instead of NULL so upserts can match;
+key columns missing from an older events table (e.g. city/state before the SEO
+migration) are treated as ''.
+"""
+
+import logging
+from typing import FrozenSet, Iterable, List, Tuple
+
+from migration_utils import id_ranges
+
+logger = logging.getLogger(__name__)
+
+EVENT_DAILY_FACTS_TABLE_SQL = """CREATE TABLE IF NOT EXISTS event_daily_facts (
+                            event_date TEXT NOT NULL,
+                            category TEXT NOT NULL DEFAULT '',
+                            secondary_category TEXT NOT NULL DEFAULT '',
+                            created_by INTEGER NOT NULL DEFAULT 0,
+                            state TEXT NOT NULL DEFAULT '',
+                            city TEXT NOT NULL DEFAULT '',
+                            event_count INTEGER NOT NULL DEFAULT 0,
+                            interest_total INTEGER NOT NULL DEFAULT 0,
+                            view_total INTEGER NOT NULL DEFAULT 0,
+                            PRIMARY KEY (event_date, category, secondary_category, created_by, state, city)
+                        )"""
+
+FACT_KEY_COLUMNS = "event_date, category, secondary_category, created_by, state, city"
+
+# events columns feeding the fact key, in key order, with the value used for NULL
+_FACT_SOURCE_COLUMNS = (
+    ("date", "''"),
+    ("category", "''"),
+    ("secondary_category", "''"),
+    ("created_by", "0"),
+    ("state", "''"),
+    ("city", "''"),
+)
+
+# backend.py hands over its SchemaCache, which is refreshed after migrations apply; scripts
+# and migration steps that run without one list the events columns on each call
+_schema_cache = None
+
+
+def use_schema_cache(schema_cache) -> None:
+    """Read the events columns from schema_cache instead of introspecting on every call"""
+    global _schema_cache
+    _schema_cache = schema_cache
+
+
+def _events_columns(cursor) -> FrozenSet[str]:
+    if _schema_cache is not None:
+        return _schema_cache.column_set(cursor, "events")
+    cursor.execute("SELECT * FROM events LIMIT 0")
+    return frozenset(column[0] for column in cursor.description)
+
+
+def _fact_key_sql(cursor) -> Tuple[str, str]:
+    """
+    Fact key select and GROUP BY expressions over the current events columns. Missing
+    columns select their default as a constant and stay out of the GROUP BY, where
+    PostgreSQL rejects text constants and both databases read integers as select-list
+    positions.
+    """
+    columns = _events_columns(cursor)
+    select_keys, group_keys = [], []
+    for column, default in _FACT_SOURCE_COLUMNS:
+        if column in columns:
+            expression = f"COALESCE({column}, {default})"
+            group_keys.append(expression)
+        else:
+            expression = default
+        select_keys.append(expression)
+    return ", ".join(select_keys), ", ".join(group_keys)
+
+
+def _facts_select(cursor, where_sql: str, sign: int = 1) -> str:
+    select_sql, group_sql = _fact_key_sql(cursor)
+    return f"""
+        SELECT {select_sql},
+               {sign} * COUNT(*),
+               {sign} * SUM(COALESCE(interest_count, 0)),
+               {sign} * SUM(COALESCE(view_count, 0))
+        FROM events
+        WHERE {where_sql}
+        GROUP BY {group_sql}
+    """
+
+
+def adjust_event_facts(cursor, placeholder: str, event_ids: Iterable[int], sign: int) -> None:
+    """
+    Add (sign=1) or subtract (sign=-1) the current rows of the given events to the facts.
+    Call it inside the transaction that writes the events.
+    """
+    ids: List[int] = [event_id for event_id in event_ids if event_id is not None]
+    if not ids:
+        return
+    id_list = ", ".join([placeholder] * len(ids))
+    cursor.execute(
+        f"""
+        INSERT INTO event_daily_facts ({FACT_KEY_COLUMNS}, event_count, interest_total, view_total)
+        {_facts_select(cursor, f"id IN ({id_list})", 1 if sign > 0 else -1)}
+        ON CONFLICT ({FACT_KEY_COLUMNS}) DO UPDATE SET
+            event_count = event_daily_facts.event_count + excluded.event_count,
+            interest_total = event_daily_facts.interest_total + excluded.interest_total,
+            view_total = event_daily_facts.view_total + excluded.view_total
+        """,
+        ids,
+    )
+    if sign < 0:
+        cursor.execute(
+            f"""
+            DELETE FROM event_daily_facts
+            WHERE event_count <= 0
+              AND event_date IN (SELECT COALESCE(date, '') FROM events WHERE id IN ({id_list}))
+            """,
+            ids,
+        )
+
+
+def remove_host_facts(cursor, placeholder: str, user_id: int) -> None:
+    """Drop every fact of a host whose events are all being deleted"""
+    cursor.execute(f"DELETE FROM event_daily_facts WHERE created_by = {placeholder}", (user_id,))
+
+
+def rebuild_event_facts(cursor, is_postgres: bool) -> int:
+    """
+    Recompute event_daily_facts from events; returns the number of fact rows. Run it on a
+    connection with autocommit off (get_db_transaction) and commit afterwards, so readers
+    never see the table empty and a failure leaves the old facts in place. Events are
+    summed one id range at a time, so each statement stays within the pool's
+    statement_timeout however large events grows.
+    """
+    if is_postgres:
+        # Holds off concurrent incremental upserts until the rebuilt table is committed
+        cursor.execute("LOCK TABLE event_daily_facts IN EXCLUSIVE MODE")
+    cursor.execute("DELETE FROM event_daily_facts")
+    placeholder = "%s" if is_postgres else "?"
+    for low, high in id_ranges(cursor, "events"):
+        cursor.execute(
+            f"""
+            INSERT INTO event_daily_facts ({FACT_KEY_COLUMNS}, event_count, interest_total, view_total)
+            {_facts_select(cursor, f"id BETWEEN {placeholder} AND {placeholder} AND date IS NOT NULL")}
+            ON CONFLICT ({FACT_KEY_COLUMNS}) DO UPDATE SET
+                event_count = event_daily_facts.event_count + excluded.event_count,
+                interest_total = event_daily_facts.interest_total + excluded.interest_total,
+                view_total = event_daily_facts.view_total + excluded.view_total
+            """,
+            (low, high),
+        )
+    cursor.execute("SELECT COUNT(*) AS count FROM event_daily_facts")
+    row = cursor.fetchone()
+    return row["count"] if hasattr(row, "keys") else row[0]
+
+
+def ensure_event_facts(cursor, is_postgres: bool) -> None:
+    """Create event_daily_facts and build it once if it is still empty"""
+    cursor.execute(EVENT_DAILY_FACTS_TABLE_SQL)
+    cursor.execute("SELECT 1 FROM event_daily_facts LIMIT 1")
+    if cursor.fetchone():
+        return
+    rows = rebuild_event_facts(cursor, is_postgres)
+    if rows:
+        logger.info(f"Built {rows} analytics fact rows from existing events")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Background Flusher
+Lifecycle shared by the write-behind buffers (engagement tracking, page visit ingestion,
+the event grid, the sitemap store and the email outbox): request handlers only touch
+memory, and a daemon thread writes batches out on an interval or when woken.
+"""
+
+import atexit
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence
+
+INSERT_CHUNK_ROWS = 300
+
+
+def insert_rows(cursor, table: str, columns: Sequence[str], rows: List[tuple], placeholder: str,
+                chunk_size: int = INSERT_CHUNK_ROWS) -> None:
+    """Multi-row INSERT in chunks (keeps SQLite under its bound-parameter limit)"""
+    row_sql = "(" + ", ".join([placeholder] * len(columns)) + ")"
+    column_sql = ", ".join(columns)
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        params = [value for row in chunk for value in row]
+        cursor.execute(
+            f"INSERT INTO {table} ({column_sql}) VALUES {', '.join([row_sql] * len(chunk))}",
+            params,
+        )
+
+
+class BackgroundFlusher(ABC):
+    """
+    Lifecycle shared by write-behind buffers: a daemon thread calls flush() every
+    flush_interval seconds or when wake() is called, and stop() drains what is left.
+    """
+
+    thread_name = "write-behind-flush"
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the flush thread and write out everything still buffered"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._stopping.is_set():
+                break
+            self.flush()
+
+    @abstractmethod
+    def flush(self) -> int:
+        """Write out everything buffered and return how many items were written"""
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent request latency with blocking vs offloaded database calls
+
+Simulates an async endpoint mix on one event loop (one uvicorn worker): most requests run a
+fast query, a few run a slow one. In "blocking" mode the query runs directly inside the
+coroutine, as the async handlers used to; in "offloaded" mode it goes through db_async.run_db.
+
+Usage:
+    python benchmark_async_db.py [--requests 400] [--concurrency 50] [--slow-every 20] [--slow-ms 200]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_pool import SQLiteConnectionPool  # noqa: E402
+from db_async import run_db, executor_stats  # noqa: E402
+
+
+def setup_database(db_file: str):
+    pool = SQLiteConnectionPool(db_file)
+    conn = pool.getconn()
+    conn.execute("CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY, title TEXT, lat REAL, lng REAL)")
+    conn.executemany(
+        "INSERT INTO events (title, lat, lng) VALUES (?, ?, ?)",
+        [(f"Event {i}", 30 + i * 0.001, -90 - i * 0.001) for i in range(2000)],
+    )
+    conn.commit()
+    pool.putconn(conn)
+    return pool
+
+
+def make_query(pool: SQLiteConnectionPool, slow_ms: int):
+    def query(slow: bool):
+        conn = pool.getconn()
+        conn.create_function("sleep_ms", 1, lambda ms: time.sleep(ms / 1000) or 0)
+        try:
+            if slow:
+                conn.execute("SELECT sleep_ms(?)", (slow_ms,)).fetchone()
+            return conn.execute("SELECT COUNT(*) FROM events WHERE lat > 30.5").fetchone()[0]
+        finally:
+            pool.putconn(conn)
+
+    return query
+
+
+async def run_mode(mode: str, query, total: int, concurrency: int, slow_every: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def request(i: int):
+        slow = slow_every > 0 and i % slow_every == 0
+        async with semaphore:
+            start = time.perf_counter()
+            if mode == "blocking":
+                query(slow)
+            else:
+                await run_db(query, slow)
+            # Yield once, as a real handler would while serializing the response
+            await asyncio.sleep(0)
+            if not slow:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(request(i) for i in range(total)))
+    wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    p99_index = max(0, int(len(latencies) * 0.99) - 1)
+    return {
+        "mode": mode,
+        "fast_requests": len(latencies),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(latencies[p99_index], 2),
+        "max_ms": round(latencies[-1], 2),
+        "throughput_rps": round(total / wall, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--slow-every", type=int, default=20)
+    parser.add_argument("--slow-ms", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = setup_database(os.path.join(tmp, "bench.db"))
+        query = make_query(pool, args.slow_ms)
+
+        print(f"{args.requests} requests, concurrency {args.concurrency}, "
+              f"1 in {args.slow_every} runs a {args.slow_ms}ms query\n")
+        for mode in ("blocking", "offloaded"):
+            result = asyncio.run(run_mode(mode, query, args.requests, args.concurrency, args.slow_every))
+            print(f"{result['mode']:>10}: fast-request p50 {result['p50_ms']:>8}ms  "
+                  f"p99 {result['p99_ms']:>8}ms  max {result['max_ms']:>8}ms  "
+                  f"{result['throughput_rps']:>8} req/s")
+        print(f"\nexecutor: {executor_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: admin bulk event import
+
+Runs the app in-process (FastAPI TestClient) against a temporary SQLite database and times:
+  per-event - POST /events once per event, the way the bulk endpoints used to import
+              (timed on a sample and extrapolated to --events)
+  bulk      - one POST /admin/events/bulk with all --events events
+
+Usage:
+    python benchmark_bulk_import.py [--events 5000] [--sample 200]
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PROBE = """
+import sys, time, json, logging
+logging.disable(logging.CRITICAL)
+from fastapi.testclient import TestClient
+import backend
+
+events, sample = int(sys.argv[1]), int(sys.argv[2])
+with TestClient(backend.app) as client:
+    with backend.get_db() as conn:
+        conn.execute("INSERT INTO users (email, hashed_password, role) VALUES ('bench@example.com', 'x', 'admin')")
+        conn.commit()
+    headers = {"Authorization": "Bearer " + backend.create_access_token({"sub": "bench@example.com"})}
+
+    def payload(prefix, count):
+        return [
+            {"title": f"{prefix} {i}", "description": "Benchmark event", "date": f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+             "start_time": "19:00", "category": "music", "address": "1 Main St, Austin, TX 78701, USA",
+             "lat": 30.0 + i * 0.0001, "lng": -97.74}
+            for i in range(count)
+        ]
+
+    started = time.perf_counter()
+    for event in payload("Single", sample):
+        assert client.post("/events", json=event, headers=headers).status_code == 200
+    per_event = (time.perf_counter() - started) / sample
+
+    started = time.perf_counter()
+    response = client.post("/admin/events/bulk", json={"events": payload("Bulk", events)}, headers=headers)
+    bulk = time.perf_counter() - started
+    assert response.json()["success_count"] == events, response.text[:500]
+print(json.dumps({"per_event": per_event, "bulk": bulk}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--sample", type=int, default=200)
+    args = parser.parse_args()
+
+    # backend.py keeps events.db next to itself, so run against a scratch copy of the code
+    scratch = tempfile.mkdtemp()
+    for name in os.listdir(BACKEND_DIR):
+        if name.endswith(".py"):
+            with open(os.path.join(BACKEND_DIR, name), "rb") as src, \
+                    open(os.path.join(scratch, name), "wb") as dst:
+                dst.write(src.read())
+
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE, str(args.events), str(args.sample)],
+        capture_output=True, text=True, check=True, cwd=scratch,
+    ).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+
+    print(f"per-event  {result['per_event'] * 1000:8.2f} ms/event  "
+          f"(~{result['per_event'] * args.events:.1f} s for {args.events} events)")
+    print(f"bulk       {result['bulk'] / args.events * 1000:8.2f} ms/event  "
+          f"({result['bulk']:.2f} s for {args.events} events)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark: typed event date/time columns
+
+Builds a temporary SQLite database with --rows synthetic events (TEXT date/start_time, as the
+events table has always stored them), runs the schema migrations to add and backfill
+event_date/start_ts, and times each query shape both ways:
+  cast  - parse the TEXT columns per row (date(date), time(start_time)), as the queries used to
+  typed - compare and sort on event_date / start_ts through their indexes
+
+Usage:
+    python benchmark_event_dates.py [--rows 1000000] [--repeat 5]
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import statistics
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from schema_migrations import run_migrations
+
+TODAY = date.today()
+
+# name -> (cast query, typed query, params)
+QUERIES = {
+    "upcoming page": (
+        "SELECT id FROM events WHERE date(date) >= date('now') "
+        "ORDER BY date(date), time(start_time), id LIMIT 50",
+        "SELECT id FROM events WHERE start_ts >= ? ORDER BY start_ts, id LIMIT 50",
+        (f"{TODAY.isoformat()} 00:00:00",),
+    ),
+    "upcoming count": (
+        "SELECT COUNT(*) FROM events WHERE date(date) >= date('now')",
+        "SELECT COUNT(*) FROM events WHERE event_date >= CURRENT_DATE",
+        (),
+    ),
+    "single day": (
+        "SELECT id FROM events WHERE date(date) = ? ORDER BY time(start_time)",
+        "SELECT id FROM events WHERE event_date = ? ORDER BY start_ts",
+        ((TODAY + timedelta(days=30)).isoformat(),),
+    ),
+}
+
+
+def build_db(rows: int):
+    db_file = os.path.join(tempfile.mkdtemp(), "event_dates.db")
+
+    @contextmanager
+    def get_db():
+        conn = sqlite3.connect(db_file)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    rng = random.Random(42)
+    with get_db() as conn:
+        conn.execute(
+            "CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT, description TEXT, date TEXT, "
+            "start_time TEXT, end_time TEXT, end_date TEXT, category TEXT, address TEXT, lat REAL, "
+            "lng REAL, recurring BOOLEAN, frequency TEXT, created_by INTEGER)"
+        )
+        conn.executemany(
+            "INSERT INTO events (title, date, start_time, end_time, category, lat, lng) "
+            "VALUES (?, ?, ?, ?, 'music', 30.27, -97.74)",
+            (
+                (
+                    f"Event {i}",
+                    (TODAY + timedelta(days=rng.randint(-365, 365))).isoformat(),
+                    f"{rng.randint(0, 23):02d}:{rng.choice((0, 15, 30, 45)):02d}",
+                    f"{rng.randint(0, 23):02d}:00",
+                )
+                for i in range(rows)
+            ),
+        )
+        conn.commit()
+
+    started = time.perf_counter()
+    run_migrations(get_db, False)
+    return get_db, time.perf_counter() - started
+
+
+def time_query(conn, sql, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = conn.execute(sql, params).fetchall()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    get_db, migrate_time = build_db(args.rows)
+    print(f"migrations + backfill of {args.rows} rows: {migrate_time:.1f} s\n")
+
+    with get_db() as conn:
+        for name, (cast_sql, typed_sql, params) in QUERIES.items():
+            cast_time, cast_rows = time_query(conn, cast_sql, params if "?" in cast_sql else (), args.repeat)
+            typed_time, typed_rows = time_query(conn, typed_sql, params, args.repeat)
+            if "COUNT" in cast_sql:
+                assert cast_rows[0][0] == typed_rows[0][0], (cast_rows[0][0], typed_rows[0][0])
+            print(f"{name:<16} cast {cast_time * 1000:9.2f} ms   typed {typed_time * 1000:9.2f} ms   "
+                  f"({cast_time / max(typed_time, 1e-9):.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
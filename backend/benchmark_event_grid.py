@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: nearby upcoming events, SQL vs the in-memory event grid
+
+Builds a temporary SQLite database with --events upcoming events spread over the continental
+US, then times the nearby query GET /events runs (radius filter, start_ts order, one page):
+  sql  - bounding box on idx_events_location plus exact distance in SQL
+  grid - EventGrid snapshot: candidate cells, box check, haversine in Python
+
+Usage:
+    python benchmark_event_grid.py [--events 50000] [--radius 25] [--queries 200]
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import statistics
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from event_grid import EventGrid
+from event_versions import EventVersionTracker
+from geo_query import radius_condition
+from schema_migrations import run_migrations
+
+
+def build_db(events: int):
+    db_file = os.path.join(tempfile.mkdtemp(), "event_grid.db")
+
+    @contextmanager
+    def get_db():
+        conn = sqlite3.connect(db_file)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    run_migrations(get_db, False)
+    rng = random.Random(42)
+    today = date.today()
+    with get_db() as conn:
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_events_location ON events (lat, lng)")
+        conn.executemany(
+            "INSERT INTO events (title, description, date, start_time, category, address, lat, lng) "
+            "VALUES (?, 'Benchmark event', ?, ?, 'music', '1 Main St', ?, ?)",
+            (
+                (
+                    f"Event {i}",
+                    (today + timedelta(days=rng.randint(0, 90))).isoformat(),
+                    f"{rng.randint(8, 22):02d}:00",
+                    rng.uniform(25.0, 49.0),
+                    rng.uniform(-124.0, -67.0),
+                )
+                for i in range(events)
+            ),
+        )
+        conn.commit()
+    return get_db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--radius", type=float, default=25.0)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=500)
+    args = parser.parse_args()
+
+    get_db = build_db(args.events)
+    versions = EventVersionTracker(get_db)
+    grid = EventGrid(get_db, lambda: "?", lambda: versions.current()[0], enabled=True)
+    started = time.perf_counter()
+    grid.flush()
+    print(f"grid load of {args.events} events: {(time.perf_counter() - started) * 1000:.0f} ms "
+          f"({grid.stats()['cells']} cells)\n")
+    snapshot = grid.view()
+
+    rng = random.Random(1)
+    points = [(rng.uniform(28.0, 46.0), rng.uniform(-120.0, -72.0)) for _ in range(args.queries)]
+    today = f"{date.today().isoformat()} 00:00:00"
+
+    sql_times, grid_times = [], []
+    with get_db() as conn:
+        for lat, lng in points:
+            sql, params = radius_condition(lat, lng, args.radius, "?", False)
+            started = time.perf_counter()
+            expected = [row[0] for row in conn.execute(
+                f"SELECT * FROM events WHERE start_ts >= ? AND {sql} ORDER BY start_ts, id LIMIT ?",
+                [today] + params + [args.limit],
+            )]
+            sql_times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            found = [row["id"] for _, row in snapshot.upcoming(lat, lng, args.radius, limit=args.limit)]
+            grid_times.append(time.perf_counter() - started)
+            assert found == expected, (lat, lng)
+
+    sql_ms, grid_ms = statistics.median(sql_times) * 1000, statistics.median(grid_times) * 1000
+    print(f"sql   {sql_ms:8.3f} ms/query (median)")
+    print(f"grid  {grid_ms:8.3f} ms/query (median, {sql_ms / max(grid_ms, 1e-9):.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
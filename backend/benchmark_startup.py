@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold start of the API process
+
+Times, in fresh interpreter processes:
+  fastapi   - importing FastAPI alone (the floor for any worker)
+  backend   - importing backend.py (route registration, no database or SDK work)
+  startup   - backend import plus the lifespan startup against a temporary SQLite database,
+              first on an empty database (every migration runs) and then on a current one
+
+Usage:
+    python benchmark_startup.py [--runs 5]
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PROBES = {
+    "fastapi": "import fastapi, fastapi.security, fastapi.middleware.cors",
+    "backend": "import backend",
+}
+
+STARTUP_PROBE = """
+import time, json, logging
+logging.disable(logging.CRITICAL)
+started = time.perf_counter()
+import backend
+imported = time.perf_counter()
+backend.start_services()
+finished = time.perf_counter()
+backend.stop_services()
+print(json.dumps({"import": imported - started, "lifespan": finished - imported}))
+"""
+
+
+def run_probe(code: str) -> float:
+    wrapped = (
+        "import time, sys\nsys.path.insert(0, %r)\nstarted = time.perf_counter()\n%s\n"
+        "print(time.perf_counter() - started)" % (BACKEND_DIR, code)
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", wrapped], capture_output=True, text=True, check=True,
+        cwd=BACKEND_DIR,
+    ).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def run_startup(db_dir: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", STARTUP_PROBE], capture_output=True, text=True, check=True, cwd=db_dir,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, code in PROBES.items():
+        samples = [run_probe(code) for _ in range(args.runs)]
+        print(f"{label:<10} median {statistics.median(samples) * 1000:8.1f} ms  "
+              f"(min {min(samples) * 1000:.1f}, max {max(samples) * 1000:.1f})")
+
+    # backend.py keeps events.db next to itself, so run against a scratch copy of the code
+    scratch = tempfile.mkdtemp()
+    for name in os.listdir(BACKEND_DIR):
+        if name.endswith(".py"):
+            with open(os.path.join(BACKEND_DIR, name), "rb") as src, \
+                    open(os.path.join(scratch, name), "wb") as dst:
+                dst.write(src.read())
+
+    fresh = run_startup(scratch)
+    current = [run_startup(scratch) for _ in range(args.runs)]
+    print(f"\nstartup on an empty database:   import {fresh['import'] * 1000:.1f} ms, "
+          f"lifespan {fresh['lifespan'] * 1000:.1f} ms")
+    print(f"startup on a current database:  import "
+          f"{statistics.median(r['import'] for r in current) * 1000:.1f} ms, lifespan "
+          f"{statistics.median(r['lifespan'] for r in current) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -48,6 +48,11 @@ EVENT_FIELDS = [
     ('start_datetime', 'TEXT'),
     ('end_datetime', 'TEXT'),
     
+    # Typed copies of date/start_time/end_date/end_time (event_data_builder.typed_event_columns)
+    ('event_date', 'DATE'),
+    ('start_ts', 'TIMESTAMP'),
+    ('end_ts', 'TIMESTAMP'),
+    
     # Metadata fields
     ('created_by', 'INTEGER NOT NULL'),
     ('created_at', 'TIMESTAMP DEFAULT CURRENT_TIMESTAMP'),
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Non-blocking Database Access
+Runs blocking psycopg2/sqlite3 work on a bounded thread pool so async FastAPI handlers
+never stall the event loop while a query is in flight.
+
+Usage from an async endpoint (callers can adopt this one handler at a time):
+
+    def _load_event(event_id):
+        with get_db() as conn:
+            ...
+            return row
+
+    row = await run_db(_load_event, event_id)
+"""
+
+import os
+import asyncio
+import logging
+import threading
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from db_pool import DB_POOL_MAX_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Worker threads default to the connection pool size so queued queries wait for a thread
+# rather than piling up on the pool semaphore
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", DB_POOL_MAX_SIZE))
+DB_QUERY_TIMEOUT = float(os.getenv("DB_QUERY_TIMEOUT", 15))  # Seconds, including queue time
+
+
+class DBQueryTimeoutError(Exception):
+    """Raised when offloaded database work does not finish within its timeout"""
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {
+    "submitted": 0,
+    "completed": 0,
+    "failed": 0,
+    "timeouts": 0,
+    "in_flight": 0,
+    "peak_in_flight": 0,
+}
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Return the shared database executor, creating it on first use"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db-worker"
+                )
+    return _executor
+
+
+def _track(key: str, delta: int = 1):
+    with _stats_lock:
+        _stats[key] += delta
+        if key == "in_flight":
+            _stats["peak_in_flight"] = max(_stats["peak_in_flight"], _stats["in_flight"])
+
+
+async def run_db(func, *args, timeout: float = DB_QUERY_TIMEOUT, **kwargs):
+    """
+    Run a blocking database function in the shared executor and await its result.
+
+    The call inherits the caller's contextvars. If it does not finish within `timeout`
+    seconds DBQueryTimeoutError is raised; the worker thread finishes on its own and the
+    PostgreSQL statement_timeout bounds how long it can keep a connection busy.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+
+    _track("submitted")
+    _track("in_flight")
+    try:
+        result = await asyncio.wait_for(
+            loop.run_in_executor(get_db_executor(), call), timeout
+        )
+    except asyncio.TimeoutError:
+        _track("timeouts")
+        logger.warning(
+            f"Database call {getattr(func, '__name__', func)} exceeded timeout of {timeout}s"
+        )
+        raise DBQueryTimeoutError(f"Database query timeout after {timeout}s")
+    except Exception:
+        _track("failed")
+        raise
+    finally:
+        _track("in_flight", -1)
+
+    _track("completed")
+    return result
+
+
+def offload_db(func=None, *, timeout: float = DB_QUERY_TIMEOUT):
+    """
+    Decorator turning a blocking database function into an awaitable one:
+
+        @offload_db
+        def _count_events(cursor_args): ...
+
+        count = await _count_events(...)
+    """
+    def decorator(inner):
+        @functools.wraps(inner)
+        async def wrapper(*args, **kwargs):
+            return await run_db(inner, *args, timeout=timeout, **kwargs)
+
+        wrapper.sync = inner
+        return wrapper
+
+    return decorator(func) if func is not None else decorator
+
+
+def executor_stats() -> dict:
+    """Executor load numbers for /health"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["workers"] = DB_EXECUTOR_WORKERS
+    stats["timeout_seconds"] = DB_QUERY_TIMEOUT
+    return stats
+
+
+def shutdown_db_executor(wait: bool = True):
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Database Connection Pool
+Process-wide pooled connections shared by backend.py, shared_utils.py and the MissionOps modules.
+
+PostgreSQL connections are kept open in an idle deque bounded by a semaphore so that callers
+wait (up to DB_POOL_TIMEOUT seconds) for a free slot instead of failing immediately.
+Local SQLite connections are kept per thread so the WAL/cache PRAGMAs are only applied once.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Pool configuration (all overridable through the environment)
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 1))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))  # Max seconds to wait for a free connection
+DB_POOL_PING_AFTER = float(os.getenv("DB_POOL_PING_AFTER", 30))  # Ping connections idle longer than this
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", 1800))  # Recycle connections older than this
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", 600))  # Close surplus connections unused this long
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))  # Server-side per-statement limit
+
+# Connection parameters used for every PostgreSQL connection
+PG_CONNECT_KWARGS = {
+    "connect_timeout": 8,
+    "keepalives": 1,
+    "keepalives_idle": 30,
+    "keepalives_interval": 5,
+    "keepalives_count": 3,
+    "application_name": "todoevents",
+}
+if DB_STATEMENT_TIMEOUT_MS > 0:
+    PG_CONNECT_KWARGS["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection became available within the configured wait time"""
+
+
+class PostgresConnectionPool:
+    """
+    Thread-safe PostgreSQL pool with bounded waiting, health checks and saturation stats
+
+    Idle connections are kept in our own LIFO deque rather than psycopg2's pool, whose
+    putconn() closes any connection returned while min_size are already idle. Here a
+    returned connection stays open until it exceeds DB_POOL_MAX_LIFETIME, or sits unused
+    for DB_POOL_MAX_IDLE while more than min_size are idle. Each connection carries its
+    own created_at / returned_at times, so nothing is keyed by id() and nothing outlives it.
+    """
+
+    def __init__(self, dsn: str, min_size: int = DB_POOL_MIN_SIZE, max_size: int = DB_POOL_MAX_SIZE,
+                 timeout: float = DB_POOL_TIMEOUT):
+        import psycopg2
+        from psycopg2.extensions import connection as PGConnection
+        from psycopg2.extras import RealDictCursor
+
+        class PooledConnection(PGConnection):
+            """psycopg2 connection that remembers when it was opened and last returned"""
+            created_at = 0.0
+            returned_at = 0.0
+
+        self._psycopg2 = psycopg2
+        self._connection_factory = PooledConnection
+        self._cursor_factory = RealDictCursor
+        self.dsn = dsn
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self._idle = deque()  # most recently returned connection on the right
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+            "in_use": 0,
+            "peak_in_use": 0,
+            "opened": 0,
+            "discarded": 0,
+        }
+        for _ in range(self.min_size):
+            self._idle.append(self._connect())
+
+    def _connect(self):
+        conn = self._psycopg2.connect(
+            self.dsn,
+            connection_factory=self._connection_factory,
+            cursor_factory=self._cursor_factory,
+            **PG_CONNECT_KWARGS,
+        )
+        conn.created_at = conn.returned_at = time.monotonic()
+        with self._lock:
+            self._stats["opened"] += 1
+        return conn
+
+    def _is_healthy(self, conn) -> bool:
+        """Cheap local checks first, then a round trip only for stale connections"""
+        if conn.closed:
+            return False
+
+        now = time.monotonic()
+        if now - conn.created_at > DB_POOL_MAX_LIFETIME:
+            return False
+
+        if now - conn.returned_at > DB_POOL_PING_AFTER:
+            try:
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+            except Exception:
+                return False
+        return True
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._stats["discarded"] += 1
+
+    def _reset(self, conn):
+        """Drop any transaction left open by the previous user of this connection"""
+        status = conn.info.transaction_status
+        if status != self._psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+
+    def _checkout(self):
+        """Reuse the most recently returned healthy connection, or open a new one"""
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._connect()
+            if self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+
+    def _trim_idle(self):
+        """Close connections at the cold end of the deque that have sat unused too long"""
+        expired = []
+        now = time.monotonic()
+        with self._lock:
+            while len(self._idle) > self.min_size and now - self._idle[0].returned_at > DB_POOL_MAX_IDLE:
+                expired.append(self._idle.popleft())
+        for conn in expired:
+            self._discard(conn)
+
+    def getconn(self, autocommit: bool = True):
+        start = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["waits"] += 1
+            if not self._slots.acquire(timeout=self.timeout):
+                with self._lock:
+                    self._stats["timeouts"] += 1
+                raise PoolTimeoutError(
+                    f"No database connection available after {self.timeout}s "
+                    f"(pool max size {self.max_size})"
+                )
+
+        try:
+            conn = self._checkout()
+            self._reset(conn)
+            conn.autocommit = autocommit
+        except Exception:
+            self._slots.release()
+            raise
+
+        wait_ms = (time.monotonic() - start) * 1000
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["total_wait_ms"] += wait_ms
+            self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], wait_ms)
+            self._stats["in_use"] += 1
+            self._stats["peak_in_use"] = max(self._stats["peak_in_use"], self._stats["in_use"])
+        return conn
+
+    def putconn(self, conn):
+        try:
+            if conn.closed:
+                self._discard(conn)
+            else:
+                try:
+                    # Uncommitted work is discarded, exactly as closing the connection used to do
+                    self._reset(conn)
+                    conn.returned_at = time.monotonic()
+                    with self._lock:
+                        self._idle.append(conn)
+                except Exception:
+                    self._discard(conn)
+        finally:
+            with self._lock:
+                self._stats["in_use"] -= 1
+            self._slots.release()
+        self._trim_idle()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle"] = len(self._idle)
+        checkouts = stats["checkouts"] or 1
+        stats.update({
+            "backend": "postgresql",
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "timeout_seconds": self.timeout,
+            "avg_wait_ms": round(stats["total_wait_ms"] / checkouts, 2),
+            "total_wait_ms": round(stats["total_wait_ms"], 2),
+            "max_wait_ms": round(stats["max_wait_ms"], 2),
+            "saturation": round(stats["in_use"] / self.max_size, 2),
+        })
+        return stats
+
+    def closeall(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+class SQLiteConnectionPool:
+    """
+    Per-thread persistent SQLite connections for local development.
+    Each thread keeps a small stack of idle connections so nested get_db() calls still get
+    their own connection, while the PRAGMAs are only applied when a connection is opened.
+    """
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {"checkouts": 0, "opened": 0, "in_use": 0, "peak_in_use": 0}
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_file, timeout=10)
+        conn.row_factory = sqlite3.Row
+        # Enable WAL mode for better concurrent access
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # Faster than FULL
+        conn.execute("PRAGMA cache_size=10000")  # Increase cache
+        with self._lock:
+            self._stats["opened"] += 1
+        return conn
+
+    def getconn(self, autocommit: bool = True):
+        idle = getattr(self._local, "idle", None)
+        if idle is None:
+            idle = self._local.idle = []
+        conn = idle.pop() if idle else self._open()
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["in_use"] += 1
+            self._stats["peak_in_use"] = max(self._stats["peak_in_use"], self._stats["in_use"])
+        return conn
+
+    def putconn(self, conn):
+        with self._lock:
+            self._stats["in_use"] -= 1
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._local.idle.append(conn)
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["backend"] = "sqlite"
+        return stats
+
+    def closeall(self):
+        for conn in getattr(self._local, "idle", []):
+            conn.close()
+        self._local.idle = []
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(db_url: str = None, db_file: str = None):
+    """Return the process-wide pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if db_url:
+                    _pool = PostgresConnectionPool(db_url)
+                    logger.info(
+                        f"Created PostgreSQL connection pool (min={_pool.min_size}, max={_pool.max_size})"
+                    )
+                else:
+                    _pool = SQLiteConnectionPool(db_file)
+    return _pool
+
+
+@contextmanager
+def pooled_connection(db_url: str = None, db_file: str = None, autocommit: bool = True):
+    """Check a connection out of the shared pool and always give it back"""
+    pool = get_pool(db_url, db_file)
+    conn = pool.getconn(autocommit=autocommit)
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+
+def pool_stats() -> dict:
+    """Pool saturation numbers for /health (empty until the pool has been used)"""
+    return _pool.stats() if _pool is not None else {}
@@ -14,11 +14,17 @@ EMAIL_CONFIG = {
     'from_email': os.getenv('FROM_EMAIL', 'support@todo-events.com'),
     'from_name': os.getenv('FROM_NAME', 'Todo Events Support')
 }
+# ssl (implicit, port 465), starttls, or none (plain, e.g. a local aiosmtpd for testing)
+EMAIL_CONFIG['smtp_security'] = os.getenv(
+    'SMTP_SECURITY', 'ssl' if EMAIL_CONFIG['smtp_port'] == 465 else 'starttls'
+).lower()
+SMTP_TIMEOUT = float(os.getenv('SMTP_TIMEOUT', '30'))
 
 class EmailService:
     def __init__(self):
         self.config = EMAIL_CONFIG
         self.logger = logging.getLogger(__name__)
+        self.outbox = None
         
         # Validate configuration on initialization
         self._validate_config()
@@ -36,103 +42,133 @@ class EmailService:
         self.logger.info(f"👤 Username: {self.config['smtp_username']}")
         self.logger.info(f"📨 From: {self.config['from_email']}")
     
+    def use_outbox(self, outbox) -> None:
+        """Queue messages in an EmailOutbox instead of sending them inline"""
+        self.outbox = outbox
+
+    def is_configured(self) -> bool:
+        return bool(self.config['smtp_password']) or self.config['smtp_security'] == 'none'
+
     def send_email(self, to_email: str, subject: str, html_content: str, text_content: Optional[str] = None, cc_email: Optional[str] = None) -> bool:
-        """Send an email using SMTP"""
+        """
+        Send an email, or queue it for the background sender when an outbox is attached.
+        If queueing fails the message is sent inline instead.
+        """
         
         # Check if credentials are available
-        if not self.config['smtp_password']:
+        if not self.is_configured():
             self.logger.error("❌ Cannot send email: SMTP_PASSWORD not configured")
             self.logger.error("📋 Set SMTP_PASSWORD environment variable or create .env file")
             return False
+        
+        if self.outbox is not None:
+            try:
+                outbox_id = self.outbox.enqueue(to_email, subject, html_content, text_content, cc_email)
+                self.logger.info(f"📥 Queued email {outbox_id} to {to_email}")
+                return True
+            except Exception as e:
+                # Password resets and receipts must not vanish with the database; send inline
+                self.logger.error(f"❌ Failed to queue email to {to_email}, sending inline: {str(e)}")
             
         try:
             self.logger.info(f"📤 Attempting to send email to {to_email}")
-            self.logger.info(f"🔌 Connecting to {self.config['smtp_server']}:{self.config['smtp_port']}")
-            
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = f"{self.config['from_name']} <{self.config['from_email']}>"
-            msg['To'] = to_email
-            
-            # Add CC if specified
-            if cc_email:
-                msg['Cc'] = cc_email
-            
-            # Add text version if provided
-            if text_content:
-                text_part = MIMEText(text_content, 'plain')
-                msg.attach(text_part)
-            
-            # Add HTML version
-            html_part = MIMEText(html_content, 'html')
-            msg.attach(html_part)
-            
-            # Handle different ports and encryption methods
-            smtp_port = self.config['smtp_port']
-            
-            if smtp_port == 465:
-                # Port 465 uses implicit SSL (SMTPS)
-                self.logger.info("🔐 Using SSL connection (port 465)")
-                with smtplib.SMTP_SSL(self.config['smtp_server'], smtp_port) as server:
-                    self.logger.info(f"🔑 Authenticating with {self.config['smtp_username']}")
-                    server.login(self.config['smtp_username'], self.config['smtp_password'])
-                    
-                    self.logger.info("📬 Sending message...")
-                    # Prepare recipient list (to + cc)
-                    recipients = [to_email]
-                    if cc_email:
-                        recipients.append(cc_email)
-                        self.logger.info(f"📧 CC: {cc_email}")
-                    server.send_message(msg, to_addrs=recipients)
-            else:
-                # Port 587 (and others) use explicit TLS (STARTTLS)
-                self.logger.info("🔐 Using STARTTLS connection")
-                with smtplib.SMTP(self.config['smtp_server'], smtp_port) as server:
-                    self.logger.info("🔐 Starting TLS encryption...")
-                    server.starttls()
-                    
-                    self.logger.info(f"🔑 Authenticating with {self.config['smtp_username']}")
-                    server.login(self.config['smtp_username'], self.config['smtp_password'])
-                    
-                    self.logger.info("📬 Sending message...")
-                    # Prepare recipient list (to + cc)
-                    recipients = [to_email]
-                    if cc_email:
-                        recipients.append(cc_email)
-                        self.logger.info(f"📧 CC: {cc_email}")
-                    server.send_message(msg, to_addrs=recipients)
-            
+            server = self.connect()
+            try:
+                self.deliver(server, to_email, subject, html_content, text_content, cc_email)
+            finally:
+                try:
+                    server.quit()
+                except Exception:
+                    pass
             self.logger.info(f"✅ Email sent successfully to {to_email}")
             return True
             
         except Exception as e:
-            self.logger.error(f"❌ Failed to send email to {to_email}: {str(e)}")
-            
-            # Provide helpful debugging information
-            if "Name or service not known" in str(e):
-                self.logger.error("🔍 DNS resolution failed for SMTP server")
-                self.logger.error(f"   Server: {self.config['smtp_server']}")
-                self.logger.error("   Check internet connection and DNS settings")
-                self.logger.error("   💡 Try using 'smtp.zoho.com' instead of 'smtppro.zoho.com'")
-            elif "Authentication failed" in str(e) or "Invalid credentials" in str(e):
-                self.logger.error("🔑 SMTP authentication failed")
-                self.logger.error("   Check SMTP_USERNAME and SMTP_PASSWORD")
-                self.logger.error("   💡 Make sure you're using your Zoho Mail password or app-specific password")
-            elif "Connection refused" in str(e):
-                self.logger.error("🚫 Connection refused by SMTP server")
-                self.logger.error(f"   Check SMTP_SERVER ({self.config['smtp_server']}) and SMTP_PORT ({self.config['smtp_port']})")
-            elif "Connection unexpectedly closed" in str(e):
-                self.logger.error("🔌 Connection unexpectedly closed")
-                self.logger.error("   This often happens when using wrong encryption method for the port")
-                self.logger.error("   💡 For port 465: Use SSL (implicit). For port 587: Use STARTTLS (explicit)")
-                self.logger.error("   💡 Try using smtp.zoho.com with port 587 instead")
-            elif "SSL" in str(e) or "TLS" in str(e):
-                self.logger.error("🔐 SSL/TLS encryption issue")
-                self.logger.error("   💡 Try switching between port 465 (SSL) and 587 (STARTTLS)")
-            
+            self.log_send_error(to_email, e)
             return False
     
+    def build_message(self, to_email: str, subject: str, html_content: str, text_content: Optional[str] = None, cc_email: Optional[str] = None, message_id: Optional[str] = None) -> MIMEMultipart:
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = f"{self.config['from_name']} <{self.config['from_email']}>"
+        msg['To'] = to_email
+        
+        # Stable Message-ID for queued mail, so a resend after a crash can be deduplicated
+        if message_id:
+            domain = self.config['from_email'].rsplit('@', 1)[-1]
+            msg['Message-ID'] = f"<{message_id}@{domain}>"
+        
+        # Add CC if specified
+        if cc_email:
+            msg['Cc'] = cc_email
+        
+        # Add text version if provided
+        if text_content:
+            text_part = MIMEText(text_content, 'plain')
+            msg.attach(text_part)
+        
+        # Add HTML version
+        html_part = MIMEText(html_content, 'html')
+        msg.attach(html_part)
+        return msg
+    
+    def connect(self) -> smtplib.SMTP:
+        """Open an authenticated SMTP connection; the caller quits it"""
+        server_name, smtp_port = self.config['smtp_server'], self.config['smtp_port']
+        security = self.config['smtp_security']
+        self.logger.info(f"🔌 Connecting to {server_name}:{smtp_port} ({security})")
+        
+        if security == 'ssl':
+            # Port 465 uses implicit SSL (SMTPS)
+            server = smtplib.SMTP_SSL(server_name, smtp_port, timeout=SMTP_TIMEOUT)
+        else:
+            server = smtplib.SMTP(server_name, smtp_port, timeout=SMTP_TIMEOUT)
+        try:
+            if security == 'starttls':
+                # Port 587 (and others) use explicit TLS (STARTTLS)
+                server.starttls()
+            if self.config['smtp_password']:
+                self.logger.info(f"🔑 Authenticating with {self.config['smtp_username']}")
+                server.login(self.config['smtp_username'], self.config['smtp_password'])
+        except Exception:
+            server.close()
+            raise
+        return server
+    
+    def deliver(self, server: smtplib.SMTP, to_email: str, subject: str, html_content: str, text_content: Optional[str] = None, cc_email: Optional[str] = None, message_id: Optional[str] = None) -> None:
+        """Send one message over an open connection; raises on failure"""
+        msg = self.build_message(to_email, subject, html_content, text_content, cc_email, message_id)
+        # Prepare recipient list (to + cc)
+        recipients = [to_email]
+        if cc_email:
+            recipients.append(cc_email)
+        server.send_message(msg, to_addrs=recipients)
+    
+    def log_send_error(self, to_email: str, e: Exception) -> None:
+        self.logger.error(f"❌ Failed to send email to {to_email}: {str(e)}")
+        
+        # Provide helpful debugging information
+        if "Name or service not known" in str(e):
+            self.logger.error("🔍 DNS resolution failed for SMTP server")
+            self.logger.error(f"   Server: {self.config['smtp_server']}")
+            self.logger.error("   Check internet connection and DNS settings")
+            self.logger.error("   💡 Try using 'smtp.zoho.com' instead of 'smtppro.zoho.com'")
+        elif "Authentication failed" in str(e) or "Invalid credentials" in str(e):
+            self.logger.error("🔑 SMTP authentication failed")
+            self.logger.error("   Check SMTP_USERNAME and SMTP_PASSWORD")
+            self.logger.error("   💡 Make sure you're using your Zoho Mail password or app-specific password")
+        elif "Connection refused" in str(e):
+            self.logger.error("🚫 Connection refused by SMTP server")
+            self.logger.error(f"   Check SMTP_SERVER ({self.config['smtp_server']}) and SMTP_PORT ({self.config['smtp_port']})")
+        elif "Connection unexpectedly closed" in str(e):
+            self.logger.error("🔌 Connection unexpectedly closed")
+            self.logger.error("   This often happens when using wrong encryption method for the port")
+            self.logger.error("   💡 For port 465: Use SSL (implicit). For port 587: Use STARTTLS (explicit)")
+            self.logger.error("   💡 Try using smtp.zoho.com with port 587 instead")
+        elif "SSL" in str(e) or "TLS" in str(e):
+            self.logger.error("🔐 SSL/TLS encryption issue")
+            self.logger.error("   💡 Try switching between port 465 (SSL) and 587 (STARTTLS)")
+    
     def send_password_reset_email(self, to_email: str, reset_code: str, user_name: Optional[str] = None) -> bool:
         """Send password reset email"""
         subject = "Reset Your Todo Events Password"
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Email Outbox
+Persistent queue for outbound email, drained by a background sender.
+
+EmailService.send_email() only inserts a row into email_outbox and wakes the sender, so
+request handlers and Stripe webhooks return without waiting on SMTP. The sender thread
+claims due rows in batches and delivers them over one SMTP connection that it keeps open
+between batches (closed after EMAIL_SMTP_IDLE_SECONDS without mail). Sends are limited
+to EMAIL_RATE_LIMIT_PER_MINUTE per process.
+
+A failed delivery is retried with exponential backoff (EMAIL_RETRY_BASE_SECONDS doubling
+up to EMAIL_RETRY_MAX_SECONDS); permanent SMTP rejections (5xx) and messages that used up
+EMAIL_MAX_ATTEMPTS end as 'failed' and can be requeued from the admin API. Rows are
+claimed with a conditional UPDATE, so several workers can share the table, and a row left
+'sending' by a worker that died is picked up again after EMAIL_CLAIM_TIMEOUT_SECONDS.
+
+Right before each message goes to SMTP the sender re-checks its claim token and renews
+claimed_at; a message another worker reclaimed meanwhile is skipped rather than sent
+twice. Each message carries a Message-ID derived from its outbox row, so the one case
+left (a worker dying between the SMTP handoff and marking the row sent) resends with the
+same Message-ID.
+"""
+
+import os
+import time
+import uuid
+import random
+import smtplib
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from background_flusher import BackgroundFlusher
+
+logger = logging.getLogger(__name__)
+
+EMAIL_OUTBOX_INTERVAL_MS = int(os.getenv("EMAIL_OUTBOX_INTERVAL_MS", 5000))
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", 20))
+EMAIL_RATE_LIMIT_PER_MINUTE = int(os.getenv("EMAIL_RATE_LIMIT_PER_MINUTE", 60))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", 6))
+EMAIL_RETRY_BASE_SECONDS = int(os.getenv("EMAIL_RETRY_BASE_SECONDS", 30))
+EMAIL_RETRY_MAX_SECONDS = int(os.getenv("EMAIL_RETRY_MAX_SECONDS", 3600))
+EMAIL_SMTP_IDLE_SECONDS = int(os.getenv("EMAIL_SMTP_IDLE_SECONDS", 60))
+EMAIL_CLAIM_TIMEOUT_SECONDS = int(os.getenv("EMAIL_CLAIM_TIMEOUT_SECONDS", 600))
+
+OUTBOX_STATUSES = ("pending", "sending", "sent", "failed")
+
+
+def email_outbox_table_sql(is_postgres: bool) -> str:
+    id_column = "id SERIAL PRIMARY KEY" if is_postgres else "id INTEGER PRIMARY KEY AUTOINCREMENT"
+    return f"""CREATE TABLE IF NOT EXISTS email_outbox (
+                            {id_column},
+                            to_email TEXT NOT NULL,
+                            cc_email TEXT,
+                            subject TEXT NOT NULL,
+                            html_content TEXT NOT NULL,
+                            text_content TEXT,
+                            status TEXT NOT NULL DEFAULT 'pending',
+                            attempts INTEGER NOT NULL DEFAULT 0,
+                            next_attempt_at TEXT NOT NULL,
+                            claim_token TEXT,
+                            claimed_at TEXT,
+                            last_error TEXT,
+                            created_at TEXT NOT NULL,
+                            sent_at TEXT
+                        )"""
+
+
+def ensure_email_outbox(cursor, is_postgres: bool) -> None:
+    cursor.execute(email_outbox_table_sql(is_postgres))
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox(status, next_attempt_at)"
+    )
+
+
+def _timestamp(moment: Optional[datetime] = None) -> str:
+    return (moment or datetime.utcnow()).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def retry_delay(attempts: int, base: int = EMAIL_RETRY_BASE_SECONDS,
+                cap: int = EMAIL_RETRY_MAX_SECONDS) -> float:
+    """Backoff before the next try after `attempts` failures, with up to 10% jitter"""
+    delay = min(cap, base * (2 ** max(0, attempts - 1)))
+    return delay * (1 + random.random() * 0.1)
+
+
+def is_permanent_failure(error: Exception) -> bool:
+    """5xx SMTP replies (bad recipient, rejected content) will not succeed on retry"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(500 <= code < 600 for code, _ in error.recipients.values())
+    code = getattr(error, "smtp_code", None)
+    return isinstance(code, int) and 500 <= code < 600 and not isinstance(
+        error, smtplib.SMTPAuthenticationError
+    )
+
+
+def outbox_message_id(message: Dict) -> str:
+    """Stable left-hand part of the Message-ID header for an outbox row"""
+    created = "".join(ch for ch in str(message["created_at"]) if ch.isdigit())
+    return f"outbox.{message['id']}.{created}"
+
+
+class RateLimiter:
+    """Token bucket allowing `per_minute` sends, refilled continuously"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = max(1, per_minute)
+        self.tokens = float(self.capacity)
+        self.rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class EmailOutbox(BackgroundFlusher):
+    """
+    Queues messages in email_outbox and delivers them in the background. `transport`
+    provides connect() -> logged-in SMTP connection and
+    deliver(connection, to_email, subject, html_content, text_content, cc_email, message_id=...).
+    """
+
+    thread_name = "email-outbox"
+
+    def __init__(self, get_db: Callable, get_placeholder: Callable[[], str], transport,
+                 interval_ms: int = EMAIL_OUTBOX_INTERVAL_MS,
+                 batch_size: int = EMAIL_OUTBOX_BATCH_SIZE,
+                 rate_limit_per_minute: int = EMAIL_RATE_LIMIT_PER_MINUTE,
+                 max_attempts: int = EMAIL_MAX_ATTEMPTS):
+        super().__init__(interval_ms / 1000.0)
+        self.get_db = get_db
+        self.get_placeholder = get_placeholder
+        self.transport = transport
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.rate_limiter = RateLimiter(rate_limit_per_minute)
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._connection = None
+        self._last_used = 0.0
+        self._counters = {
+            "enqueued": 0,
+            "sent": 0,
+            "retried": 0,
+            "failed": 0,
+            "rate_limited": 0,
+            "connections_opened": 0,
+        }
+
+    def enqueue(self, to_email: str, subject: str, html_content: str,
+                text_content: Optional[str] = None, cc_email: Optional[str] = None) -> int:
+        """Store a message for delivery and wake the sender; returns the outbox id"""
+        placeholder = self.get_placeholder()
+        # RETURNING on PostgreSQL, lastrowid on SQLite
+        returning = " RETURNING id" if placeholder == "%s" else ""
+        now = _timestamp()
+        with self.get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""
+                INSERT INTO email_outbox
+                    (to_email, cc_email, subject, html_content, text_content, status,
+                     attempts, next_attempt_at, created_at)
+                VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder},
+                        'pending', 0, {placeholder}, {placeholder}){returning}
+                """,
+                (to_email, cc_email, subject, html_content, text_content, now, now),
+            )
+            outbox_id = cursor.fetchone()["id"] if returning else cursor.lastrowid
+            conn.commit()
+        with self._lock:
+            self._counters["enqueued"] += 1
+        self.wake()
+        return outbox_id
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the sender without draining; unsent mail stays in the outbox for the next run"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._flush_lock:
+            self._close_connection()
+
+    def flush(self) -> int:
+        """Deliver due messages until none are left or the rate limit is hit; returns the number sent"""
+        with self._flush_lock:
+            sent = 0
+            try:
+                while True:
+                    batch = self._claim()
+                    if not batch:
+                        break
+                    batch_sent, limited = self._deliver_batch(batch)
+                    sent += batch_sent
+                    if limited or len(batch) < self.batch_size:
+                        break
+            except Exception as e:
+                logger.error(f"Email outbox flush failed: {type(e).__name__}: {e}")
+            if self._connection is not None and (
+                self._stopping.is_set() or time.monotonic() - self._last_used > EMAIL_SMTP_IDLE_SECONDS
+            ):
+                self._close_connection()
+            return sent
+
+    def _claim(self) -> List[Dict]:
+        placeholder = self.get_placeholder()
+        token = uuid.uuid4().hex
+        now = datetime.utcnow()
+        stale = _timestamp(now - timedelta(seconds=EMAIL_CLAIM_TIMEOUT_SECONDS))
+        due = f"""((status = 'pending' AND next_attempt_at <= {placeholder})
+                   OR (status = 'sending' AND claimed_at < {placeholder}))"""
+        with self.get_db() as conn:
+            cursor = conn.cursor()
+            # The outer condition is re-checked against rows another worker just claimed
+            cursor.execute(
+                f"""
+                UPDATE email_outbox
+                SET status = 'sending', claim_token = {placeholder}, claimed_at = {placeholder}
+                WHERE {due}
+                  AND id IN (SELECT id FROM email_outbox WHERE {due} ORDER BY id LIMIT {int(self.batch_size)})
+                """,
+                (token, _timestamp(now), _timestamp(now), stale, _timestamp(now), stale),
+            )
+            cursor.execute(
+                f"SELECT * FROM email_outbox WHERE claim_token = {placeholder} AND status = 'sending' ORDER BY id",
+                (token,),
+            )
+            rows = [dict(row) for row in cursor.fetchall()]
+            conn.commit()
+        return rows
+
+    def _deliver_batch(self, batch: List[Dict]):
+        sent = 0
+        for index, message in enumerate(batch):
+            if not self.rate_limiter.try_acquire():
+                with self._lock:
+                    self._counters["rate_limited"] += len(batch) - index
+                self._release(batch[index:])
+                return sent, True
+            if not self._renew_claim(message):
+                logger.warning(f"Email {message['id']} was reclaimed by another worker, skipping")
+                continue
+            try:
+                connection = self._get_connection()
+                self.transport.deliver(
+                    connection, message["to_email"], message["subject"], message["html_content"],
+                    message["text_content"], message["cc_email"], message_id=outbox_message_id(message),
+                )
+            except Exception as e:
+                if not isinstance(e, (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError)):
+                    # Connection-level trouble: reconnect for the next message
+                    self._close_connection()
+                self._record_failure(message, e)
+                continue
+            self._last_used = time.monotonic()
+            self._mark_sent(message)
+            sent += 1
+        return sent, False
+
+    def _renew_claim(self, message: Dict) -> bool:
+        """Refresh claimed_at if this worker still holds the message; False if it lost it"""
+        placeholder = self.get_placeholder()
+        with self.get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""
+                UPDATE email_outbox SET claimed_at = {placeholder}
+                WHERE id = {placeholder} AND claim_token = {placeholder} AND status = 'sending'
+                """,
+                (_timestamp(), message["id"], message["claim_token"]),
+            )
+            renewed = cursor.rowcount > 0
+            conn.commit()
+        return renewed
+
+    def _get_connection(self):
+        if self._connection is not None:
+            try:
+                self._connection.noop()
+                return self._connection
+            except Exception:
+                self._close_connection()
+        self._connection = self.transport.connect()
+        self._last_used = time.monotonic()
+        with self._lock:
+            self._counters["connections_opened"] += 1
+        return self._connection
+
+    def _close_connection(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                connection.quit()
+            except Exception:
+                pass
+
+    def _mark_sent(self, message: Dict) -> None:
+        placeholder = self.get_placeholder()
+        with self.get_db() as conn:
+            conn.cursor().execute(
+                f"""
+                UPDATE email_outbox
+                SET status = 'sent', attempts = attempts + 1, sent_at = {placeholder},
+                    claim_token = NULL, last_error = NULL
+                WHERE id = {placeholder}
+                """,
+                (_timestamp(), message["id"]),
+            )
+            conn.commit()
+        with self._lock:
+            self._counters["sent"] += 1
+
+    def _record_failure(self, message: Dict, error: Exception) -> None:
+        attempts = message["attempts"] + 1
+        final = attempts >= self.max_attempts or is_permanent_failure(error)
+        next_attempt = datetime.utcnow() + timedelta(seconds=retry_delay(attempts))
+        placeholder = self.get_placeholder()
+        with self.get_db() as conn:
+            conn.cursor().execute(
+                f"""
+                UPDATE email_outbox
+                SET status = {placeholder}, attempts = {placeholder}, next_attempt_at = {placeholder},
+                    last_error = {placeholder}, claim_token = NULL
+                WHERE id = {placeholder}
+                """,
+                ("failed" if final else "pending", attempts, _timestamp(next_attempt),
+                 f"{type(error).__name__}: {error}"[:1000], message["id"]),
+            )
+            conn.commit()
+        with self._lock:
+            self._counters["failed" if final else "retried"] += 1
+        log = logger.error if final else logger.warning
+        log(
+            f"Email {message['id']} to {message['to_email']} failed (attempt {attempts}"
+            f"{', giving up' if final else ''}): {type(error).__name__}: {error}"
+        )
+
+    def _release(self, messages: List[Dict]) -> None:
+        """Hand claimed but unsent messages back to the queue"""
+        placeholder = self.get_placeholder()
+        ids = [message["id"] for message in messages]
+        with self.get_db() as conn:
+            conn.cursor().execute(
+                f"UPDATE email_outbox SET status = 'pending', claim_token = NULL "
+                f"WHERE id IN ({', '.join([placeholder] * len(ids))})",
+                ids,
+            )
+            conn.commit()
+
+    def requeue(self, outbox_id: int) -> bool:
+        """Send a failed message again from scratch; returns False if it is not failed"""
+        placeholder = self.get_placeholder()
+        with self.get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""
+                UPDATE email_outbox
+                SET status = 'pending', attempts = 0, next_attempt_at = {placeholder}
+                WHERE id = {placeholder} AND status = 'failed'
+                """,
+                (_timestamp(), outbox_id),
+            )
+            requeued = cursor.rowcount > 0
+            conn.commit()
+        if requeued:
+            self.wake()
+        return requeued
+
+    def status(self, failed_limit: int = 20) -> dict:
+        """Queue depth by status, the oldest due message and the latest failures"""
+        with self.get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT status, COUNT(*) AS count FROM email_outbox GROUP BY status")
+            counts = {status: 0 for status in OUTBOX_STATUSES}
+            counts.update({row["status"]: row["count"] for row in cursor.fetchall()})
+            cursor.execute(
+                "SELECT MIN(created_at) AS oldest FROM email_outbox WHERE status IN ('pending', 'sending')"
+            )
+            oldest = cursor.fetchone()["oldest"]
+            cursor.execute(
+                f"""
+                SELECT id, to_email, subject, attempts, last_error, created_at, next_attempt_at
+                FROM email_outbox WHERE status = 'failed'
+                ORDER BY id DESC LIMIT {int(failed_limit)}
+                """
+            )
+            failures = [dict(row) for row in cursor.fetchall()]
+        return {
+            "counts": counts,
+            "oldest_unsent_at": str(oldest) if oldest else None,
+            "recent_failures": failures,
+            "worker": self.stats(),
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+        stats["connection_open"] = self._connection is not None
+        stats["rate_limit_per_minute"] = self.rate_limiter.capacity
+        stats["running"] = self.running
+        return stats
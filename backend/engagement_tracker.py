@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Engagement Tracker
+Write-behind buffering for event views.
+
+POST /events/{id}/view only does in-memory work: the view is deduplicated against a
+bounded LRU of recently seen (event, viewer) pairs and appended to a buffer. A background
+thread flushes the buffer every ENGAGEMENT_FLUSH_INTERVAL_MS, or sooner once
+ENGAGEMENT_FLUSH_MAX_ITEMS views are waiting, as one transaction (get_db must hand out
+connections with autocommit off, otherwise a requeued batch is counted twice):
+  - drop views for events that no longer exist or that are already in event_views
+  - multi-row INSERT into event_views
+  - one aggregated view_count UPDATE per event, in id order
+
+Failed flushes put the batch back; stop() (app shutdown / atexit) drains whatever is left.
+interest_count is not buffered: POST /events/{id}/interest updates it in the transaction
+that writes the event_interests row, so the two cannot drift apart across a restart.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from background_flusher import BackgroundFlusher, insert_rows
+
+logger = logging.getLogger(__name__)
+
+ENGAGEMENT_FLUSH_INTERVAL_MS = int(os.getenv("ENGAGEMENT_FLUSH_INTERVAL_MS", 2000))
+ENGAGEMENT_FLUSH_MAX_ITEMS = int(os.getenv("ENGAGEMENT_FLUSH_MAX_ITEMS", 500))
+ENGAGEMENT_DEDUPE_SIZE = int(os.getenv("ENGAGEMENT_DEDUPE_SIZE", 100000))
+# Upper bound on buffered views if the database stays unavailable; older views are dropped
+ENGAGEMENT_MAX_PENDING = int(os.getenv("ENGAGEMENT_MAX_PENDING", 50000))
+
+
+class EngagementTracker(BackgroundFlusher):
+    """Buffers event views and writes them in batches"""
+
+    thread_name = "engagement-flush"
+
+    def __init__(self, get_db: Callable, get_placeholder: Callable[[], str],
+                 flush_interval_ms: int = ENGAGEMENT_FLUSH_INTERVAL_MS,
+                 flush_max_items: int = ENGAGEMENT_FLUSH_MAX_ITEMS,
+                 dedupe_size: int = ENGAGEMENT_DEDUPE_SIZE,
+                 max_pending: int = ENGAGEMENT_MAX_PENDING):
+        super().__init__(flush_interval_ms / 1000.0)
+        self.get_db = get_db
+        self.get_placeholder = get_placeholder
+        self.flush_max_items = flush_max_items
+        self.dedupe_size = dedupe_size
+        self.max_pending = max_pending
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._seen: "OrderedDict[Tuple[int, str], None]" = OrderedDict()
+        self._pending_views: List[Tuple[int, Optional[int], str]] = []
+        self._pending_view_counts: Dict[int, int] = {}
+        # view_count values read back at flush time, so responses need no query
+        self._known_view_counts: "OrderedDict[int, int]" = OrderedDict()
+        self._counters = {
+            "views_recorded": 0,
+            "views_deduplicated": 0,
+            "views_written": 0,
+            "views_dropped": 0,
+            "flushes": 0,
+            "flush_failures": 0,
+        }
+        self._last_flush_ms = 0.0
+
+    # Request-path API (memory only)
+    def record_view(self, event_id: int, user_id: Optional[int], browser_fingerprint: Optional[str]) -> bool:
+        """Buffer a view; returns False if this viewer was already counted for the event"""
+        fingerprint = browser_fingerprint or "anonymous"
+        viewer = f"u:{user_id}" if user_id else f"f:{fingerprint}"
+        key = (event_id, viewer)
+        with self._lock:
+            if key in self._seen:
+                self._seen.move_to_end(key)
+                self._counters["views_deduplicated"] += 1
+                return False
+            self._seen[key] = None
+            if len(self._seen) > self.dedupe_size:
+                self._seen.popitem(last=False)
+
+            self._pending_views.append((event_id, user_id, fingerprint))
+            self._pending_view_counts[event_id] = self._pending_view_counts.get(event_id, 0) + 1
+            self._counters["views_recorded"] += 1
+            if len(self._pending_views) > self.max_pending:
+                dropped_event_id = self._pending_views.pop(0)[0]
+                self._discount(dropped_event_id, 1)
+                self._counters["views_dropped"] += 1
+            should_flush = len(self._pending_views) >= self.flush_max_items
+
+        if should_flush:
+            self.wake()
+        return True
+
+    def pending_views(self, event_id: int) -> int:
+        """Views buffered (or being flushed) for an event and not yet in view_count"""
+        with self._lock:
+            return self._pending_view_counts.get(event_id, 0)
+
+    def view_count(self, event_id: int) -> Optional[int]:
+        """Last flushed view_count plus buffered views, or None if this worker has not seen it yet"""
+        with self._lock:
+            known = self._known_view_counts.get(event_id)
+            if known is None:
+                return None
+            return known + self._pending_view_counts.get(event_id, 0)
+
+    def remember_view_count(self, event_id: int, view_count: int) -> int:
+        """Store a view_count read from the database; returns it plus buffered views"""
+        with self._lock:
+            self._known_view_counts[event_id] = view_count
+            self._known_view_counts.move_to_end(event_id)
+            while len(self._known_view_counts) > self.dedupe_size:
+                self._known_view_counts.popitem(last=False)
+            return view_count + self._pending_view_counts.get(event_id, 0)
+
+    def _discount(self, event_id: int, count: int) -> None:
+        remaining = self._pending_view_counts.get(event_id, 0) - count
+        if remaining > 0:
+            self._pending_view_counts[event_id] = remaining
+        else:
+            self._pending_view_counts.pop(event_id, None)
+
+    # Flushing
+    def flush(self) -> int:
+        """Write buffered views; returns the number of new view rows"""
+        with self._flush_lock:
+            with self._lock:
+                views, self._pending_views = self._pending_views, []
+
+            if not views:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                written, flushed_counts = self._write(views)
+            except Exception as e:
+                logger.error(f"Engagement flush failed, requeueing {len(views)} views: {type(e).__name__}: {e}")
+                with self._lock:
+                    self._pending_views = views + self._pending_views
+                    self._counters["flush_failures"] += 1
+                return 0
+
+            with self._lock:
+                # Buffered views leave the pending counts once they are in the database (or discarded)
+                for event_id, _, _ in views:
+                    self._discount(event_id, 1)
+                self._counters["flushes"] += 1
+                self._counters["views_written"] += written
+                self._last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+                for event_id, count in flushed_counts.items():
+                    self._known_view_counts[event_id] = count
+                    self._known_view_counts.move_to_end(event_id)
+                # Views for events that were deleted meanwhile: stop answering for them
+                for event_id in {view[0] for view in views} - set(flushed_counts):
+                    self._known_view_counts.pop(event_id, None)
+                while len(self._known_view_counts) > self.dedupe_size:
+                    self._known_view_counts.popitem(last=False)
+            return written
+
+    def _write(self, views: List[Tuple[int, Optional[int], str]]) -> Tuple[int, Dict[int, int]]:
+        placeholder = self.get_placeholder()
+        with self.get_db() as conn:
+            cursor = conn.cursor()
+            new_views: List[Tuple[int, Optional[int], str]] = []
+            existing_events = set()
+
+            if views:
+                event_ids = sorted({view[0] for view in views})
+                id_list = ", ".join([placeholder] * len(event_ids))
+                cursor.execute(f"SELECT id FROM events WHERE id IN ({id_list})", event_ids)
+                existing_events = {row["id"] for row in cursor.fetchall()}
+
+                # Same duplicate rules as the old per-request check: signed-in viewers by
+                # user id, anonymous viewers by browser fingerprint
+                user_ids = sorted({view[1] for view in views if view[1]})
+                fingerprints = sorted({view[2] for view in views if not view[1]})
+                seen_users, seen_fingerprints = set(), set()
+                if user_ids:
+                    cursor.execute(
+                        f"SELECT event_id, user_id FROM event_views WHERE event_id IN ({id_list}) "
+                        f"AND user_id IN ({', '.join([placeholder] * len(user_ids))})",
+                        event_ids + user_ids,
+                    )
+                    seen_users = {(row["event_id"], row["user_id"]) for row in cursor.fetchall()}
+                if fingerprints:
+                    cursor.execute(
+                        f"SELECT event_id, browser_fingerprint FROM event_views WHERE event_id IN ({id_list}) "
+                        f"AND browser_fingerprint IN ({', '.join([placeholder] * len(fingerprints))})",
+                        event_ids + fingerprints,
+                    )
+                    seen_fingerprints = {(row["event_id"], row["browser_fingerprint"])
+                                         for row in cursor.fetchall()}
+
+                for event_id, user_id, fingerprint in views:
+                    if event_id not in existing_events:
+                        continue
+                    key = (event_id, user_id) if user_id else (event_id, fingerprint)
+                    if key in (seen_users if user_id else seen_fingerprints):
+                        continue
+                    (seen_users if user_id else seen_fingerprints).add(key)
+                    new_views.append((event_id, user_id, fingerprint))
+
+                if new_views:
+                    insert_rows(cursor, "event_views", ("event_id", "user_id", "browser_fingerprint"),
+                                new_views, placeholder)
+
+            view_counts: Dict[int, int] = {}
+            for event_id, _, _ in new_views:
+                view_counts[event_id] = view_counts.get(event_id, 0) + 1
+
+            # Lock event rows in a consistent order so concurrent flushes cannot deadlock
+            for event_id in sorted(view_counts):
+                cursor.execute(
+                    f"UPDATE events SET view_count = COALESCE(view_count, 0) + {placeholder} "
+                    f"WHERE id = {placeholder}",
+                    (view_counts[event_id], event_id),
+                )
+
+            flushed_counts: Dict[int, int] = {}
+            touched = sorted({view[0] for view in views} & existing_events) if views else []
+            if touched:
+                cursor.execute(
+                    f"SELECT id, COALESCE(view_count, 0) AS view_count FROM events "
+                    f"WHERE id IN ({', '.join([placeholder] * len(touched))})",
+                    touched,
+                )
+                flushed_counts = {row["id"]: int(row["view_count"]) for row in cursor.fetchall()}
+
+            conn.commit()
+            return len(new_views), flushed_counts
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["pending_views"] = len(self._pending_views)
+            stats["dedupe_entries"] = len(self._seen)
+            stats["last_flush_ms"] = self._last_flush_ms
+        stats["flush_interval_ms"] = int(self.flush_interval * 1000)
+        stats["flush_max_items"] = self.flush_max_items
+        stats["running"] = self.running
+        return stats
@@ -4,9 +4,73 @@ Event Data Builder Helper
 Provides utility functions to build correctly ordered event data for database operations
 """
 
+from datetime import date, datetime, time, timedelta
 from typing import Dict, Any, Tuple, Optional
 from database_schema import INSERTABLE_EVENT_FIELDS, generate_insert_query, generate_update_query, EVENT_FIELDS
 
+# Text form of start_ts / end_ts; matches SQLite's datetime() so the triggers in
+# event_indexes.py find nothing to correct
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _parse_date(value) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value), "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_time(value) -> Optional[time]:
+    if isinstance(value, time):
+        return value
+    for time_format in ("%H:%M", "%H:%M:%S"):
+        try:
+            return datetime.strptime(str(value), time_format).time()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def typed_event_columns(event_data: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """
+    event_date, start_ts and end_ts for an event, derived from its TEXT date/time fields
+    
+    start_ts falls back to midnight when start_time is missing. end_ts is None without an
+    end_time, and moves to the next day when an end_time on the start date is earlier than
+    start_time (an overnight event).
+    
+    Args:
+        event_data: Dictionary containing date, start_time and optionally end_date/end_time
+    
+    Returns:
+        Dictionary of the three typed columns, as ISO text (None where a value can't be parsed)
+    """
+    event_date = _parse_date(event_data.get('date'))
+    if event_date is None:
+        return {'event_date': None, 'start_ts': None, 'end_ts': None}
+    
+    start_time = _parse_time(event_data.get('start_time'))
+    start_ts = datetime.combine(event_date, start_time or time())
+    
+    end_ts = None
+    end_time = _parse_time(event_data.get('end_time'))
+    if end_time is not None:
+        end_date = _parse_date(event_data.get('end_date')) or event_date
+        end_ts = datetime.combine(end_date, end_time)
+        if end_date == event_date and start_time is not None and end_time < start_time:
+            end_ts += timedelta(days=1)
+    
+    return {
+        'event_date': event_date.isoformat(),
+        'start_ts': start_ts.strftime(TIMESTAMP_FORMAT),
+        'end_ts': end_ts.strftime(TIMESTAMP_FORMAT) if end_ts else None,
+    }
+
+
 def build_event_values_for_insert(event_data: Dict[str, Any], 
                                  current_user_id: int,
                                  lat: float = None, 
@@ -58,7 +122,8 @@ def build_event_values_for_insert(event_data: Dict[str, Any],
         'created_by': current_user_id,
         'updated_at': event_data.get('updated_at'),
         'interest_count': event_data.get('interest_count', 0),
-        'view_count': event_data.get('view_count', 0)
+        'view_count': event_data.get('view_count', 0),
+        **typed_event_columns(event_data)
     }
     
     return tuple(data_map.get(field) for field in INSERTABLE_EVENT_FIELDS)
@@ -116,7 +181,8 @@ def build_event_values_for_update(event_data: Dict[str, Any],
         'end_datetime': event_data.get('end_datetime'),
         'updated_at': event_data.get('updated_at'),
         'interest_count': event_data.get('interest_count', 0),
-        'view_count': event_data.get('view_count', 0)
+        'view_count': event_data.get('view_count', 0),
+        **typed_event_columns(event_data)
     }
     
     # Build values tuple for update fields + event_id for WHERE clause
@@ -173,6 +239,7 @@ def build_test_event_values(title: str = "Test Event",
     
     # Apply any overrides
     defaults.update(overrides)
+    defaults.update(typed_event_columns(defaults))
     
     return tuple(defaults.get(field) for field in INSERTABLE_EVENT_FIELDS)
 
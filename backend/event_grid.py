@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+Event Grid
+An in-process read model of upcoming events for "what's near me" queries.
+
+Every event with event_date on or after today (UTC) is held in memory, bucketed into
+EVENT_GRID_CELL_DEGREES x EVENT_GRID_CELL_DEGREES lat/lng cells. A cell keeps its event ids
+and coordinates in flat arrays, so a radius query only looks at the cells under the search
+circle's bounding box, skips points outside the box with two comparisons, and runs the
+haversine on the rest.
+
+Next to the grid each event is one tuple holding only KEY_COLUMNS (what the queries filter
+and sort on) plus the payload columns the app asks for, typically the map pin and list
+card fields. Text longer than EVENT_GRID_MAX_TEXT (e.g. a legacy base64 logo) is not held.
+project() answers from the tuples and reads whatever they lack (description, full-view
+columns, oversized text) by primary key for just the events on the page.
+
+A snapshot is immutable and is swapped as a whole:
+  - apply(ids), called by the API write paths after they commit, re-reads those events and
+    swaps in a copy with just their cells rebuilt, so a client sees its own write at once;
+    it reads the database, so async handlers call it through db_async.run_db
+  - a background thread reloads everything every EVENT_GRID_RESYNC_SECONDS, which also picks
+    up view/interest counters (they do not bump the change version) and the day rollover
+
+A snapshot remembers the events change version (event_versions.py) it was loaded at. When
+the current version differs, because a scraper or script wrote to events directly, view()
+returns None, the caller falls back to its SQL query, and a reload is started right away.
+A direct write landing in the same instant as an API write can go unnoticed until the
+next periodic reload.
+"""
+
+import os
+import math
+import time
+import logging
+import threading
+from array import array
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from background_flusher import BackgroundFlusher
+from event_versions import CURRENT_VERSION_SQL
+from geo_query import EARTH_RADIUS_MILES, bounding_box
+
+logger = logging.getLogger(__name__)
+
+EVENT_GRID_ENABLED = os.getenv("EVENT_GRID_ENABLED", "true").lower() == "true"
+EVENT_GRID_CELL_DEGREES = float(os.getenv("EVENT_GRID_CELL_DEGREES", 0.5))
+EVENT_GRID_RESYNC_SECONDS = float(os.getenv("EVENT_GRID_RESYNC_SECONDS", 60))
+# Above this many upcoming events the grid stays empty and every query goes to the database
+EVENT_GRID_MAX_EVENTS = int(os.getenv("EVENT_GRID_MAX_EVENTS", 200000))
+
+# Longer text values are left to project() to read from the database
+EVENT_GRID_MAX_TEXT = int(os.getenv("EVENT_GRID_MAX_TEXT", 512))
+
+# Ids per SELECT when apply() / project() read events by id (keeps SQLite under its parameter limit)
+APPLY_CHUNK_SIZE = 500
+
+# Columns every snapshot holds: the ones queries over the grid filter and sort on
+KEY_COLUMNS = ("id", "lat", "lng", "event_date", "start_ts", "date", "category", "interest_count")
+
+# Stands in for a value the snapshot does not hold
+_NOT_HELD = object()
+
+CellKey = Tuple[int, int]
+
+
+def _coordinates(row: dict) -> Optional[Tuple[float, float]]:
+    try:
+        lat, lng = float(row["lat"]), float(row["lng"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        return None
+    return lat, lng
+
+
+def _day(value) -> Optional[str]:
+    """ISO day of an event_date value (DATE on PostgreSQL, text on SQLite)"""
+    return str(value)[:10] if value is not None else None
+
+
+class _Cell:
+    """Ids and coordinates of the events in one grid cell"""
+
+    __slots__ = ("ids", "lats", "lngs")
+
+    def __init__(self, entries: Sequence[Tuple[int, float, float]]):
+        self.ids = array("q", (entry[0] for entry in entries))
+        self.lats = array("d", (entry[1] for entry in entries))
+        self.lngs = array("d", (entry[2] for entry in entries))
+
+    def entries(self) -> Iterator[Tuple[int, float, float]]:
+        return zip(self.ids, self.lats, self.lngs)
+
+
+def _record(row: dict, columns: Sequence[str]) -> tuple:
+    """Compact tuple of a row's values in `columns` order, without oversized text"""
+    values = []
+    for name in columns:
+        value = row.get(name)
+        if isinstance(value, str) and len(value) > EVENT_GRID_MAX_TEXT:
+            value = _NOT_HELD
+        values.append(value)
+    return tuple(values)
+
+
+class Snapshot:
+    """Upcoming events as of one events change version and one UTC day"""
+
+    def __init__(self, version: int, day: str, columns: Tuple[str, ...], records: Dict[int, tuple],
+                 cells: Dict[CellKey, _Cell], cell_degrees: float):
+        self.version = version
+        self.day = day
+        self.columns = columns
+        self.records = records
+        self.cells = cells
+        self.cell_degrees = cell_degrees
+        self._index = {name: index for index, name in enumerate(columns)}
+
+    @classmethod
+    def build(cls, version: int, day: str, columns: Tuple[str, ...], rows: Iterable[dict],
+              cell_degrees: float) -> "Snapshot":
+        records: Dict[int, tuple] = {}
+        buckets: Dict[CellKey, List[Tuple[int, float, float]]] = {}
+        for row in rows:
+            event_id = row["id"]
+            records[event_id] = _record(row, columns)
+            point = _coordinates(row)
+            if point is not None:
+                buckets.setdefault(cls._key(point, cell_degrees), []).append((event_id, *point))
+        cells = {key: _Cell(entries) for key, entries in buckets.items()}
+        return cls(version, day, columns, records, cells, cell_degrees)
+
+    def value(self, event_id: int, name: str):
+        """One held value of an event (a key column or payload column)"""
+        return self.records[event_id][self._index[name]]
+
+    def row(self, event_id: int) -> dict:
+        """The values held for an event; columns not held are absent"""
+        return {
+            name: value for name, value in zip(self.columns, self.records[event_id])
+            if value is not _NOT_HELD
+        }
+
+    @staticmethod
+    def _key(point: Tuple[float, float], cell_degrees: float) -> CellKey:
+        return int(math.floor(point[0] / cell_degrees)), int(math.floor(point[1] / cell_degrees))
+
+    def with_changes(self, version: int, removed: Iterable[int], upserted: Dict[int, dict]) -> "Snapshot":
+        """A copy with the given events dropped or replaced; only their cells are rebuilt"""
+        touched = set(removed) | set(upserted)
+        affected = set()
+        records = dict(self.records)
+        for event_id in touched:
+            old = records.pop(event_id, None)
+            point = _coordinates({"lat": old[self._index["lat"]], "lng": old[self._index["lng"]]}) if old else None
+            if point is not None:
+                affected.add(self._key(point, self.cell_degrees))
+        added: Dict[CellKey, List[Tuple[int, float, float]]] = {}
+        for event_id, row in upserted.items():
+            records[event_id] = _record(row, self.columns)
+            point = _coordinates(row)
+            if point is not None:
+                key = self._key(point, self.cell_degrees)
+                affected.add(key)
+                added.setdefault(key, []).append((event_id, *point))
+
+        cells = dict(self.cells)
+        for key in affected:
+            old_cell = cells.pop(key, None)
+            entries = [entry for entry in old_cell.entries() if entry[0] not in touched] if old_cell else []
+            entries.extend(added.get(key, ()))
+            if entries:
+                cells[key] = _Cell(entries)
+        return Snapshot(version, self.day, self.columns, records, cells, self.cell_degrees)
+
+    def covers(self, day: Optional[str]) -> bool:
+        """Whether every event on or after `day` (ISO) is in this snapshot"""
+        return day is None or str(day)[:10] >= self.day
+
+    def _candidate_cells(self, min_lat: float, max_lat: float,
+                         min_lng: Optional[float], max_lng: Optional[float]) -> Iterator[_Cell]:
+        low_i = int(math.floor(min_lat / self.cell_degrees))
+        high_i = int(math.floor(max_lat / self.cell_degrees))
+        if min_lng is None:
+            # The box wraps a pole or the antimeridian: take the whole latitude band
+            for (i, _), cell in self.cells.items():
+                if low_i <= i <= high_i:
+                    yield cell
+            return
+        low_j = int(math.floor(min_lng / self.cell_degrees))
+        high_j = int(math.floor(max_lng / self.cell_degrees))
+        if (high_i - low_i + 1) * (high_j - low_j + 1) > len(self.cells):
+            for (i, j), cell in self.cells.items():
+                if low_i <= i <= high_i and low_j <= j <= high_j:
+                    yield cell
+            return
+        for i in range(low_i, high_i + 1):
+            for j in range(low_j, high_j + 1):
+                cell = self.cells.get((i, j))
+                if cell is not None:
+                    yield cell
+
+    def within(self, points: Sequence[Tuple[float, float]], radius_miles: Optional[float]) -> Dict[int, float]:
+        """
+        {event id: miles to the nearest of `points`} for events within radius_miles of any
+        point. radius_miles=None returns every event, measured from the first point (inf
+        for events without coordinates).
+        """
+        if radius_miles is None:
+            lat, lng = points[0]
+            lat_index, lng_index = self._index["lat"], self._index["lng"]
+            distances = {}
+            for event_id, record in self.records.items():
+                point = _coordinates({"lat": record[lat_index], "lng": record[lng_index]})
+                distances[event_id] = _haversine(lat, lng, *point) if point else float("inf")
+            return distances
+
+        distances: Dict[int, float] = {}
+        for lat, lng in points:
+            min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_miles)
+            lat_rad = math.radians(lat)
+            cos_lat = math.cos(lat_rad)
+            for cell in self._candidate_cells(min_lat, max_lat, min_lng, max_lng):
+                lats, lngs = cell.lats, cell.lngs
+                for index, event_lat in enumerate(lats):
+                    if event_lat < min_lat or event_lat > max_lat:
+                        continue
+                    event_lng = lngs[index]
+                    if min_lng is not None and (event_lng < min_lng or event_lng > max_lng):
+                        continue
+                    event_lat_rad = math.radians(event_lat)
+                    a = (
+                        math.sin((event_lat_rad - lat_rad) / 2) ** 2
+                        + cos_lat * math.cos(event_lat_rad) * math.sin(math.radians(event_lng - lng) / 2) ** 2
+                    )
+                    distance = 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(min(1.0, a)))
+                    if distance <= radius_miles:
+                        event_id = cell.ids[index]
+                        if distance < distances.get(event_id, math.inf):
+                            distances[event_id] = distance
+        return distances
+
+    def upcoming(self, lat: float, lng: float, radius_miles: float, category: Optional[str] = None,
+                 event_date: Optional[str] = None, after: Optional[Tuple[str, int]] = None,
+                 limit: Optional[int] = None) -> List[Tuple[float, dict]]:
+        """
+        (distance, row) for events within the radius, in (start_ts, id) order like
+        GET /events, optionally after a (start_ts, id) cursor key. Rows hold only what the
+        snapshot holds; pass them through EventGrid.project() for other columns.
+        """
+        start_index, category_index = self._index["start_ts"], self._index["category"]
+        date_index = self._index["event_date"]
+        matches = []
+        for event_id, distance in self.within([(lat, lng)], radius_miles).items():
+            record = self.records[event_id]
+            if record[start_index] is None:
+                continue
+            if category and record[category_index] != category:
+                continue
+            if event_date and _day(record[date_index]) != event_date:
+                continue
+            key = (str(record[start_index]), event_id)
+            if after is not None and key <= (str(after[0]), int(after[1])):
+                continue
+            matches.append((key, distance, event_id))
+        matches.sort(key=lambda match: match[0])
+        if limit is not None:
+            matches = matches[:limit]
+        return [(distance, self.row(event_id)) for _, distance, event_id in matches]
+
+
+def _haversine(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(min(1.0, a)))
+
+
+class EventGrid(BackgroundFlusher):
+    """Keeps the Snapshot of upcoming events current and hands it to readers"""
+
+    thread_name = "event-grid-resync"
+
+    def __init__(self, get_db: Callable, get_placeholder: Callable[[], str],
+                 current_version: Callable[[], int], columns: Sequence[str] = (),
+                 resync_interval: float = EVENT_GRID_RESYNC_SECONDS,
+                 cell_degrees: float = EVENT_GRID_CELL_DEGREES,
+                 max_events: int = EVENT_GRID_MAX_EVENTS,
+                 enabled: bool = EVENT_GRID_ENABLED):
+        super().__init__(resync_interval)
+        self.get_db = get_db
+        self.get_placeholder = get_placeholder
+        self.current_version = current_version
+        # Key columns first, then the requested payload columns
+        self.columns = KEY_COLUMNS + tuple(name for name in columns if name not in KEY_COLUMNS)
+        self.cell_degrees = cell_degrees
+        self.max_events = max_events
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._snapshot: Optional[Snapshot] = None
+        # Change version seen by the last view(); a snapshot behind it is stale
+        self._seen_version: Optional[int] = None
+        self._stats = {"loads": 0, "load_ms": 0.0, "applies": 0, "hits": 0, "misses": 0}
+
+    # -- read side ---------------------------------------------------------------------
+
+    def view(self) -> Optional[Snapshot]:
+        """The current snapshot, or None (use the database) if there is none or it is stale"""
+        if not self.enabled:
+            return None
+        snapshot = self._snapshot
+        today = datetime.utcnow().date().isoformat()
+        version = self.current_version()
+        self._seen_version = version
+        if snapshot is None or snapshot.day != today or snapshot.version != version:
+            with self._lock:
+                self._stats["misses"] += 1
+            if self.running:
+                self.wake()
+            return None
+        with self._lock:
+            self._stats["hits"] += 1
+        return snapshot
+
+    # -- write side --------------------------------------------------------------------
+
+    def _read_version(self, cursor) -> int:
+        cursor.execute(CURRENT_VERSION_SQL)
+        row = cursor.fetchone()
+        if row is None:
+            return 0
+        return int(row["version"] if isinstance(row, dict) else row[0])
+
+    def _select_list(self, cursor) -> str:
+        """Held columns the events table has; the others are held as None"""
+        cursor.execute("SELECT * FROM events LIMIT 0")
+        available = {column[0] for column in cursor.description}
+        return ", ".join(name for name in self.columns if name in available)
+
+    def flush(self) -> int:
+        """Reload every upcoming event; returns the number held"""
+        if not self.enabled or self._stopping.is_set():
+            return 0
+        with self._load_lock:
+            started = time.perf_counter()
+            today = datetime.utcnow().date().isoformat()
+            placeholder = self.get_placeholder()
+            try:
+                with self.get_db() as conn:
+                    cursor = conn.cursor()
+                    # Version first: a write landing during the read leaves the snapshot stale, not wrong
+                    version = self._read_version(cursor)
+                    cursor.execute(
+                        f"SELECT COUNT(*) FROM events WHERE event_date >= {placeholder}", (today,)
+                    )
+                    row = cursor.fetchone()
+                    count = int(list(row.values())[0] if isinstance(row, dict) else row[0])
+                    if count > self.max_events:
+                        logger.warning(
+                            f"⚠️ {count} upcoming events exceed EVENT_GRID_MAX_EVENTS={self.max_events}; "
+                            "nearby queries use the database"
+                        )
+                        with self._lock:
+                            self._snapshot = None
+                        return 0
+                    cursor.execute(
+                        f"SELECT {self._select_list(cursor)} FROM events WHERE event_date >= {placeholder}",
+                        (today,),
+                    )
+                    snapshot = Snapshot.build(
+                        version, today, self.columns, map(dict, cursor.fetchall()), self.cell_degrees
+                    )
+            except Exception as e:
+                # Readers keep falling back to the database until a reload succeeds
+                logger.error(f"❌ Event grid reload failed: {e}")
+                return 0
+
+            with self._lock:
+                self._snapshot = snapshot
+                self._seen_version = version
+                self._stats["loads"] += 1
+                self._stats["load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            return len(snapshot.records)
+
+    def apply(self, event_ids: Iterable) -> None:
+        """
+        Bring the given events up to date after a committed write (insert, update or delete).
+        Blocks on the database; from async code run it with run_db.
+        """
+        ids = sorted({int(event_id) for event_id in event_ids if event_id is not None})
+        base = self._snapshot
+        if not self.enabled or not ids or base is None:
+            return
+        placeholder = self.get_placeholder()
+        try:
+            # Only a snapshot that was current when last checked can be carried forward
+            if base.version != self._seen_version:
+                self.wake()
+                return
+            fetched = {}
+            with self.get_db() as conn:
+                cursor = conn.cursor()
+                version = self._read_version(cursor)
+                select_list = self._select_list(cursor)
+                for start in range(0, len(ids), APPLY_CHUNK_SIZE):
+                    chunk = ids[start:start + APPLY_CHUNK_SIZE]
+                    cursor.execute(
+                        f"SELECT {select_list} FROM events WHERE id IN ({', '.join([placeholder] * len(chunk))})",
+                        chunk,
+                    )
+                    fetched.update((row["id"], dict(row)) for row in cursor.fetchall())
+        except Exception as e:
+            logger.warning(f"Event grid update failed, reloading instead: {e}")
+            self.wake()
+            return
+
+        upserted = {
+            event_id: row for event_id, row in fetched.items()
+            if (_day(row.get("event_date")) or "") >= base.day
+        }
+        snapshot = base.with_changes(version, ids, upserted)
+        with self._lock:
+            if self._snapshot is base:
+                self._snapshot = snapshot
+                self._seen_version = version
+                self._stats["applies"] += 1
+                return
+        # A reload or another write swapped the snapshot meanwhile; let the next reload settle it
+        self.wake()
+
+    def project(self, rows: Sequence[dict], columns: Sequence[str], cursor) -> List[dict]:
+        """
+        Rows from a snapshot narrowed to `columns`, in the same order. Columns the snapshot
+        does not hold are read by id with `cursor`, in one query per APPLY_CHUNK_SIZE rows.
+        """
+        missing = {row["id"] for row in rows if any(name not in row for name in columns)}
+        fetched: Dict[int, dict] = {}
+        if missing:
+            placeholder = self.get_placeholder()
+            select_list = ", ".join(dict.fromkeys(("id",) + tuple(columns)))
+            ids = sorted(missing)
+            for start in range(0, len(ids), APPLY_CHUNK_SIZE):
+                chunk = ids[start:start + APPLY_CHUNK_SIZE]
+                cursor.execute(
+                    f"SELECT {select_list} FROM events WHERE id IN ({', '.join([placeholder] * len(chunk))})",
+                    chunk,
+                )
+                fetched.update((row["id"], dict(row)) for row in cursor.fetchall())
+        projected = []
+        for row in rows:
+            source = fetched.get(row["id"]) if row["id"] in missing else row
+            if source is None:
+                # Deleted since the snapshot was taken
+                continue
+            projected.append({name: source.get(name) for name in columns})
+        return projected
+
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        # Load in the background so startup does not wait on it; readers use SQL until then
+        super().start()
+        self.wake()
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            "enabled": self.enabled,
+            "events": len(snapshot.records) if snapshot else 0,
+            "columns": len(self.columns),
+            "cells": len(snapshot.cells) if snapshot else 0,
+            "version": snapshot.version if snapshot else None,
+            "day": snapshot.day if snapshot else None,
+            "cell_degrees": self.cell_degrees,
+            "resync_seconds": self.flush_interval,
+            "running": self.running,
+            **stats,
+        }
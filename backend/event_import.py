@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Event Import
+Set-based database work for the admin bulk event endpoints.
+
+The endpoints validate and enrich every event in memory and then hand the whole batch to
+these helpers inside one transaction, instead of running create_event (own connection,
+duplicate check, slug check, INSERT, COMMIT) once per event:
+  - find_duplicates: one query for the batch, with the same rule create_event uses (title,
+    date, start time and category match and the location is within ~1 m), plus repeats
+    within the batch itself
+  - resolve_unique_slugs: one `slug = ANY(...)` lookup per round, usually a single round
+  - insert_rows: a multi-row INSERT ... RETURNING id per chunk (execute_values on PostgreSQL),
+    each chunk under a SAVEPOINT. A chunk that fails is rolled back to its savepoint and
+    retried one row at a time, so a bad row is reported without losing the rest.
+"""
+
+import os
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 500))
+
+# create_event's duplicate check compares coordinates within this tolerance (~1 m)
+COORDINATE_TOLERANCE = 0.000001
+
+
+def _any_clause(column_sql: str, values: Sequence[Any], is_postgres: bool) -> Tuple[str, list]:
+    """`column = ANY(%s)` with one array parameter on PostgreSQL, `column IN (?, ...)` on SQLite"""
+    if is_postgres:
+        return f"{column_sql} = ANY(%s)", [list(values)]
+    return f"{column_sql} IN ({', '.join('?' * len(values))})", list(values)
+
+
+def title_key(title: Optional[str]) -> str:
+    return (title or "").strip(" ").lower()
+
+
+def _is_same_place(a: Tuple[float, float], b: Tuple[float, float]) -> bool:
+    return (
+        abs(float(a[0]) - float(b[0])) < COORDINATE_TOLERANCE
+        and abs(float(a[1]) - float(b[1])) < COORDINATE_TOLERANCE
+    )
+
+
+def find_duplicates(cursor, events: Sequence[Dict[str, Any]], is_postgres: bool) -> Dict[int, str]:
+    """Map of batch index -> reason for events that already exist or repeat an earlier one"""
+    if not events:
+        return {}
+    titles = sorted({title_key(event.get("title")) for event in events})
+    dates = sorted({event.get("date") for event in events if event.get("date")})
+    if not dates:
+        return {}
+    title_sql, title_params = _any_clause("TRIM(LOWER(title))", titles, is_postgres)
+    date_sql, date_params = _any_clause("date", dates, is_postgres)
+    cursor.execute(
+        f"""
+        SELECT TRIM(LOWER(title)) AS title_key, date, start_time, category, lat, lng
+        FROM events
+        WHERE {title_sql} AND {date_sql}
+        """,
+        title_params + date_params,
+    )
+    places: Dict[tuple, List[Tuple[float, float]]] = {}
+    for row in cursor.fetchall():
+        key = (row["title_key"], row["date"], row["start_time"], row["category"])
+        places.setdefault(key, []).append((row["lat"], row["lng"]))
+
+    existing = {key: list(points) for key, points in places.items()}
+    duplicates = {}
+    for index, event in enumerate(events):
+        key = (title_key(event.get("title")), event.get("date"), event.get("start_time"),
+               event.get("category"))
+        point = (round(event["lat"], 6), round(event["lng"], 6))
+        if any(_is_same_place(point, other) for other in existing.get(key, ())):
+            duplicates[index] = "An event with these details already exists at this location and time"
+        elif any(_is_same_place(point, other) for other in places.get(key, ())):
+            duplicates[index] = "Duplicates an earlier event in this import"
+        else:
+            places.setdefault(key, []).append(point)
+    return duplicates
+
+
+def _taken_slugs(cursor, slugs: Iterable[str], is_postgres: bool) -> Set[str]:
+    slugs = sorted(set(slugs))
+    if not slugs:
+        return set()
+    slug_sql, params = _any_clause("slug", slugs, is_postgres)
+    cursor.execute(f"SELECT slug FROM events WHERE {slug_sql}", params)
+    return {row["slug"] for row in cursor.fetchall()}
+
+
+def resolve_unique_slugs(cursor, slugs: Sequence[Optional[str]], is_postgres: bool) -> List[Optional[str]]:
+    """
+    Slugs that are free both in the table and within the batch. A taken slug gets the first
+    free -2, -3, ... suffix; empty slugs are passed through.
+    """
+    resolved = list(slugs)
+    attempts = {index: 1 for index, slug in enumerate(slugs) if slug}
+    pending = sorted(attempts)
+    claimed: Set[str] = set()
+    while pending:
+        taken = _taken_slugs(cursor, (resolved[index] for index in pending), is_postgres)
+        retry = []
+        for index in pending:
+            if resolved[index] in taken or resolved[index] in claimed:
+                attempts[index] += 1
+                resolved[index] = f"{slugs[index]}-{attempts[index]}"
+                retry.append(index)
+            else:
+                claimed.add(resolved[index])
+        pending = retry
+    return resolved
+
+
+def _insert_chunk(cursor, table: str, columns: Sequence[str], rows: Sequence[Sequence[Any]],
+                  is_postgres: bool) -> List[int]:
+    columns_sql = ", ".join(columns)
+    if is_postgres:
+        from psycopg2.extras import execute_values
+
+        returned = execute_values(
+            cursor,
+            f"INSERT INTO {table} ({columns_sql}) VALUES %s RETURNING id",
+            rows,
+            page_size=len(rows),
+            fetch=True,
+        )
+    else:
+        row_sql = "(" + ", ".join("?" * len(columns)) + ")"
+        cursor.execute(
+            f"INSERT INTO {table} ({columns_sql}) VALUES {', '.join([row_sql] * len(rows))} RETURNING id",
+            [value for row in rows for value in row],
+        )
+        returned = cursor.fetchall()
+    # RETURNING order is not guaranteed, but ids are handed out in VALUES order
+    return sorted(row["id"] for row in returned)
+
+
+def insert_rows(cursor, table: str, columns: Sequence[str], rows: Sequence[Sequence[Any]],
+                is_postgres: bool, chunk_size: int = IMPORT_CHUNK_SIZE
+                ) -> Tuple[List[Optional[int]], Dict[int, str]]:
+    """
+    Insert rows (value tuples in columns order) inside the caller's transaction.
+    Returns the new id per row (None where it failed) and a map of row index -> error.
+    """
+    ids: List[Optional[int]] = [None] * len(rows)
+    errors: Dict[int, str] = {}
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        cursor.execute("SAVEPOINT import_chunk")
+        try:
+            ids[start:start + len(chunk)] = _insert_chunk(cursor, table, columns, chunk, is_postgres)
+            cursor.execute("RELEASE SAVEPOINT import_chunk")
+            continue
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT import_chunk")
+            cursor.execute("RELEASE SAVEPOINT import_chunk")
+            logger.warning(f"Import chunk at row {start} failed, retrying row by row: {e}")
+
+        for index, row in enumerate(chunk, start):
+            cursor.execute("SAVEPOINT import_row")
+            try:
+                ids[index] = _insert_chunk(cursor, table, columns, [row], is_postgres)[0]
+            except Exception as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT import_row")
+                errors[index] = str(e)
+            cursor.execute("RELEASE SAVEPOINT import_row")
+    return ids, errors
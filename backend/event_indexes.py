@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Event Indexes
+The typed event date/time columns and the managed index set over them.
+
+events.date, start_time, end_date and end_time are TEXT, so filters like
+CAST(date AS DATE) >= CURRENT_DATE parse every row, and sorting by start_time is a string sort.
+Three typed copies sit next to them:
+  event_date  DATE       the day of date
+  start_ts    TIMESTAMP  date + start_time (midnight when start_time is missing)
+  end_ts      TIMESTAMP  (end_date or date) + end_time, the next day for an overnight event;
+                         NULL without an end_time
+event_data_builder.typed_event_columns computes them for the application's writes. Database
+triggers recompute them on every INSERT and on every UPDATE of the source columns, so scrapers
+and scripts that write events directly keep them current too. SQLite stores them as ISO text,
+so the SQL that compares them with CURRENT_DATE or ISO parameters is the same on both.
+
+EVENT_INDEXES is the index set the SEO pages rely on. It is applied as a repeatable schema
+step: when a definition here changes, the step re-runs and rebuilds the set.
+  - slug is unique, so /api/seo/events/by-slug/{slug} is one unique-index probe
+  - (lower(state), lower(city), event_date, start_time, ...) serves city landing pages in
+    order, and their COUNT(*) from the index alone
+The plain idx_events_slug / idx_events_city_state indexes these replace are dropped.
+"""
+
+import hashlib
+import logging
+from typing import List
+
+from migration_utils import commit_batch, id_ranges, outside_transaction
+
+logger = logging.getLogger(__name__)
+
+# SEO columns the indexes need; older databases got them from the schema fix endpoint, if at all
+LOOKUP_COLUMNS = [
+    ("slug", "TEXT"),
+    ("city", "VARCHAR(100)"),
+    ("state", "VARCHAR(50)"),
+    ("is_published", "BOOLEAN DEFAULT TRUE"),
+]
+
+# (name, unique, definition); editing this list re-runs the repeatable step
+EVENT_INDEXES = [
+    ("idx_events_slug_unique", True, "events (slug)"),
+    # state and city ride along because planners only consider an index-only scan when the
+    # plain columns under lower(...) are in the index as well
+    (
+        "idx_events_state_city_date",
+        False,
+        "events (lower(state), lower(city), event_date, start_time, is_published, state, city)",
+    ),
+    ("idx_events_event_date", False, "events (event_date, start_time)"),
+    # Upcoming-first keyset pages of GET /events
+    ("idx_events_start_ts", False, "events (start_ts, id)"),
+]
+
+# Superseded by EVENT_INDEXES
+RETIRED_INDEXES = ["idx_events_slug", "idx_events_city_state"]
+
+
+def _event_columns(cursor) -> List[str]:
+    cursor.execute("SELECT * FROM events LIMIT 0")
+    return [column[0] for column in cursor.description]
+
+
+def _dedupe_slugs(cursor) -> int:
+    """Blank slugs become NULL; repeated slugs keep the oldest event and suffix the id on the rest"""
+    cursor.execute("UPDATE events SET slug = NULL WHERE slug = ''")
+    renamed = 0
+    while True:
+        cursor.execute(
+            """
+            UPDATE events SET slug = slug || '-' || CAST(id AS TEXT)
+            WHERE slug IN (SELECT slug FROM events WHERE slug IS NOT NULL GROUP BY slug HAVING COUNT(*) > 1)
+            AND id NOT IN (SELECT MIN(id) FROM events WHERE slug IS NOT NULL GROUP BY slug)
+            """
+        )
+        if cursor.rowcount <= 0:
+            return renamed
+        renamed += cursor.rowcount
+
+
+def add_event_date(cursor, is_postgres: bool) -> None:
+    """Add event_date with the triggers that maintain it, backfill it, and make slugs unique"""
+    columns = set(_event_columns(cursor))
+    for column, definition in LOOKUP_COLUMNS + [("event_date", "DATE")]:
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE events ADD COLUMN {column} {definition}")
+            logger.info(f"✅ Added '{column}' column")
+
+    if is_postgres:
+        # to_date with an explicit format does not depend on DateStyle; malformed dates give NULL
+        cursor.execute(
+            """
+            CREATE OR REPLACE FUNCTION parse_event_date(value TEXT) RETURNS DATE AS $$
+            BEGIN
+                RETURN to_date(value, 'YYYY-MM-DD');
+            EXCEPTION WHEN others THEN
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql IMMUTABLE
+            """
+        )
+        cursor.execute(
+            """
+            CREATE OR REPLACE FUNCTION set_event_date() RETURNS trigger AS $$
+            BEGIN
+                NEW.event_date := parse_event_date(NEW.date);
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+            """
+        )
+        cursor.execute("DROP TRIGGER IF EXISTS events_event_date ON events")
+        cursor.execute(
+            """
+            CREATE TRIGGER events_event_date
+            BEFORE INSERT OR UPDATE OF date, event_date ON events
+            FOR EACH ROW EXECUTE PROCEDURE set_event_date()
+            """
+        )
+        backfill_sql = (
+            "UPDATE events SET event_date = parse_event_date(date) "
+            "WHERE id BETWEEN %s AND %s AND event_date IS DISTINCT FROM parse_event_date(date)"
+        )
+    else:
+        # SQLite cannot assign NEW in a trigger, so fix the row up afterwards when it differs
+        for name, operation in (("insert", "INSERT"), ("update", "UPDATE OF date, event_date")):
+            cursor.execute(f"DROP TRIGGER IF EXISTS events_event_date_{name}")
+            cursor.execute(
+                f"""
+                CREATE TRIGGER events_event_date_{name} AFTER {operation} ON events
+                WHEN NEW.event_date IS NOT date(NEW.date)
+                BEGIN UPDATE events SET event_date = date(NEW.date) WHERE id = NEW.id; END
+                """
+            )
+        backfill_sql = (
+            "UPDATE events SET event_date = date(date) "
+            "WHERE id BETWEEN ? AND ? AND event_date IS NOT date(date)"
+        )
+    for low, high in id_ranges(cursor, "events"):
+        cursor.execute(backfill_sql, (low, high))
+        commit_batch(cursor, is_postgres)
+
+    renamed = _dedupe_slugs(cursor)
+    if renamed:
+        logger.info(f"✅ Suffixed {renamed} duplicate slugs with their event id")
+
+
+# Source columns whose updates recompute the typed columns (and the typed columns themselves,
+# so a direct write to them is corrected)
+TYPED_SOURCE_COLUMNS = "date, start_time, end_date, end_time, event_date, start_ts, end_ts"
+
+# SQLite expressions over NEW.*; datetime() yields the same text as TIMESTAMP_FORMAT
+SQLITE_TYPED_COLUMNS = {
+    "event_date": "date(NEW.date)",
+    "start_ts": "COALESCE(datetime(date(NEW.date) || ' ' || time(NEW.start_time)), datetime(date(NEW.date)))",
+    "end_ts": (
+        "datetime(COALESCE(date(NEW.end_date), date(NEW.date)) || ' ' || time(NEW.end_time), "
+        "CASE WHEN COALESCE(date(NEW.end_date), date(NEW.date)) = date(NEW.date) "
+        "AND time(NEW.end_time) < time(NEW.start_time) THEN '+1 day' ELSE '+0 days' END)"
+    ),
+}
+
+
+# Backfill expressions over a row whose event_date is already set (migration 7), matching
+# set_event_typed_columns()
+POSTGRES_BACKFILL_COLUMNS = {
+    "start_ts": "event_date + COALESCE(parse_event_time(start_time), TIME '00:00')",
+    "end_ts": (
+        "COALESCE(parse_event_date(end_date), event_date) + parse_event_time(end_time) "
+        "+ CASE WHEN COALESCE(parse_event_date(end_date), event_date) = event_date "
+        "AND parse_event_time(end_time) < parse_event_time(start_time) "
+        "THEN INTERVAL '1 day' ELSE INTERVAL '0 days' END"
+    ),
+}
+
+
+def _backfill_timestamps(cursor, is_postgres: bool) -> None:
+    """Set start_ts/end_ts on rows that lack them, committing after each id range"""
+    if is_postgres:
+        assignments = ", ".join(
+            f"{column} = {expression}" for column, expression in POSTGRES_BACKFILL_COLUMNS.items()
+        )
+        placeholder = "%s"
+    else:
+        assignments = ", ".join(
+            f"{column} = {expression.replace('NEW.', '')}"
+            for column, expression in SQLITE_TYPED_COLUMNS.items()
+        )
+        placeholder = "?"
+    for low, high in id_ranges(cursor, "events"):
+        cursor.execute(
+            f"UPDATE events SET {assignments} "
+            f"WHERE id BETWEEN {placeholder} AND {placeholder} AND start_ts IS NULL AND event_date IS NOT NULL",
+            (low, high),
+        )
+        commit_batch(cursor, is_postgres)
+
+
+def add_event_timestamps(cursor, is_postgres: bool) -> None:
+    """
+    Add start_ts/end_ts, backfill them, and move the event_date triggers over to all three
+    columns. The backfill is one set-based UPDATE per id range that only touches rows still
+    missing start_ts and commits as it goes, so it neither rewrites every row nor holds
+    locks on the whole table, and a retry picks up where it stopped.
+    """
+    columns = set(_event_columns(cursor))
+    for column in ("start_ts", "end_ts"):
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE events ADD COLUMN {column} TIMESTAMP")
+            logger.info(f"✅ Added '{column}' column")
+
+    if is_postgres:
+        cursor.execute(
+            """
+            CREATE OR REPLACE FUNCTION parse_event_time(value TEXT) RETURNS TIME AS $$
+            BEGIN
+                RETURN value::time;
+            EXCEPTION WHEN others THEN
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql IMMUTABLE
+            """
+        )
+        cursor.execute(
+            """
+            CREATE OR REPLACE FUNCTION set_event_typed_columns() RETURNS trigger AS $$
+            DECLARE
+                start_clock TIME := parse_event_time(NEW.start_time);
+                end_clock TIME := parse_event_time(NEW.end_time);
+                end_day DATE;
+            BEGIN
+                NEW.event_date := parse_event_date(NEW.date);
+                NEW.start_ts := NEW.event_date + COALESCE(start_clock, TIME '00:00');
+                end_day := COALESCE(parse_event_date(NEW.end_date), NEW.event_date);
+                NEW.end_ts := end_day + end_clock;
+                IF end_day = NEW.event_date AND end_clock < start_clock THEN
+                    NEW.end_ts := NEW.end_ts + INTERVAL '1 day';
+                END IF;
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+            """
+        )
+        # The event_date trigger only fires on date/event_date, so the backfill, which sets
+        # start_ts/end_ts alone, runs without a trigger call per row
+        _backfill_timestamps(cursor, is_postgres)
+        cursor.execute("DROP TRIGGER IF EXISTS events_event_date ON events")
+        cursor.execute("DROP FUNCTION IF EXISTS set_event_date()")
+        cursor.execute("DROP TRIGGER IF EXISTS events_typed_columns ON events")
+        cursor.execute(
+            f"""
+            CREATE TRIGGER events_typed_columns
+            BEFORE INSERT OR UPDATE OF {TYPED_SOURCE_COLUMNS} ON events
+            FOR EACH ROW EXECUTE PROCEDURE set_event_typed_columns()
+            """
+        )
+        # Rows a script inserted while the backfill ran; the application sets start_ts itself
+        cursor.execute(
+            "UPDATE events SET date = date WHERE start_ts IS NULL AND event_date IS NOT NULL"
+        )
+    else:
+        differs = " OR ".join(
+            f"NEW.{column} IS NOT {expression}" for column, expression in SQLITE_TYPED_COLUMNS.items()
+        )
+        assignments = ", ".join(
+            f"{column} = {expression}" for column, expression in SQLITE_TYPED_COLUMNS.items()
+        )
+        for name in ("insert", "update"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS events_event_date_{name}")
+            cursor.execute(f"DROP TRIGGER IF EXISTS events_typed_columns_{name}")
+        for name, operation in (("insert", "INSERT"), ("update", f"UPDATE OF {TYPED_SOURCE_COLUMNS}")):
+            cursor.execute(
+                f"""
+                CREATE TRIGGER events_typed_columns_{name} AFTER {operation} ON events
+                WHEN {differs}
+                BEGIN UPDATE events SET {assignments} WHERE id = NEW.id; END
+                """
+            )
+        # The trigger's WHEN is false once the row holds the computed values
+        _backfill_timestamps(cursor, is_postgres)
+
+
+def index_checksum(cursor) -> str:
+    """Changes whenever EVENT_INDEXES does"""
+    _event_columns(cursor)  # skipped until the events table exists
+    definitions = "\n".join(f"{name}:{unique}:{definition}" for name, unique, definition in EVENT_INDEXES)
+    return hashlib.sha1(definitions.encode("utf-8")).hexdigest()
+
+
+def install_event_indexes(cursor, is_postgres: bool) -> None:
+    """
+    (Re)create EVENT_INDEXES and drop the indexes they replace. On PostgreSQL each index is
+    built CONCURRENTLY under a temporary name and swapped in, so event writes carry on
+    while it builds; a build left invalid by an earlier failure is dropped first.
+    """
+    if not is_postgres:
+        for name in RETIRED_INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+        for name, unique, definition in EVENT_INDEXES:
+            # Rebuild rather than IF NOT EXISTS so an edited definition takes effect
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+            cursor.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {definition}")
+            logger.info(f"✅ Built index {name}")
+        return
+
+    with outside_transaction(cursor, is_postgres):
+        for name in RETIRED_INDEXES:
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        for name, unique, definition in EVENT_INDEXES:
+            building = f"{name}_rebuild"
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {building}")
+            cursor.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY {building} ON {definition}")
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            cursor.execute(f"ALTER INDEX {building} RENAME TO {name}")
+            logger.info(f"✅ Built index {name}")
+        cursor.execute("ANALYZE events")
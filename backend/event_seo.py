@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Event SEO
+Precomputed SEO artifacts per event, stored in event_seo next to the events table.
+
+SEOEventProcessor.generate_full_seo_data (address parsing, slug, JSON-LD for the event,
+breadcrumb and page, metadata, validation) runs when an event is written, not when it
+is read. create/update/bulk import call store_event_seo() inside their transaction. The
+scheduled SEO population job and `python event_seo.py` run backfill_event_seo() in
+batches. Each row keeps a hash of the source columns, so unchanged events are skipped.
+
+The SEO endpoints then do one primary-key fetch joined to events. interest_count and
+view_count change all the time (write-behind engagement tracking), so they are not part
+of the stored artifacts. They are read from events and overlaid on the stored event.
+An event with no stored row yet is computed on read and stored then.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import logging
+import argparse
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from seo_utils import SEOEventProcessor, validate_event_data
+
+logger = logging.getLogger(__name__)
+
+SEO_BASE_URL = os.getenv("SEO_BASE_URL", "https://todo-events.com")
+SEO_BACKFILL_BATCH_SIZE = int(os.getenv("SEO_BACKFILL_BATCH_SIZE", 500))
+
+EVENT_SEO_TABLE_SQL = """CREATE TABLE IF NOT EXISTS event_seo (
+                            event_id INTEGER PRIMARY KEY,
+                            content_hash TEXT NOT NULL,
+                            seo_data TEXT NOT NULL,
+                            issues TEXT NOT NULL,
+                            updated_at TEXT NOT NULL
+                        )"""
+
+# events columns the artifacts are built from; older databases may lack some of them
+SEO_SOURCE_COLUMNS = (
+    "id", "title", "slug", "description", "short_description",
+    "date", "start_time", "end_time", "end_date", "start_datetime", "end_datetime",
+    "category", "address", "city", "state", "country", "lat", "lng",
+    "price", "currency", "fee_required", "event_url", "host_name", "organizer_url",
+    "created_by", "created_at", "updated_at", "is_published",
+)
+# Live counters, read from events on every request
+COUNTER_COLUMNS = ("interest_count", "view_count")
+
+
+def ensure_event_seo(cursor, is_postgres: bool) -> None:
+    cursor.execute(EVENT_SEO_TABLE_SQL)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, default=_json_default, separators=(",", ":"))
+
+
+def source_columns(cursor) -> List[str]:
+    """The SEO source columns present in this database's events table"""
+    cursor.execute("SELECT * FROM events LIMIT 0")
+    available = {column[0] for column in cursor.description}
+    return [column for column in SEO_SOURCE_COLUMNS if column in available]
+
+
+def content_hash(event: Dict[str, Any]) -> str:
+    source = {column: event.get(column) for column in SEO_SOURCE_COLUMNS if column in event}
+    return hashlib.sha1(_dumps(source).encode("utf-8")).hexdigest()
+
+
+def _build(event: Dict[str, Any], base_url: str):
+    source = {column: event[column] for column in SEO_SOURCE_COLUMNS if column in event}
+    issues = validate_event_data(dict(source))
+    seo_data = SEOEventProcessor(base_url=base_url).generate_full_seo_data(dict(source))
+    return seo_data, issues
+
+
+def build_event_seo(event: Dict[str, Any], base_url: str = SEO_BASE_URL) -> Dict[str, Any]:
+    """What /api/seo/events/{id} and /api/seo/validate/{id} serve, without the live counters"""
+    seo_data, issues = _build(event, base_url)
+    # Round-trip through JSON so a freshly built entry matches one read back from the table
+    return {
+        "seo_data": json.loads(_dumps(seo_data)),
+        "issues": issues,
+    }
+
+
+def store_event_seo(cursor, placeholder: str, events: Sequence[Dict[str, Any]],
+                    base_url: str = SEO_BASE_URL) -> int:
+    """
+    Build and upsert the artifacts for full events rows whose source columns changed since
+    they were last stored. Returns the number of rows written.
+    """
+    events = [event for event in events if event and event.get("id") is not None]
+    if not events:
+        return 0
+    ids = [event["id"] for event in events]
+    cursor.execute(
+        f"SELECT event_id, content_hash FROM event_seo "
+        f"WHERE event_id IN ({', '.join([placeholder] * len(ids))})",
+        ids,
+    )
+    stored = {row["event_id"]: row["content_hash"] for row in cursor.fetchall()}
+
+    now = datetime.utcnow().isoformat()
+    rows = []
+    for event in events:
+        digest = content_hash(event)
+        if stored.get(event["id"]) == digest:
+            continue
+        try:
+            seo_data, issues = _build(event, base_url)
+        except Exception as e:
+            logger.warning(f"Could not build SEO data for event {event['id']}: {e}")
+            continue
+        rows.append((event["id"], digest, _dumps(seo_data), _dumps(issues), now))
+    if not rows:
+        return 0
+
+    row_sql = "(" + ", ".join([placeholder] * 5) + ")"
+    cursor.execute(
+        f"""
+        INSERT INTO event_seo (event_id, content_hash, seo_data, issues, updated_at)
+        VALUES {', '.join([row_sql] * len(rows))}
+        ON CONFLICT (event_id) DO UPDATE SET
+            content_hash = excluded.content_hash,
+            seo_data = excluded.seo_data,
+            issues = excluded.issues,
+            updated_at = excluded.updated_at
+        """,
+        [value for row in rows for value in row],
+    )
+    return len(rows)
+
+
+def refresh_event_seo(cursor, placeholder: str, event_ids: Iterable[int],
+                      base_url: str = SEO_BASE_URL) -> int:
+    """store_event_seo() for events given by id"""
+    ids = [event_id for event_id in event_ids if event_id is not None]
+    if not ids:
+        return 0
+    cursor.execute(
+        f"SELECT {', '.join(source_columns(cursor))} FROM events "
+        f"WHERE id IN ({', '.join([placeholder] * len(ids))})",
+        ids,
+    )
+    return store_event_seo(cursor, placeholder, [dict(row) for row in cursor.fetchall()], base_url)
+
+
+def delete_event_seo(cursor, placeholder: str, event_ids: Iterable[int]) -> None:
+    ids = [event_id for event_id in event_ids if event_id is not None]
+    if ids:
+        cursor.execute(
+            f"DELETE FROM event_seo WHERE event_id IN ({', '.join([placeholder] * len(ids))})",
+            ids,
+        )
+
+
+def load_event_seo(cursor, placeholder: str, event_id: int,
+                   published_only: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Stored artifacts for one event with the current counters:
+    {"seo_data": {...}, "issues": [...]}, or None when nothing is stored for it yet.
+    """
+    counters = ", ".join(f"e.{column}" for column in COUNTER_COLUMNS)
+    published = " AND (e.is_published = TRUE OR e.is_published IS NULL)" if published_only else ""
+    cursor.execute(
+        f"""
+        SELECT s.seo_data, s.issues, {counters}
+        FROM event_seo s
+        JOIN events e ON e.id = s.event_id
+        WHERE s.event_id = {placeholder}{published}
+        """,
+        (event_id,),
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    seo_data = json.loads(row["seo_data"])
+    for column in COUNTER_COLUMNS:
+        seo_data["event"][column] = row[column]
+    return {"seo_data": seo_data, "issues": json.loads(row["issues"])}
+
+
+def backfill_event_seo(get_db: Callable, placeholder: str, batch_size: int = SEO_BACKFILL_BATCH_SIZE,
+                       base_url: str = SEO_BASE_URL) -> int:
+    """
+    Bring event_seo up to date for every event, batch_size events per transaction (keyset
+    over id), and drop rows for events that no longer exist. Returns the rows written.
+    """
+    written = 0
+    last_id = 0
+    while True:
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT {', '.join(source_columns(cursor))} FROM events "
+                f"WHERE id > {placeholder} ORDER BY id LIMIT {int(batch_size)}",
+                (last_id,),
+            )
+            events = [dict(row) for row in cursor.fetchall()]
+            if not events:
+                cursor.execute("DELETE FROM event_seo WHERE event_id NOT IN (SELECT id FROM events)")
+                conn.commit()
+                break
+            written += store_event_seo(cursor, placeholder, events, base_url)
+            conn.commit()
+            last_id = events[-1]["id"]
+    logger.info(f"✅ Event SEO backfill wrote {written} rows")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill precomputed event SEO data")
+    parser.add_argument("--batch-size", type=int, default=SEO_BACKFILL_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from shared_utils import get_db, get_placeholder
+
+    written = backfill_event_seo(get_db, get_placeholder(), args.batch_size)
+    print(f"Event SEO rows written: {written}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Event Streaming
+Incremental JSON / NDJSON responses for large event lists.
+
+stream_rows() runs a blocking producer on a dedicated stream executor (EVENT_STREAM_WORKERS
+threads), not the shared run_db executor, so slow clients holding streams open cannot
+starve ordinary queries. Each stream keeps a pool connection while it runs, so
+DB_POOL_MAX_SIZE should leave room for them. The producer walks a cursor in batches and
+hands encoded chunks to the response through a small bounded queue, so memory stays at a
+few batches and the first bytes go out as soon as the first batch is read, whatever the
+limit. A client that stops reading for EVENT_STREAM_STALL_SECONDS has its stream ended and
+its connection returned. Chunks are compressed incrementally with brotli or gzip according
+to Accept-Encoding.
+
+    def produce(emit):
+        with get_db_transaction() as conn:
+            cursor = open_stream_cursor(conn, is_postgres)
+            cursor.execute(sql, params)
+            while batch := cursor.fetchmany(EVENT_STREAM_BATCH_SIZE):
+                emit([dict(row) for row in batch])
+
+    return streaming_response(request, produce, ndjson=False)
+"""
+
+import os
+import json
+import uuid
+import zlib
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, List, Optional
+
+from fastapi.responses import StreamingResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+EVENT_STREAM_BATCH_SIZE = int(os.getenv("EVENT_STREAM_BATCH_SIZE", 250))
+EVENT_STREAM_MAX_LIMIT = int(os.getenv("EVENT_STREAM_MAX_LIMIT", 10000))
+# Encoded batches buffered between the database thread and the response
+EVENT_STREAM_QUEUE_SIZE = int(os.getenv("EVENT_STREAM_QUEUE_SIZE", 4))
+# Streams served at once; further streams wait for a worker without holding a connection
+EVENT_STREAM_WORKERS = int(os.getenv("EVENT_STREAM_WORKERS", 2))
+EVENT_STREAM_STALL_SECONDS = float(os.getenv("EVENT_STREAM_STALL_SECONDS", 30))
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class StreamCancelled(Exception):
+    """Raised inside the producer once the client has gone away"""
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_stream_executor() -> ThreadPoolExecutor:
+    """Executor for stream producers, separate from the run_db executor"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=EVENT_STREAM_WORKERS, thread_name_prefix="event-stream"
+                )
+    return _executor
+
+
+def dumps(value: Any) -> bytes:
+    """Compact JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(value, default=str)
+    return json.dumps(value, default=str, separators=(",", ":")).encode("utf-8")
+
+
+def open_stream_cursor(conn, is_postgres: bool):
+    """
+    Cursor that reads results incrementally. PostgreSQL needs a named (server-side) cursor,
+    which only works inside a transaction, i.e. a get_db_transaction() connection;
+    sqlite3 cursors already step through results lazily.
+    """
+    if is_postgres:
+        cursor = conn.cursor(name=f"event_stream_{uuid.uuid4().hex[:12]}")
+        cursor.itersize = EVENT_STREAM_BATCH_SIZE
+        return cursor
+    return conn.cursor()
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best supported content coding for an Accept-Encoding header (br > gzip > none)"""
+    accepted = set()
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class StreamCompressor:
+    """Compresses a chunk stream, flushing after each chunk so clients can decode it as it arrives"""
+
+    def __init__(self, encoding: Optional[str]):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=4)
+        elif encoding == "gzip":
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        else:
+            self._compressor = None
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        if self.encoding == "gzip":
+            return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return chunk
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        if self.encoding == "gzip":
+            return self._compressor.flush(zlib.Z_FINISH)
+        return b""
+
+
+class JSONArrayEncoder:
+    """Frames batches of rows as one JSON array, or as NDJSON lines"""
+
+    def __init__(self, ndjson: bool = False):
+        self.ndjson = ndjson
+        self._started = False
+
+    def encode(self, rows: List[dict]) -> bytes:
+        if self.ndjson:
+            return b"".join(dumps(row) + b"\n" for row in rows)
+        if not rows:
+            return b""
+        body = b",".join(dumps(row) for row in rows)
+        prefix = b"," if self._started else b"["
+        self._started = True
+        return prefix + body
+
+    def close(self) -> bytes:
+        if self.ndjson:
+            return b""
+        return b"]" if self._started else b"[]"
+
+
+async def stream_rows(produce: Callable[[Callable[[List[dict]], None]], None],
+                      ndjson: bool = False, encoding: Optional[str] = None) -> AsyncIterator[bytes]:
+    """
+    Run `produce(emit)` on the stream executor and yield its rows as encoded, compressed
+    chunks. `emit` blocks while the queue is full, so a slow client slows the database
+    reads instead of piling rows up in memory.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    # Free queue slots; the producer takes one before each handoff, the response returns it
+    slots = threading.Semaphore(EVENT_STREAM_QUEUE_SIZE)
+    stopped = threading.Event()
+    done = object()
+    encoder = JSONArrayEncoder(ndjson)
+    compressor = StreamCompressor(encoding)
+
+    def handoff(item):
+        # Single handoff per item: nothing to cancel or retry, so no batch is sent twice
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # Event loop closed under us
+            raise StreamCancelled() from None
+
+    def put(chunk: bytes):
+        waited = 0
+        while not slots.acquire(timeout=1):
+            waited += 1
+            if stopped.is_set():
+                raise StreamCancelled()
+            if waited >= EVENT_STREAM_STALL_SECONDS:
+                raise StreamCancelled(f"client read nothing for {waited}s")
+        if stopped.is_set():
+            raise StreamCancelled()
+        handoff(chunk)
+
+    def run():
+        try:
+            produce(lambda rows: put(encoder.encode(rows)))
+            # The end marker and errors skip the slot count so they always get through
+            handoff(done)
+        except StreamCancelled as e:
+            if not stopped.is_set():
+                logger.warning(f"Event stream abandoned: {e}")
+                try:
+                    handoff(e)
+                except StreamCancelled:
+                    pass
+        except Exception as e:
+            logger.error(f"Event stream failed: {type(e).__name__}: {e}")
+            try:
+                handoff(e)
+            except StreamCancelled:
+                pass
+
+    loop.run_in_executor(get_stream_executor(), run)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            slots.release()
+            if item:
+                yield compressor.compress(item)
+        yield compressor.compress(encoder.close()) + compressor.finish()
+    finally:
+        # A producer still running (client went away) notices within a second and exits,
+        # returning its connection
+        stopped.set()
+
+
+def streaming_response(request, produce: Callable[[Callable[[List[dict]], None]], None],
+                       ndjson: bool = False, headers: Optional[dict] = None) -> StreamingResponse:
+    """StreamingResponse for stream_rows(), negotiating compression from the request"""
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    response_headers = {"Vary": "Accept-Encoding", **(headers or {})}
+    if encoding:
+        response_headers["Content-Encoding"] = encoding
+    return StreamingResponse(
+        stream_rows(produce, ndjson=ndjson, encoding=encoding),
+        media_type=NDJSON_MEDIA_TYPE if ndjson else "application/json",
+        headers=response_headers,
+    )
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Event Versions
+A change version for the events table, used for ETag / Last-Modified on public event reads.
+
+event_change_version holds EVENT_VERSION_SHARDS rows (id, version, updated_at); the change
+version is their sum and the last write time their latest updated_at. Database triggers
+bump one shard, picked by transaction id, on every INSERT / DELETE on events and on every
+UPDATE except the view/interest counters, so each write path is covered without the
+endpoints having to remember it. Concurrent writers mostly land on different shards, so a
+long bulk import only holds up the writers that share its shard instead of all of them. Counters are
+written by the engagement tracker every few seconds; instead of bumping the version for
+them, ETags roll over every ETAG_COUNTER_WINDOW seconds, which bounds how stale counts can be.
+
+EventVersionTracker caches the row for EVENT_VERSION_TTL seconds, so a request carrying a
+matching If-None-Match is answered with 304 without a query in the common case. current()
+may query, so async callers check cached() first and run current() off the event loop.
+Call invalidate() after a local write so the next read picks the new version up at once.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EVENT_VERSION_TTL = float(os.getenv("EVENT_VERSION_TTL", 2))
+ETAG_COUNTER_WINDOW = int(os.getenv("ETAG_COUNTER_WINDOW", 60))
+# Counter rows on PostgreSQL; SQLite has a single writer and uses one row
+EVENT_VERSION_SHARDS = int(os.getenv("EVENT_VERSION_SHARDS", 16))
+
+EVENT_CHANGE_VERSION_TABLE_SQL = """CREATE TABLE IF NOT EXISTS event_change_version (
+                            id INTEGER PRIMARY KEY,
+                            version BIGINT NOT NULL DEFAULT 0,
+                            updated_at TEXT NOT NULL
+                        )"""
+
+# Summing every row also counts shards left over from a larger EVENT_VERSION_SHARDS
+CURRENT_VERSION_SQL = (
+    "SELECT COALESCE(SUM(version), 0) AS version, MAX(updated_at) AS updated_at "
+    "FROM event_change_version"
+)
+
+# Written by the engagement tracker; covered by ETAG_COUNTER_WINDOW instead of the version
+COUNTER_COLUMNS = {"view_count", "interest_count"}
+
+
+def tracked_columns(cursor) -> str:
+    """The events columns whose updates bump the version, as a comma-separated list"""
+    cursor.execute("SELECT * FROM events LIMIT 0")
+    return ", ".join(
+        column[0] for column in cursor.description if column[0] not in COUNTER_COLUMNS
+    )
+
+
+def tracking_checksum(cursor) -> str:
+    """Changes when the tracked columns or the shard count do, re-installing the triggers"""
+    return f"shards={EVENT_VERSION_SHARDS}:{tracked_columns(cursor)}"
+
+
+def install_event_version_tracking(cursor, is_postgres: bool) -> None:
+    """Create the version rows and (re)create the triggers over the current events columns"""
+    cursor.execute(EVENT_CHANGE_VERSION_TABLE_SQL)
+    now = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")
+    shards = max(1, EVENT_VERSION_SHARDS) if is_postgres else 1
+    for shard in range(1, shards + 1):
+        cursor.execute(
+            "INSERT INTO event_change_version (id, version, updated_at) "
+            f"SELECT {shard}, 0, '{now}' "
+            f"WHERE NOT EXISTS (SELECT 1 FROM event_change_version WHERE id = {shard})"
+        )
+
+    columns = tracked_columns(cursor)
+
+    if is_postgres:
+        cursor.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION bump_event_change_version() RETURNS trigger AS $$
+            BEGIN
+                UPDATE event_change_version
+                SET version = version + 1,
+                    updated_at = TO_CHAR(NOW() AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS')
+                WHERE id = 1 + txid_current() % {shards};
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """
+        )
+        cursor.execute("DROP TRIGGER IF EXISTS events_change_version ON events")
+        cursor.execute(
+            f"""
+            CREATE TRIGGER events_change_version
+            AFTER INSERT OR DELETE OR UPDATE OF {columns} ON events
+            FOR EACH STATEMENT EXECUTE PROCEDURE bump_event_change_version()
+            """
+        )
+    else:
+        bump_sql = (
+            "UPDATE event_change_version SET version = version + 1, "
+            "updated_at = strftime('%Y-%m-%dT%H:%M:%S', 'now') WHERE id = 1;"
+        )
+        for name, operation in (
+            ("insert", "INSERT"),
+            ("delete", "DELETE"),
+            ("update", f"UPDATE OF {columns}"),
+        ):
+            cursor.execute(f"DROP TRIGGER IF EXISTS events_change_version_{name}")
+            cursor.execute(
+                f"CREATE TRIGGER events_change_version_{name} AFTER {operation} ON events "
+                f"BEGIN {bump_sql} END"
+            )
+
+
+class EventVersionTracker:
+    """Process-local cache of the event_change_version row"""
+
+    def __init__(self, get_db: Callable, ttl: float = EVENT_VERSION_TTL):
+        self.get_db = get_db
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._version = 0
+        self._updated_at: Optional[datetime] = None
+        self._fetched_at: Optional[float] = None
+        self._refreshes = 0
+
+    def cached(self) -> Optional[Tuple[int, datetime]]:
+        """(version, last write time) if the cached row is still fresh, else None; never queries"""
+        with self._lock:
+            if self._fetched_at is not None and time.monotonic() - self._fetched_at < self.ttl:
+                return self._version, self._updated_at
+        return None
+
+    def current(self) -> Tuple[int, datetime]:
+        """(version, last write time in UTC), re-read from the database at most every ttl seconds"""
+        now = time.monotonic()
+        with self._lock:
+            if self._fetched_at is not None and now - self._fetched_at < self.ttl:
+                return self._version, self._updated_at
+        try:
+            with self.get_db() as conn:
+                cursor = conn.cursor()
+                cursor.execute(CURRENT_VERSION_SQL)
+                row = cursor.fetchone()
+            version = int(row["version"]) if row else 0
+            updated_at = _parse_timestamp(row["updated_at"] if row else None)
+        except Exception as e:
+            # Keep serving the last known version; a new one shows up on the next refresh
+            logger.warning(f"Could not read event change version: {e}")
+            with self._lock:
+                return self._version, self._updated_at or datetime.now(timezone.utc)
+        with self._lock:
+            self._version, self._updated_at = version, updated_at
+            self._fetched_at = now
+            self._refreshes += 1
+        return version, updated_at
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._fetched_at = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "version": self._version,
+                "updated_at": self._updated_at.isoformat() if self._updated_at else None,
+                "refreshes": self._refreshes,
+                "ttl_seconds": self.ttl,
+                "counter_window_seconds": ETAG_COUNTER_WINDOW,
+            }
+
+
+def _parse_timestamp(value) -> datetime:
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace(" ", "T"))
+        except (TypeError, ValueError):
+            parsed = datetime.now(timezone.utc)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def counter_window_start(now: Optional[float] = None) -> int:
+    now = time.time() if now is None else now
+    return int(now // ETAG_COUNTER_WINDOW) * ETAG_COUNTER_WINDOW
+
+
+def make_etag(version: int, *variant) -> str:
+    """
+    Strong ETag for one representation at a given version. `variant` must include every
+    input that changes the body bytes: path, query, and negotiated format and encoding.
+    """
+    key = "|".join([str(version), str(counter_window_start())] + [str(part) for part in variant])
+    return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest()[:24] + '"'
+
+
+def last_modified_for(updated_at: datetime) -> datetime:
+    """Last write, or the start of the current counter window if that is later"""
+    window_start = datetime.fromtimestamp(counter_window_start(), tz=timezone.utc)
+    return max(updated_at, window_start)
+
+
+def validator_headers(etag: str, last_modified: datetime) -> dict:
+    return {
+        "ETag": etag,
+        # The representation (and so the ETag) depends on these request headers
+        "Vary": "Accept, Accept-Encoding",
+        "Last-Modified": format_datetime(last_modified.astimezone(timezone.utc), usegmt=True),
+        # Let browsers keep the body but revalidate every time
+        "Cache-Control": "no-cache",
+    }
+
+
+def is_not_modified(if_none_match: Optional[str], if_modified_since: Optional[str],
+                    etag: str, last_modified: datetime) -> bool:
+    """RFC 9110 conditional GET: If-None-Match wins, If-Modified-Since is the fallback"""
+    if if_none_match:
+        # Weak comparison, as GET allows: W/"x" matches "x". "*" is not answered: the
+        # validators are checked before the resource is looked up, so "*" would turn a
+        # missing event into a 304 instead of a 404.
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in candidates
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
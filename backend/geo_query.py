@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Geo Query Helpers
+Shared radius-search building blocks for /events, /api/v1/local-events, /events/route-batch
+and the recommendations endpoints.
+
+Every radius search is split into two parts:
+  1. a sargable lat/lng bounding-box prefilter that can use idx_events_location (lat, lng)
+  2. the exact haversine distance, evaluated only on rows that survive the prefilter
+
+When GEO_USE_EARTHDISTANCE is enabled in production, PostgreSQL's cube/earthdistance
+extensions (GiST index on ll_to_earth(lat, lng), built by the events_earth_index
+migration) replace the bounding box.
+"""
+
+import os
+import math
+import logging
+from typing import Optional, Tuple, List
+
+from migration_utils import outside_transaction
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+METERS_PER_MILE = 1609.344
+
+# Opt-in PostgreSQL earthdistance path (requires CREATE EXTENSION cube, earthdistance)
+GEO_USE_EARTHDISTANCE = os.getenv("GEO_USE_EARTHDISTANCE", "false").lower() == "true"
+
+
+def bounding_box(lat: float, lng: float, radius_miles: float) -> Tuple[float, float, Optional[float], Optional[float]]:
+    """
+    Return (min_lat, max_lat, min_lng, max_lng) enclosing a circle of radius_miles.
+
+    The longitude bounds are None when the box would wrap a pole or the antimeridian,
+    in which case only the latitude band is used as a prefilter.
+    """
+    lat_delta = radius_miles / MILES_PER_DEGREE_LAT
+    min_lat = max(lat - lat_delta, -90.0)
+    max_lat = min(lat + lat_delta, 90.0)
+
+    # Widen the longitude span at the latitude furthest from the equator inside the box
+    widest_lat = max(abs(min_lat), abs(max_lat))
+    cos_lat = math.cos(math.radians(widest_lat))
+    if cos_lat <= 1e-6:
+        return min_lat, max_lat, None, None
+
+    lng_delta = radius_miles / (MILES_PER_DEGREE_LAT * cos_lat)
+    min_lng = lng - lng_delta
+    max_lng = lng + lng_delta
+    if lng_delta >= 180 or min_lng < -180 or max_lng > 180:
+        return min_lat, max_lat, None, None
+
+    return min_lat, max_lat, min_lng, max_lng
+
+
+def haversine_miles(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in miles"""
+    lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(min(1.0, a)))
+
+
+def bbox_condition(lat: float, lng: float, radius_miles: float, placeholder: str,
+                   lat_col: str = "lat", lng_col: str = "lng") -> Tuple[str, List[float]]:
+    """Sargable bounding-box WHERE fragment and its parameters"""
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_miles)
+    sql = f"{lat_col} BETWEEN {placeholder} AND {placeholder}"
+    params = [min_lat, max_lat]
+    if min_lng is not None:
+        sql += f" AND {lng_col} BETWEEN {placeholder} AND {placeholder}"
+        params.extend([min_lng, max_lng])
+    return sql, params
+
+
+def distance_sql(lat: float, lng: float, placeholder: str, is_postgres: bool,
+                 lat_col: str = "lat", lng_col: str = "lng") -> Tuple[str, List[float]]:
+    """
+    Exact distance expression in miles (spherical law of cosines, clamped for acos).
+    Parameterized so search points are never interpolated into the SQL text.
+    """
+    clamp_min, clamp_max = ("GREATEST", "LEAST") if is_postgres else ("MAX", "MIN")
+    sql = (
+        f"({EARTH_RADIUS_MILES} * acos({clamp_max}(1.0, {clamp_min}(-1.0, "
+        f"cos(radians({placeholder})) * cos(radians({lat_col})) * "
+        f"cos(radians({lng_col}) - radians({placeholder})) + "
+        f"sin(radians({placeholder})) * sin(radians({lat_col}))))))"
+    )
+    return sql, [lat, lng, lat]
+
+
+def radius_condition(lat: float, lng: float, radius_miles: float, placeholder: str, is_postgres: bool,
+                     lat_col: str = "lat", lng_col: str = "lng") -> Tuple[str, List[float]]:
+    """
+    Full radius WHERE fragment: index-friendly prefilter AND exact distance check.
+    """
+    if is_postgres and GEO_USE_EARTHDISTANCE:
+        sql = (
+            f"earth_box(ll_to_earth({placeholder}, {placeholder}), {placeholder}) "
+            f"@> ll_to_earth({lat_col}, {lng_col}) "
+            f"AND earth_distance(ll_to_earth({placeholder}, {placeholder}), "
+            f"ll_to_earth({lat_col}, {lng_col})) <= {placeholder}"
+        )
+        meters = radius_miles * METERS_PER_MILE
+        return sql, [lat, lng, meters, lat, lng, meters]
+
+    box_sql, box_params = bbox_condition(lat, lng, radius_miles, placeholder, lat_col, lng_col)
+    dist_sql, dist_params = distance_sql(lat, lng, placeholder, is_postgres, lat_col, lng_col)
+    return f"({box_sql} AND {dist_sql} <= {placeholder})", box_params + dist_params + [radius_miles]
+
+
+def multi_point_radius_condition(points: List[Tuple[float, float]], radius_miles: float, placeholder: str,
+                                 is_postgres: bool) -> Tuple[str, List[float]]:
+    """OR of radius conditions for several search points (route queries)"""
+    fragments = []
+    params = []
+    for lat, lng in points:
+        sql, point_params = radius_condition(lat, lng, radius_miles, placeholder, is_postgres)
+        fragments.append(sql)
+        params.extend(point_params)
+    if not fragments:
+        return "", []
+    return "(" + " OR ".join(fragments) + ")", params
+
+
+def ensure_earth_index(cursor, is_postgres: bool) -> None:
+    """
+    Install cube/earthdistance and build the GiST index the earthdistance radius search
+    reads (PostgreSQL only). Built on every PostgreSQL database so GEO_USE_EARTHDISTANCE can
+    be switched on without another migration; an index left invalid by an interrupted
+    concurrent build is rebuilt.
+    """
+    if not is_postgres:
+        return
+    cursor.execute("CREATE EXTENSION IF NOT EXISTS cube")
+    cursor.execute("CREATE EXTENSION IF NOT EXISTS earthdistance")
+    with outside_transaction(cursor, is_postgres):
+        cursor.execute(
+            "SELECT i.indisvalid AS valid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = 'idx_events_earth'"
+        )
+        row = cursor.fetchone()
+        if row is not None and row["valid"]:
+            return
+        cursor.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_events_earth")
+        cursor.execute("CREATE INDEX CONCURRENTLY idx_events_earth ON events USING gist (ll_to_earth(lat, lng))")
+        logger.info("✅ Built index idx_events_earth")
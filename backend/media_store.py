@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Media Store
+Content-addressed storage for event banner and logo images.
+
+Images are stored once under the SHA-256 of their bytes and events only keep the short
+URL served by /uploads/{image_type}/{key}, e.g. "/uploads/banners/3f2a...9c.jpg".
+Because a key never changes content, responses can be cached as immutable.
+
+Three interchangeable backends implement MediaStore, picked by MEDIA_STORE_BACKEND:
+  - DatabaseMediaStore ("db"): rows in media_blobs; the default in production, where the
+    web service has no persistent disk
+  - LocalMediaStore ("local"): files under MEDIA_STORE_DIR; the default in development
+  - S3MediaStore ("s3"): an S3-compatible bucket, the default when MEDIA_S3_BUCKET is
+    set; needs boto3 (pip install boto3), which is not in requirements.txt
+
+migrate_inline_images() moves the base64 data: URLs older uploads wrote into
+events.banner_image / logo_image into the store. It refuses a local store unless told
+otherwise, since files written there do not survive a deploy.
+"""
+
+import os
+import re
+import base64
+import hashlib
+import logging
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+logger = logging.getLogger(__name__)
+
+MEDIA_STORE_DIR = os.getenv("MEDIA_STORE_DIR", os.path.join("uploads", "media"))
+MEDIA_S3_BUCKET = os.getenv("MEDIA_S3_BUCKET")
+MEDIA_S3_PREFIX = os.getenv("MEDIA_S3_PREFIX", "media/")
+MEDIA_S3_ENDPOINT_URL = os.getenv("MEDIA_S3_ENDPOINT_URL")
+MEDIA_STORE_BACKEND = os.getenv("MEDIA_STORE_BACKEND")
+
+MEDIA_URL_PREFIX = "/uploads"
+IMAGE_TYPES = {"banners", "logos"}
+# events column holding each image type
+IMAGE_COLUMNS = {"banners": "banner_image", "logos": "logo_image"}
+
+CONTENT_TYPE_EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/gif": "gif",
+}
+EXTENSION_CONTENT_TYPES = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp", "gif": "image/gif"}
+
+_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}\.(jpg|png|webp|gif)$")
+_DATA_URL_PATTERN = re.compile(r"^data:(image/[a-z0-9.+-]+);base64,", re.IGNORECASE)
+
+
+def content_key(data: bytes, content_type: str = "image/jpeg") -> str:
+    extension = CONTENT_TYPE_EXTENSIONS.get(content_type.lower(), "jpg")
+    return f"{hashlib.sha256(data).hexdigest()}.{extension}"
+
+
+def is_media_key(key: str) -> bool:
+    return bool(key) and bool(_KEY_PATTERN.match(key))
+
+
+def content_type_for_key(key: str) -> str:
+    return EXTENSION_CONTENT_TYPES.get(key.rsplit(".", 1)[-1], "application/octet-stream")
+
+
+def media_url(image_type: str, key: str) -> str:
+    """Short URL stored on the event row for an image in the store"""
+    return f"{MEDIA_URL_PREFIX}/{image_type}/{key}"
+
+
+def media_key_from_value(value: Optional[str]) -> Optional[str]:
+    """Store key referenced by an events.banner_image/logo_image value, if any"""
+    if not value or value.startswith("data:"):
+        return None
+    key = value.rsplit("/", 1)[-1]
+    return key if is_media_key(key) else None
+
+
+def decode_data_url(value: Optional[str]) -> Optional[Tuple[bytes, str]]:
+    """(bytes, content type) of a base64 image data: URL, or None for anything else"""
+    if not value:
+        return None
+    match = _DATA_URL_PATTERN.match(value)
+    if not match:
+        return None
+    try:
+        return base64.b64decode(value[match.end():], validate=False), match.group(1).lower()
+    except (ValueError, TypeError):
+        return None
+
+
+class MediaStore(ABC):
+    """Interface for content-addressed image storage"""
+
+    backend = "base"
+
+    @abstractmethod
+    def put(self, data: bytes, content_type: str = "image/jpeg") -> str:
+        """Store the bytes (a no-op if already present) and return their key"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of a stored key, for backends that have one"""
+        return None
+
+
+MEDIA_BLOBS_TABLE_SQL = """CREATE TABLE IF NOT EXISTS media_blobs (
+                            media_key TEXT PRIMARY KEY,
+                            data {blob_type} NOT NULL,
+                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        )"""
+
+
+def ensure_media_blobs(cursor, is_postgres: bool) -> None:
+    """Create the media_blobs table behind DatabaseMediaStore"""
+    cursor.execute(MEDIA_BLOBS_TABLE_SQL.format(blob_type="BYTEA" if is_postgres else "BLOB"))
+
+
+class DatabaseMediaStore(MediaStore):
+    """Media bytes in the media_blobs table, one row per key"""
+
+    backend = "db"
+
+    def __init__(self, get_db: Callable, placeholder: str):
+        self.get_db = get_db
+        self.placeholder = placeholder
+
+    def put(self, data: bytes, content_type: str = "image/jpeg") -> str:
+        key = content_key(data, content_type)
+        with self.get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"INSERT INTO media_blobs (media_key, data) VALUES ({self.placeholder}, {self.placeholder}) "
+                f"ON CONFLICT (media_key) DO NOTHING",
+                (key, data),
+            )
+            conn.commit()
+        return key
+
+    def get(self, key: str) -> Optional[bytes]:
+        if not is_media_key(key):
+            return None
+        with self.get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT data FROM media_blobs WHERE media_key = {self.placeholder}", (key,))
+            row = cursor.fetchone()
+        # psycopg2 returns bytea as memoryview
+        return bytes(row["data"]) if row else None
+
+    def exists(self, key: str) -> bool:
+        if not is_media_key(key):
+            return False
+        with self.get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT 1 FROM media_blobs WHERE media_key = {self.placeholder}", (key,))
+            return cursor.fetchone() is not None
+
+    def delete(self, key: str) -> None:
+        with self.get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"DELETE FROM media_blobs WHERE media_key = {self.placeholder}", (key,))
+            conn.commit()
+
+
+class LocalMediaStore(MediaStore):
+    """Media files under a local directory, fanned out by the first two hash characters"""
+
+    backend = "local"
+
+    def __init__(self, root: str = MEDIA_STORE_DIR):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        if not is_media_key(key):
+            raise ValueError(f"Invalid media key: {key!r}")
+        return os.path.join(self.root, key[:2], key)
+
+    def put(self, data: bytes, content_type: str = "image/jpeg") -> str:
+        key = content_key(data, content_type)
+        path = self._path(key)
+        if os.path.exists(path):
+            return key
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial image
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return key
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.local_path(key)
+        if not path:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def exists(self, key: str) -> bool:
+        return self.local_path(key) is not None
+
+    def delete(self, key: str) -> None:
+        path = self.local_path(key)
+        if path:
+            os.remove(path)
+
+    def local_path(self, key: str) -> Optional[str]:
+        if not is_media_key(key):
+            return None
+        path = self._path(key)
+        return path if os.path.exists(path) else None
+
+
+class S3MediaStore(MediaStore):
+    """Media objects in an S3-compatible bucket"""
+
+    backend = "s3"
+
+    def __init__(self, client, bucket: str, prefix: str = MEDIA_S3_PREFIX):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _object_key(self, key: str) -> str:
+        if not is_media_key(key):
+            raise ValueError(f"Invalid media key: {key!r}")
+        return f"{self.prefix}{key}"
+
+    def put(self, data: bytes, content_type: str = "image/jpeg") -> str:
+        key = content_key(data, content_type)
+        if not self.exists(key):
+            self.client.put_object(
+                Bucket=self.bucket,
+                Key=self._object_key(key),
+                Body=data,
+                ContentType=content_type_for_key(key),
+                CacheControl="public, max-age=31536000, immutable",
+            )
+        return key
+
+    def get(self, key: str) -> Optional[bytes]:
+        if not is_media_key(key):
+            return None
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))
+        except self.client.exceptions.NoSuchKey:
+            return None
+        return response["Body"].read()
+
+    def exists(self, key: str) -> bool:
+        if not is_media_key(key):
+            return False
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except Exception:
+            return False
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+
+def create_media_store(get_db: Callable, placeholder: str, is_production: bool) -> MediaStore:
+    """
+    Build the store named by MEDIA_STORE_BACKEND, defaulting to S3 when MEDIA_S3_BUCKET is
+    set, else the database in production and local files in development
+    """
+    backend = MEDIA_STORE_BACKEND or ("s3" if MEDIA_S3_BUCKET else "db" if is_production else "local")
+    if backend == "s3":
+        if not MEDIA_S3_BUCKET or boto3 is None:
+            raise RuntimeError("The S3 media store needs MEDIA_S3_BUCKET and boto3 (pip install boto3)")
+        client = boto3.client("s3", endpoint_url=MEDIA_S3_ENDPOINT_URL)
+        logger.info(f"Using S3 media store (bucket {MEDIA_S3_BUCKET})")
+        return S3MediaStore(client, MEDIA_S3_BUCKET)
+    if backend == "db":
+        return DatabaseMediaStore(get_db, placeholder)
+    if backend == "local":
+        if is_production:
+            logger.warning(f"Using local media store in production; {MEDIA_STORE_DIR} must be a persistent disk")
+        return LocalMediaStore()
+    raise RuntimeError(f"Unknown MEDIA_STORE_BACKEND {backend!r} (expected db, local or s3)")
+
+
+def unreferenced_media_keys(cursor, placeholder: str, values: Iterable[Optional[str]]) -> List[str]:
+    """
+    Keys of the given image values that no event references any more. Run it after the
+    events were updated, and delete the keys from the store once that change is committed.
+    """
+    keys = []
+    for key in sorted({media_key_from_value(value) for value in values} - {None}):
+        urls = [media_url(image_type, key) for image_type in sorted(IMAGE_TYPES)]
+        url_list = ", ".join([placeholder] * len(urls))
+        cursor.execute(
+            f"SELECT 1 FROM events WHERE banner_image IN ({url_list}) OR logo_image IN ({url_list}) LIMIT 1",
+            urls + urls,
+        )
+        if not cursor.fetchone():
+            keys.append(key)
+    return keys
+
+
+def migrate_inline_images(get_db: Callable, placeholder: str, store: MediaStore,
+                          batch_size: int = 50, allow_local: bool = False) -> Dict[str, int]:
+    """
+    Move base64 data: URLs out of events.banner_image / logo_image into the store and
+    replace them with short media URLs. Safe to re-run; returns counts per image type.
+    A local store is refused unless allow_local is set: on an ephemeral disk the moved
+    images would be lost with the next deploy.
+    """
+    if store.backend == "local" and not allow_local:
+        raise RuntimeError("Refusing to move images into a local media store; pass allow_local to override")
+    migrated = {image_type: 0 for image_type in IMAGE_COLUMNS}
+    for image_type, column in IMAGE_COLUMNS.items():
+        last_id = 0
+        while True:
+            # Page through ids only; each image is read individually to bound memory
+            with get_db() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"""
+                    SELECT id FROM events
+                    WHERE {column} LIKE 'data:%' AND id > {placeholder}
+                    ORDER BY id
+                    LIMIT {batch_size}
+                    """,
+                    (last_id,),
+                )
+                event_ids = [row["id"] for row in cursor.fetchall()]
+                if not event_ids:
+                    break
+
+                for event_id in event_ids:
+                    last_id = event_id
+                    cursor.execute(f"SELECT {column} FROM events WHERE id = {placeholder}", (event_id,))
+                    row = cursor.fetchone()
+                    decoded = decode_data_url(row[column] if row else None)
+                    if not decoded:
+                        logger.warning(f"Skipping undecodable {column} on event {event_id}")
+                        continue
+                    data, content_type = decoded
+                    key = store.put(data, content_type)
+                    cursor.execute(
+                        f"UPDATE events SET {column} = {placeholder} WHERE id = {placeholder}",
+                        (media_url(image_type, key), event_id),
+                    )
+                    migrated[image_type] += 1
+                conn.commit()
+    return migrated
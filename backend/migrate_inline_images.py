@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+One-off migration that moves base64 banner/logo images out of the events table.
+Each data: URL in events.banner_image / logo_image is written to the media store and
+replaced with its short /uploads/... URL. Safe to re-run.
+
+Uses DATABASE_URL (PostgreSQL) when set, otherwise the local events.db. The store is
+the one the app would use (see media_store.create_media_store); a local store is refused
+unless --allow-local is given, because files on an ephemeral disk vanish on deploy.
+"""
+
+import os
+import sys
+import sqlite3
+import logging
+import argparse
+from contextlib import contextmanager
+
+from media_store import create_media_store, migrate_inline_images
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+
+@contextmanager
+def get_db():
+    """Database connection helper"""
+    if DATABASE_URL:
+        import psycopg2
+        from psycopg2.extras import RealDictCursor
+
+        conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor, connect_timeout=10)
+    else:
+        if not os.path.exists("events.db"):
+            print("Database file not found: events.db")
+            sys.exit(1)
+        conn = sqlite3.connect("events.db")
+        conn.row_factory = sqlite3.Row
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move inline event images into the media store")
+    parser.add_argument("--allow-local", action="store_true",
+                        help="write into a local media directory (only if it is a persistent disk)")
+    args = parser.parse_args()
+
+    print("🔄 Moving inline event images into the media store...")
+    placeholder = "%s" if DATABASE_URL else "?"
+    store = create_media_store(get_db, placeholder, bool(DATABASE_URL))
+    migrated = migrate_inline_images(get_db, placeholder, store, allow_local=args.allow_local)
+    print(f"✅ Migrated {migrated['banners']} banners and {migrated['logos']} logos ({store.backend} store)")
+
+
+if __name__ == "__main__":
+    main()
@@ -371,8 +371,7 @@ def create_indexes():
         cursor = conn.cursor()
         
         indexes = [
-            ("idx_events_slug", "CREATE INDEX IF NOT EXISTS idx_events_slug ON events(slug)"),
-            ("idx_events_city_state", "CREATE INDEX IF NOT EXISTS idx_events_city_state ON events(city, state)"),
+            # Slug and city/state lookups use the managed indexes in event_indexes.py
             ("idx_events_location", "CREATE INDEX IF NOT EXISTS idx_events_location ON events(lat, lng)"),
             ("idx_events_datetime", "CREATE INDEX IF NOT EXISTS idx_events_datetime ON events(start_datetime, end_datetime)"),
             ("idx_events_published", "CREATE INDEX IF NOT EXISTS idx_events_published ON events(is_published)"),
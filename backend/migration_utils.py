@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Migration Utilities
+Helpers for schema migration steps that touch every row of a large table.
+
+Pooled PostgreSQL connections carry a server-side statement_timeout (db_pool
+DB_STATEMENT_TIMEOUT_MS), sized for request queries. Migration steps lift it for their own
+transaction, backfill in id-range batches so no single statement scans the whole table,
+and build indexes CONCURRENTLY outside any transaction so writers are not blocked.
+"""
+
+import os
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+# Rows per id range handed to one backfill statement
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", 5000))
+
+
+def lift_statement_timeout(cursor, is_postgres: bool) -> None:
+    """Disable statement_timeout until the current transaction ends (PostgreSQL only)"""
+    if is_postgres:
+        cursor.execute("SET LOCAL statement_timeout = 0")
+
+
+def id_ranges(cursor, table: str, batch_size: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+    """Inclusive (low, high) id ranges of batch_size (default BACKFILL_BATCH_SIZE) covering table"""
+    batch_size = batch_size or BACKFILL_BATCH_SIZE
+    cursor.execute(f"SELECT MIN(id) AS low, MAX(id) AS high FROM {table}")
+    row = cursor.fetchone()
+    low, high = (row["low"], row["high"]) if hasattr(row, "keys") else (row[0], row[1])
+    if low is None:
+        return
+    for start in range(low, high + 1, batch_size):
+        yield start, start + batch_size - 1
+
+
+def commit_batch(cursor, is_postgres: bool) -> None:
+    """
+    Commit between batches of an idempotent backfill so row locks are released as it goes;
+    the next batch starts a new transaction with the timeout lifted again
+    """
+    cursor.connection.commit()
+    lift_statement_timeout(cursor, is_postgres)
+
+
+@contextmanager
+def outside_transaction(cursor, is_postgres: bool):
+    """
+    Commit the step's work so far and run the body in autocommit with no statement timeout,
+    as CREATE/DROP INDEX CONCURRENTLY require. A no-op wrapper on SQLite.
+    """
+    if not is_postgres:
+        yield
+        return
+    conn = cursor.connection
+    conn.commit()
+    conn.autocommit = True
+    cursor.execute("SET statement_timeout = 0")
+    try:
+        yield
+    finally:
+        cursor.execute("RESET statement_timeout")
+        conn.autocommit = False
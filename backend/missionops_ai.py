@@ -9,7 +9,6 @@ import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 import httpx
-from openai import OpenAI
 
 logger = logging.getLogger(__name__)
 
@@ -99,17 +98,33 @@ Requirements:
 
 class MissionOpsAI:
     def __init__(self):
+        self._client = None
+        self._client_created = False
+
+    @property
+    def client(self):
+        """OpenAI-compatible client, created on first use so importing this module stays cheap"""
+        if not self._client_created:
+            self._client = self._create_client()
+            self._client_created = True
+        return self._client
+
+    def _create_client(self):
         if AI_PROVIDER == "openai" and OPENAI_API_KEY:
-            self.client = OpenAI(api_key=OPENAI_API_KEY)
+            from openai import OpenAI
+
+            return OpenAI(api_key=OPENAI_API_KEY)
         elif AI_PROVIDER == "groq" and GROQ_API_KEY:
+            from openai import OpenAI
+
             # Groq uses OpenAI-compatible API
-            self.client = OpenAI(
+            return OpenAI(
                 api_key=GROQ_API_KEY,
                 base_url="https://api.groq.com/openai/v1"
             )
         else:
             logger.warning("No AI provider configured for MissionOps")
-            self.client = None
+            return None
     
     def _pick_model(self, override: Optional[str] = None) -> str:
         if override and isinstance(override, str) and override.strip():
@@ -45,14 +45,15 @@ def optimize_database():
                 # Composite indexes and newer fields
                 ("idx_events_category_date", "CREATE INDEX IF NOT EXISTS idx_events_category_date ON events(category, date, start_time)"),
                 ("idx_events_created_by", "CREATE INDEX IF NOT EXISTS idx_events_created_by ON events(created_by)"),
-                ("idx_events_slug", "CREATE INDEX IF NOT EXISTS idx_events_slug ON events(slug)"),
-                ("idx_events_city_state", "CREATE INDEX IF NOT EXISTS idx_events_city_state ON events(city, state)"),
+                # Slug and city/state lookups use the managed indexes in event_indexes.py
                 ("idx_events_datetime", "CREATE INDEX IF NOT EXISTS idx_events_datetime ON events(start_datetime, end_datetime)"),
                 ("idx_events_published", "CREATE INDEX IF NOT EXISTS idx_events_published ON events(is_published)"),
                 ("idx_events_price", "CREATE INDEX IF NOT EXISTS idx_events_price ON events(price)"),
                 ("idx_events_updated_at", "CREATE INDEX IF NOT EXISTS idx_events_updated_at ON events(updated_at)") ,
                 ("idx_events_creator_date_time", "CREATE INDEX IF NOT EXISTS idx_events_creator_date_time ON events(created_by, date, start_time)"),
             ]
+
+            # idx_events_earth (earthdistance radius search) is built by schema_migrations.py
             
             logger.info("📊 Creating performance indexes...")
             for index_name, sql in indexes_to_create:
@@ -1,10 +1,11 @@
-import math
 import traceback
 from typing import Optional
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 import logging
 
+from geo_query import bbox_condition, distance_sql, radius_condition, haversine_miles
+
 logger = logging.getLogger(__name__)
 
 # Recommendations System Models
@@ -16,9 +17,47 @@ class RecommendationsRequest(BaseModel):
     limit: Optional[int] = 20
     time_filter: Optional[str] = "upcoming"  # "this_weekend", "next_2_weeks", "upcoming"
 
-def create_recommendations_endpoints(app, get_db, get_placeholder):
+def _days_since(created_at, now):
+    """Days since created_at, as the SQL days_since_created column computes it"""
+    if created_at is None:
+        return None
+    if not isinstance(created_at, datetime):
+        try:
+            created_at = datetime.fromisoformat(str(created_at).replace("Z", ""))
+        except ValueError:
+            return None
+    return (now - created_at.replace(tzinfo=None)).total_seconds() / 86400
+
+
+def _ranked_from_grid(snapshot, lat, lng, radius, start_date, end_date, limit):
+    """The recommendations query answered from the in-memory event grid"""
+    now = datetime.utcnow()
+    rows = []
+    for event_id in snapshot.within([(lat, lng)], radius):
+        row = snapshot.rows[event_id]
+        day = str(row.get("event_date"))[:10]
+        if day < str(start_date) or (end_date is not None and day > str(end_date)):
+            continue
+        event = dict(row)
+        days = _days_since(event.get("created_at"), now)
+        event["days_since_created"] = days
+        event["verification_bonus"] = 10 if event.get("verified") else 0
+        event["recency_bonus"] = 0
+        if days is not None and days <= 7:
+            event["recency_bonus"] = 5
+        elif days is not None and days <= 30:
+            event["recency_bonus"] = 2
+        rows.append(event)
+    rows.sort(key=lambda event: (
+        -event["verification_bonus"], -event["recency_bonus"], str(event.get("start_ts"))
+    ))
+    return rows[:limit]
+
+
+def create_recommendations_endpoints(app, get_db, get_placeholder, event_grid=None):
     """
-    Create and register the recommendations endpoints with the FastAPI app
+    Create and register the recommendations endpoints with the FastAPI app.
+    With an event_grid, nearby upcoming events are read from memory while it is current.
     """
     
     @app.post("/api/recommendations")
@@ -76,39 +115,28 @@ def create_recommendations_endpoints(app, get_db, get_placeholder):
                 
                 events = []
                 radius_attempts = [10, 30, 50, 100, None]  # Expanding search radius
+                snapshot = event_grid.view() if event_grid is not None else None
+                if snapshot is not None and not snapshot.covers(str(start_date)):
+                    snapshot = None
                 
                 for radius in radius_attempts:
                     where_conditions = []
                     params = []
                     
                     # Date filtering - prioritize events starting today or later
-                    if get_placeholder() == "%s":  # PostgreSQL
-                        where_conditions.append(f"date::date >= {placeholder}")
-                    else:  # SQLite
-                        where_conditions.append(f"date >= {placeholder}")
+                    where_conditions.append(f"event_date >= {placeholder}")
                     params.append(str(start_date))
                     
                     if request.time_filter != "upcoming":
-                        if get_placeholder() == "%s":  # PostgreSQL
-                            where_conditions.append(f"date::date <= {placeholder}")
-                        else:  # SQLite
-                            where_conditions.append(f"date <= {placeholder}")
+                        where_conditions.append(f"event_date <= {placeholder}")
                         params.append(str(end_date))
                     
                     # Location filtering with expanding radius
                     if radius is not None:
                         # Calculate bounding box for faster filtering
-                        lat_delta = radius / 69.0  # Roughly 69 miles per degree latitude
-                        lng_delta = radius / (69.0 * abs(math.cos(math.radians(request.lat))))
-                        
-                        min_lat = request.lat - lat_delta
-                        max_lat = request.lat + lat_delta
-                        min_lng = request.lng - lng_delta
-                        max_lng = request.lng + lng_delta
-                        
-                        where_conditions.append(f"lat BETWEEN {placeholder} AND {placeholder}")
-                        where_conditions.append(f"lng BETWEEN {placeholder} AND {placeholder}")
-                        params.extend([min_lat, max_lat, min_lng, max_lng])
+                        box_sql, box_params = bbox_condition(request.lat, request.lng, radius, placeholder)
+                        where_conditions.append(box_sql)
+                        params.extend(box_params)
                     
                     # Build and execute query
                     where_clause = " AND ".join(where_conditions)
@@ -130,7 +158,7 @@ def create_recommendations_endpoints(app, get_db, get_placeholder):
                             FROM events 
                             WHERE {where_clause}
                             ORDER BY verification_bonus DESC, recency_bonus DESC, 
-                                     date ASC, start_time ASC
+                                     start_ts ASC
                             LIMIT {request.limit * 2}
                         """
                     else:  # SQLite
@@ -149,12 +177,19 @@ def create_recommendations_endpoints(app, get_db, get_placeholder):
                             FROM events 
                             WHERE {where_clause}
                             ORDER BY verification_bonus DESC, recency_bonus DESC, 
-                                     date ASC, start_time ASC
+                                     start_ts ASC
                             LIMIT {request.limit * 2}
                         """
                     
-                    c.execute(query, params)
-                    rows = c.fetchall()
+                    if snapshot is not None:
+                        rows = _ranked_from_grid(
+                            snapshot, request.lat, request.lng, radius, start_date,
+                            end_date if request.time_filter != "upcoming" else None,
+                            request.limit * 2,
+                        )
+                    else:
+                        c.execute(query, params)
+                        rows = c.fetchall()
                     
                     # Process results and calculate distances
                     for row in rows:
@@ -169,26 +204,7 @@ def create_recommendations_endpoints(app, get_db, get_placeholder):
                         event_lng = event_dict.get('lng')
                         
                         if event_lat is not None and event_lng is not None:
-                            # Use proper haversine formula for accurate distance calculation
-                            def haversine_distance(lat1, lng1, lat2, lng2):
-                                """Calculate accurate distance between two points using haversine formula"""
-                                import math
-                                
-                                # Convert decimal degrees to radians
-                                lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
-                                
-                                # Haversine formula
-                                dlat = lat2 - lat1
-                                dlng = lng2 - lng1
-                                a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
-                                c = 2 * math.asin(math.sqrt(a))
-                                
-                                # Radius of earth in miles
-                                r = 3959
-                                
-                                return c * r
-                            
-                            distance = haversine_distance(request.lat, request.lng, event_lat, event_lng)
+                            distance = haversine_miles(request.lat, request.lng, event_lat, event_lng)
                         else:
                             distance = float('inf')  # Skip events without valid coordinates
                         
@@ -411,20 +427,18 @@ def create_recommendations_endpoints(app, get_db, get_placeholder):
                     
                     # Add event counts to major cities
                     for city in major_cities:
-                        # Quick count of upcoming events near this city - database agnostic
-                        if get_placeholder() == "%s":  # PostgreSQL
-                            date_filter = "date::date >= CURRENT_DATE"
-                        else:  # SQLite
-                            date_filter = "date >= date('now')"
+                        # Quick count of upcoming events near this city
+                        date_filter = "event_date >= CURRENT_DATE"
                             
+                        radius_sql, radius_params = radius_condition(
+                            city['lat'], city['lng'], 50, placeholder, placeholder == "%s"
+                        )
                         c.execute(f"""
                             SELECT COUNT(*) as event_count
                             FROM events 
                             WHERE {date_filter}
-                            AND (6371 * acos(cos(radians({city['lat']})) * cos(radians(lat)) * 
-                                 cos(radians(lng) - radians({city['lng']})) + sin(radians({city['lat']})) * 
-                                 sin(radians(lat)))) * 0.621371 <= 50
-                        """)
+                            AND {radius_sql}
+                        """, radius_params)
                         result = c.fetchone()
                         city['event_count'] = result[0] if result else 0
                     
@@ -433,38 +447,45 @@ def create_recommendations_endpoints(app, get_db, get_placeholder):
                     return cities_with_events[:limit]
                 
                 # Find cities with events within distance, sorted by distance
-                # Database-agnostic date filtering
-                if get_placeholder() == "%s":  # PostgreSQL
-                    date_filter = "date::date >= CURRENT_DATE"
-                else:  # SQLite
-                    date_filter = "date >= date('now')"
-                    
+                date_filter = "event_date >= CURRENT_DATE"
+                
+                # A city counts when its centroid (the average of its event coordinates) is in
+                # range, so the box and distance checks apply to the grouped centroids rather than
+                # to single events: a city straddling the box edge keeps all of its events
+                box_sql, box_params = bbox_condition(
+                    lat, lng, max_distance, placeholder, lat_col="avg_lat", lng_col="avg_lng"
+                )
+                dist_sql, dist_params = distance_sql(
+                    lat, lng, placeholder, placeholder == "%s", lat_col="avg_lat", lng_col="avg_lng"
+                )
+
                 query = f"""
-                    SELECT 
-                        city, 
-                        state, 
-                        AVG(lat) as avg_lat, 
-                        AVG(lng) as avg_lng,
-                        COUNT(*) as event_count,
-                        (6371 * acos(cos(radians({lat})) * cos(radians(AVG(lat))) * 
-                         cos(radians(AVG(lng)) - radians({lng})) + sin(radians({lat})) * 
-                         sin(radians(AVG(lat))))) * 0.621371 as distance_miles
-                    FROM events 
-                    WHERE {date_filter}
-                    AND city IS NOT NULL 
-                    AND state IS NOT NULL
-                    AND city != ''
-                    AND state != ''
-                    GROUP BY city, state
-                    HAVING (6371 * acos(cos(radians({lat})) * cos(radians(AVG(lat))) * 
-                           cos(radians(AVG(lng)) - radians({lng})) + sin(radians({lat})) * 
-                           sin(radians(AVG(lat))))) * 0.621371 <= {max_distance}
-                    AND COUNT(*) >= 2
+                    SELECT city, state, avg_lat, avg_lng, event_count, {dist_sql} as distance_miles
+                    FROM (
+                        SELECT 
+                            city, 
+                            state, 
+                            AVG(lat) as avg_lat, 
+                            AVG(lng) as avg_lng,
+                            COUNT(*) as event_count
+                        FROM events 
+                        WHERE {date_filter}
+                        AND lat IS NOT NULL
+                        AND lng IS NOT NULL
+                        AND city IS NOT NULL 
+                        AND state IS NOT NULL
+                        AND city != ''
+                        AND state != ''
+                        GROUP BY city, state
+                        HAVING COUNT(*) >= 2
+                    ) city_centroids
+                    WHERE {box_sql}
+                    AND {dist_sql} <= {placeholder}
                     ORDER BY distance_miles ASC
-                    LIMIT {limit * 2}
+                    LIMIT {placeholder}
                 """
                 
-                c.execute(query)
+                c.execute(query, dist_params + box_params + dist_params + [max_distance, limit * 2])
                 results = c.fetchall()
                 
                 cities = []
@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+"""
+Response Cache
+Size-bounded LRU + TTL cache with tag-based invalidation, used for event list pages.
+
+Every entry can carry tags (category/date/geo scope, event ids). Writes invalidate only
+the entries whose tags they touch instead of clearing the whole cache.
+
+Two interchangeable backends implement CacheBackend:
+  - SimpleCache: in-process, one copy per worker (default)
+  - RedisCache: shared across workers/instances through Redis, with a small in-process
+    front cache kept coherent by invalidation messages over Redis pub/sub
+
+create_cache() picks RedisCache when CACHE_REDIS_URL is set and redis is installed.
+"""
+
+import os
+import sys
+import json
+import time
+import math
+import uuid
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# Shared cache configuration ("fakeredis://" gives an in-process stand-in for local testing)
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+CACHE_REDIS_PREFIX = os.getenv("CACHE_REDIS_PREFIX", "todoevents:cache:")
+CACHE_LOCAL_TTL = int(os.getenv("CACHE_LOCAL_TTL", 30))  # Front-cache TTL when Redis is used
+
+# Geo cells used to scope cached radius searches (degrees per cell side)
+GEO_CELL_DEGREES = 1.0
+# Radius searches spanning more cells than this are tagged as "wide" instead
+MAX_GEO_CELLS_PER_ENTRY = 64
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate in-memory payload size in bytes (strings dominate event pages)"""
+    if value is None or isinstance(value, (bool, int, float)):
+        return 8
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return 64 + sum(len(str(k)) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return 56 + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size", "tags")
+
+    def __init__(self, value: Any, expires_at: float, size: int, tags: Set[str]):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.tags = tags
+
+
+class CacheBackend(ABC):
+    """Interface shared by every response cache backend."""
+
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any, tags: Optional[Iterable[str]] = None, ttl: Optional[int] = None) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+    @abstractmethod
+    def clear_pattern(self, pattern: str) -> int:
+        pass
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        pass
+
+
+class SimpleCache(CacheBackend):
+    """Thread-safe LRU + TTL cache with byte accounting and tag-based invalidation."""
+
+    def __init__(self, ttl_seconds: int = 300, max_size: int = 1000, max_bytes: int = CACHE_MAX_BYTES) -> None:
+        self.ttl = ttl_seconds
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._tag_index: Dict[str, Set[str]] = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    # Internal helpers (caller holds the lock)
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+
+    def _evict_overflow(self) -> None:
+        while self._entries and (len(self._entries) > self.max_size or self._bytes > self.max_bytes):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self._counters["evictions"] += 1
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry.value
+
+    def set(self, key: str, value: Any, tags: Optional[Iterable[str]] = None, ttl: Optional[int] = None) -> None:
+        size = estimate_size(value)
+        entry = _Entry(value, time.monotonic() + (ttl or self.ttl), size, set(tags or ()))
+        with self._lock:
+            self._remove(key)
+            if size > self.max_bytes:
+                # Never let a single oversized page flush everything else
+                return
+            self._entries[key] = entry
+            self._bytes += size
+            for tag in entry.tags:
+                self._tag_index.setdefault(tag, set()).add(key)
+            self._counters["sets"] += 1
+            self._evict_overflow()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Remove every entry carrying any of the given tags; returns the number removed"""
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tag_index.get(tag, set())
+            for key in keys:
+                self._remove(key)
+            self._counters["invalidations"] += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tag_index.clear()
+            self._bytes = 0
+
+    def clear_pattern(self, pattern: str) -> int:
+        """Clear cache entries that start with the given pattern"""
+        with self._lock:
+            keys_to_delete = [key for key in self._entries if key.startswith(pattern)]
+            for key in keys_to_delete:
+                self._remove(key)
+            return len(keys_to_delete)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                "backend": "memory",
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "tags": len(self._tag_index),
+                "hit_rate": round(self._counters["hits"] / lookups, 3) if lookups else 0.0,
+                **self._counters,
+            }
+
+
+class RedisCache(CacheBackend):
+    """
+    Response cache shared by all workers through Redis.
+
+    Entries live in Redis as JSON ({"v": value, "t": tags}) with a Redis set per tag.
+    Each worker keeps a short-TTL SimpleCache in front of Redis; every invalidation is
+    applied locally, in Redis, and published so the other workers drop their copies too.
+    Redis errors are logged and treated as cache misses so requests never fail on the cache.
+    """
+
+    def __init__(self, client, ttl_seconds: int = 300, max_size: int = 1000,
+                 prefix: str = CACHE_REDIS_PREFIX, local_ttl: int = CACHE_LOCAL_TTL,
+                 subscribe: bool = True) -> None:
+        self.client = client
+        self.ttl = ttl_seconds
+        self.prefix = prefix
+        self.channel = f"{prefix}invalidate"
+        self.instance_id = uuid.uuid4().hex
+        self.local = SimpleCache(ttl_seconds=min(local_ttl, ttl_seconds), max_size=max_size)
+        self._counters = {"remote_hits": 0, "remote_misses": 0, "errors": 0, "messages_received": 0}
+        self._lock = threading.Lock()
+        self._pubsub_thread = None
+        if subscribe:
+            self._start_subscriber()
+
+    # Key helpers
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}key:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _error(self, operation: str, error: Exception) -> None:
+        self._count("errors")
+        logger.warning(f"Redis cache {operation} failed: {error}")
+
+    # Pub/sub
+    def _start_subscriber(self) -> None:
+        try:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: self._on_message})
+            self._pubsub_thread = pubsub.run_in_thread(sleep_time=0.5, daemon=True)
+        except Exception as e:
+            self._error("subscribe", e)
+
+    def _publish(self, op: str, values: Iterable[str] = ()) -> None:
+        message = json.dumps({"origin": self.instance_id, "op": op, "values": list(values)})
+        try:
+            self.client.publish(self.channel, message)
+        except Exception as e:
+            self._error("publish", e)
+
+    def _on_message(self, message) -> None:
+        try:
+            data = json.loads(message["data"])
+        except (TypeError, ValueError, KeyError):
+            return
+        if data.get("origin") == self.instance_id:
+            return
+        self._count("messages_received")
+        self._apply_local(data.get("op"), data.get("values", []))
+
+    def _apply_local(self, op: str, values) -> None:
+        if op == "tags":
+            self.local.invalidate_tags(values)
+        elif op == "keys":
+            for key in values:
+                self.local.delete(key)
+        elif op == "pattern":
+            for pattern in values:
+                self.local.clear_pattern(pattern)
+        elif op == "clear":
+            self.local.clear()
+
+    def _scan_delete(self, match: str) -> int:
+        deleted = 0
+        batch = []
+        for redis_key in self.client.scan_iter(match=match, count=500):
+            batch.append(redis_key)
+            if len(batch) >= 500:
+                deleted += self.client.delete(*batch)
+                batch = []
+        if batch:
+            deleted += self.client.delete(*batch)
+        return deleted
+
+    # CacheBackend
+    def get(self, key: str) -> Any:
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        try:
+            raw = self.client.get(self._key(key))
+        except Exception as e:
+            self._error("get", e)
+            return None
+        if raw is None:
+            self._count("remote_misses")
+            return None
+        self._count("remote_hits")
+        payload = json.loads(raw)
+        self.local.set(key, payload["v"], tags=payload.get("t"))
+        return payload["v"]
+
+    def set(self, key: str, value: Any, tags: Optional[Iterable[str]] = None, ttl: Optional[int] = None) -> None:
+        tags = list(tags or ())
+        self.local.set(key, value, tags=tags)
+        ttl = ttl or self.ttl
+        try:
+            payload = json.dumps({"v": value, "t": tags}, default=str, separators=(",", ":"))
+            pipe = self.client.pipeline(transaction=False)
+            pipe.set(self._key(key), payload, ex=ttl)
+            for tag in tags:
+                pipe.sadd(self._tag_key(tag), key)
+                pipe.expire(self._tag_key(tag), ttl)
+            pipe.execute()
+        except Exception as e:
+            self._error("set", e)
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        try:
+            self.client.delete(self._key(key))
+        except Exception as e:
+            self._error("delete", e)
+        self._publish("keys", [key])
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        tags = list(tags)
+        removed = self.local.invalidate_tags(tags)
+        try:
+            tag_keys = [self._tag_key(tag) for tag in tags]
+            members = self.client.sunion(tag_keys) if tag_keys else set()
+            keys = [self._key(m.decode() if isinstance(m, bytes) else m) for m in members]
+            pipe = self.client.pipeline(transaction=False)
+            if keys:
+                pipe.delete(*keys)
+            if tag_keys:
+                pipe.delete(*tag_keys)
+            pipe.execute()
+            removed = max(removed, len(keys))
+        except Exception as e:
+            self._error("invalidate", e)
+        self._publish("tags", tags)
+        return removed
+
+    def clear(self) -> None:
+        self.local.clear()
+        try:
+            self._scan_delete(f"{self.prefix}key:*")
+            self._scan_delete(f"{self.prefix}tag:*")
+        except Exception as e:
+            self._error("clear", e)
+        self._publish("clear")
+
+    def clear_pattern(self, pattern: str) -> int:
+        removed = self.local.clear_pattern(pattern)
+        try:
+            removed = max(removed, self._scan_delete(f"{self.prefix}key:{pattern}*"))
+        except Exception as e:
+            self._error("clear_pattern", e)
+        self._publish("pattern", [pattern])
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            **self.local.stats(),
+            **counters,
+            "backend": "redis",
+            "ttl_seconds": self.ttl,
+            "pubsub_listening": bool(self._pubsub_thread and self._pubsub_thread.is_alive()),
+        }
+
+
+def create_cache(ttl_seconds: int = 300, max_size: int = 1000, namespace: str = "") -> CacheBackend:
+    """
+    Build the configured cache backend, falling back to the in-process cache.
+    `namespace` keeps independent caches apart (keys and invalidation channel) in Redis.
+    """
+    if CACHE_REDIS_URL:
+        try:
+            if CACHE_REDIS_URL.startswith("fakeredis://"):
+                import fakeredis
+
+                client = fakeredis.FakeRedis()
+            elif redis is None:
+                raise ImportError("redis package is not installed")
+            else:
+                client = redis.Redis.from_url(CACHE_REDIS_URL, socket_timeout=1, socket_connect_timeout=2)
+                client.ping()
+            logger.info("Using shared Redis response cache")
+            return RedisCache(client, ttl_seconds=ttl_seconds, max_size=max_size,
+                              prefix=f"{CACHE_REDIS_PREFIX}{namespace}")
+        except Exception as e:
+            logger.warning(f"Shared cache unavailable ({e}), using in-process cache")
+    return SimpleCache(ttl_seconds=ttl_seconds, max_size=max_size)
+
+
+# Tag helpers for event list pages
+
+def geo_cell(lat: float, lng: float) -> str:
+    return f"{math.floor(lat / GEO_CELL_DEGREES)}:{math.floor(lng / GEO_CELL_DEGREES)}"
+
+
+def geo_cells_for_box(min_lat: float, max_lat: float, min_lng: Optional[float], max_lng: Optional[float]) -> Set[str]:
+    """Cells overlapping a bounding box, or {"wide"} if the box is unbounded or too large"""
+    if min_lng is None:
+        return {"wide"}
+    lat_range = range(math.floor(min_lat / GEO_CELL_DEGREES), math.floor(max_lat / GEO_CELL_DEGREES) + 1)
+    lng_range = range(math.floor(min_lng / GEO_CELL_DEGREES), math.floor(max_lng / GEO_CELL_DEGREES) + 1)
+    if len(lat_range) * len(lng_range) > MAX_GEO_CELLS_PER_ENTRY:
+        return {"wide"}
+    return {f"{la}:{ln}" for la in lat_range for ln in lng_range}
+
+
+def event_list_tags(category: Optional[str], date: Optional[str], cells: Optional[Set[str]],
+                    event_ids: Iterable[Any] = ()) -> Set[str]:
+    """
+    Tags for a cached event list page: one scope tag per geo cell the query covers
+    (or "none" for queries without a location) plus one tag per event on the page.
+    """
+    category_scope = category if category and category != "all" else "all"
+    date_scope = date or "all"
+    tags = {f"events:{category_scope}|{date_scope}|{cell}" for cell in (cells or {"none"})}
+    tags.update(f"event:{event_id}" for event_id in event_ids)
+    return tags
+
+
+def event_id_tags(event_ids: Iterable[Any]) -> Set[str]:
+    """Tags for pages that contain the given events (enough for deletes and in-place edits)"""
+    return {f"event:{event_id}" for event_id in event_ids}
+
+
+def event_write_tags(*events: Optional[Dict[str, Any]]) -> Set[str]:
+    """
+    Tags to invalidate when events are created, changed or deleted.
+    Pass both the old and new row on updates so pages matching either version are dropped.
+    """
+    tags = set()
+    for event in events:
+        if not event:
+            continue
+        if event.get("id") is not None:
+            tags.add(f"event:{event['id']}")
+        categories = {"all"}
+        if event.get("category"):
+            categories.add(event["category"])
+        dates = {"all"}
+        if event.get("date"):
+            dates.add(str(event["date"]))
+        cells = {"none", "wide"}
+        if event.get("lat") is not None and event.get("lng") is not None:
+            try:
+                cells.add(geo_cell(float(event["lat"]), float(event["lng"])))
+            except (TypeError, ValueError):
+                pass
+        tags.update(
+            f"events:{category}|{date}|{cell}"
+            for category in categories
+            for date in dates
+            for cell in cells
+        )
+    return tags
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Schema Cache
+Process-wide cache of table columns, so request handlers that adapt to optional columns
+(create/update event, the user's events list, analytics, bulk import) check membership in
+a frozenset instead of querying information_schema / PRAGMA table_info on every call.
+
+Columns are loaded on first use (refresh() warms the usual tables at startup) and dropped
+when the schema moves on:
+  - in this process, the lifespan hook calls invalidate() when run_migrations applied steps,
+    and admin endpoints that ALTER tables call it after committing;
+  - other workers' migrations are noticed by re-reading the schema stamp (latest
+    schema_version / schema_checksums entry) at most every SCHEMA_CACHE_CHECK_SECONDS.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from schema_migrations import schema_stamp
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_CACHE_CHECK_SECONDS = float(os.getenv("SCHEMA_CACHE_CHECK_SECONDS", 60))
+
+WARM_TABLES = ("events", "users")
+
+
+def introspect_columns(cursor, table: str, is_postgres: bool) -> Tuple[str, ...]:
+    """Column names of table in declaration order; empty if the table does not exist"""
+    if is_postgres:
+        cursor.execute(
+            """
+            SELECT column_name FROM information_schema.columns
+            WHERE table_name = %s AND table_schema = current_schema()
+            ORDER BY ordinal_position
+            """,
+            (table,),
+        )
+        return tuple(row["column_name"] for row in cursor.fetchall())
+    cursor.execute(f"PRAGMA table_info({table})")
+    return tuple(row[1] for row in cursor.fetchall())
+
+
+class SchemaCache:
+    """Column lists per table, shared by every request in the process"""
+
+    def __init__(self, get_db: Callable, is_postgres: bool,
+                 check_interval: float = SCHEMA_CACHE_CHECK_SECONDS):
+        self.get_db = get_db
+        self.is_postgres = is_postgres
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._columns: Dict[str, Tuple[str, ...]] = {}
+        self._column_sets: Dict[str, FrozenSet[str]] = {}
+        self._stamp: Optional[str] = None
+        self._checked_at: Optional[float] = None
+        self._hits = 0
+        self._loads = 0
+        self._reloads = 0
+
+    def columns(self, cursor, table: str) -> Tuple[str, ...]:
+        """Ordered column names; loaded through cursor on a miss"""
+        self._check_stamp()
+        with self._lock:
+            cached = self._columns.get(table)
+            if cached is not None:
+                self._hits += 1
+                return cached
+        columns = introspect_columns(cursor, table, self.is_postgres)
+        if columns:
+            # A missing table is not cached, so it shows up as soon as a migration creates it
+            with self._lock:
+                self._columns[table] = columns
+                self._column_sets[table] = frozenset(columns)
+                self._loads += 1
+        return columns
+
+    def column_set(self, cursor, table: str) -> FrozenSet[str]:
+        """Column names for O(1) membership checks"""
+        self.columns(cursor, table)
+        with self._lock:
+            return self._column_sets.get(table, frozenset())
+
+    def refresh(self, tables: Iterable[str] = WARM_TABLES) -> None:
+        """Drop everything and load tables now (startup, after migrations)"""
+        with self.get_db() as conn:
+            cursor = conn.cursor()
+            stamp = self._read_stamp(cursor)
+            with self._lock:
+                self._columns.clear()
+                self._column_sets.clear()
+                self._stamp = stamp
+                self._checked_at = time.monotonic()
+            for table in tables:
+                self.columns(cursor, table)
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        with self._lock:
+            if table is None:
+                self._columns.clear()
+                self._column_sets.clear()
+            else:
+                self._columns.pop(table, None)
+                self._column_sets.pop(table, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "tables": sorted(self._columns),
+                "stamp": self._stamp,
+                "hits": self._hits,
+                "loads": self._loads,
+                "reloads": self._reloads,
+                "check_interval_seconds": self.check_interval,
+            }
+
+    def _read_stamp(self, cursor) -> Optional[str]:
+        try:
+            return schema_stamp(cursor)
+        except Exception as e:
+            # No schema_version yet (migrations have not run); columns are still served
+            logger.debug(f"Could not read schema stamp: {e}")
+            cursor.connection.rollback()
+            return None
+
+    def _check_stamp(self) -> None:
+        """Re-read the schema stamp on its own connection at most every check_interval"""
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return
+            # Claim the check so concurrent requests keep serving the cached columns
+            self._checked_at = now
+        try:
+            with self.get_db() as conn:
+                stamp = self._read_stamp(conn.cursor())
+        except Exception as e:
+            logger.warning(f"Could not check schema version: {e}")
+            return
+        with self._lock:
+            if stamp != self._stamp:
+                if self._stamp is not None:
+                    logger.info(f"🔄 Schema changed ({self._stamp} -> {stamp}), reloading columns")
+                    self._reloads += 1
+                self._columns.clear()
+                self._column_sets.clear()
+                self._stamp = stamp
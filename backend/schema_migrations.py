@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Schema Migrations
+Versioned, run-once schema setup for PostgreSQL (production) and SQLite (development).
+
+Each migration is a numbered step recorded in schema_version once it has been applied, so
+a worker whose database is current only runs one SELECT at startup instead of re-issuing
+every CREATE TABLE / ALTER TABLE probe. Steps run in order, each in its own transaction,
+except that idempotent backfills may commit between id-range batches and index builds run
+CONCURRENTLY outside a transaction (see migration_utils).
+On PostgreSQL the runner holds an advisory lock while applying, so when several workers
+boot together one of them migrates and the others wait and then find nothing to do.
+
+Repeatable steps (the event change-version triggers, which list the events columns) are
+re-applied whenever their checksum changes, tracked in schema_checksums.
+
+New schema changes are added as a new step at the end of MIGRATIONS; applied steps are
+never edited. Usage:
+
+    python schema_migrations.py            # apply pending migrations
+    python schema_migrations.py --status   # show applied and pending steps
+"""
+
+import os
+import sys
+import logging
+import argparse
+from datetime import datetime
+from typing import Callable, List
+
+from analytics_rollups import ensure_event_facts
+from email_outbox import ensure_email_outbox
+from event_indexes import add_event_date, add_event_timestamps, index_checksum, install_event_indexes
+from event_seo import ensure_event_seo
+from event_versions import install_event_version_tracking, tracking_checksum
+from geo_query import ensure_earth_index
+from media_store import ensure_media_blobs
+from migration_utils import lift_statement_timeout
+from stripe_subscriptions import ensure_subscription_tables
+from visit_ingestion import PAGE_VISIT_HOURLY_TABLE_SQL, backfill_hourly_rollups
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for pg_advisory_lock
+MIGRATION_LOCK_KEY = 7_310_024_518
+
+SCHEMA_VERSION_TABLE_SQL = """CREATE TABLE IF NOT EXISTS schema_version (
+                            version INTEGER PRIMARY KEY,
+                            name TEXT NOT NULL,
+                            applied_at TEXT NOT NULL
+                        )"""
+
+SCHEMA_CHECKSUMS_TABLE_SQL = """CREATE TABLE IF NOT EXISTS schema_checksums (
+                            name TEXT PRIMARY KEY,
+                            checksum TEXT NOT NULL,
+                            applied_at TEXT NOT NULL
+                        )"""
+
+# Columns added to events after the original schema, in the order they were introduced
+LEGACY_EVENT_COLUMNS = [
+    ("start_time", "TEXT DEFAULT '12:00'"),
+    ("end_time", "TEXT"),
+    ("end_date", "TEXT"),
+    ("interest_count", "INTEGER DEFAULT 0"),
+    ("view_count", "INTEGER DEFAULT 0"),
+    ("fee_required", "TEXT"),
+    ("event_url", "TEXT"),
+    ("host_name", "TEXT"),
+    ("secondary_category", "TEXT"),
+    ("verified", "BOOLEAN DEFAULT FALSE"),
+    ("banner_image", "TEXT"),
+    ("logo_image", "TEXT"),
+    ("is_premium_event", "BOOLEAN DEFAULT FALSE"),
+]
+
+
+def _id_column(is_postgres: bool) -> str:
+    return "id SERIAL PRIMARY KEY" if is_postgres else "id INTEGER PRIMARY KEY AUTOINCREMENT"
+
+
+def _table_columns(cursor, table: str, is_postgres: bool) -> List[str]:
+    if is_postgres:
+        cursor.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = %s",
+            (table,),
+        )
+        return [row["column_name"] for row in cursor.fetchall()]
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cursor.fetchall()]
+
+
+def create_core_tables(cursor, is_postgres: bool) -> None:
+    """Users, events (plus the columns older databases lack) and the tracking tables"""
+    id_column = _id_column(is_postgres)
+    timestamp = "TIMESTAMP" if is_postgres else "DATETIME"
+    false = "FALSE" if is_postgres else "0"
+
+    cursor.execute(
+        f"""CREATE TABLE IF NOT EXISTS users (
+                {id_column},
+                email TEXT UNIQUE NOT NULL,
+                hashed_password TEXT NOT NULL,
+                role TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )"""
+    )
+    cursor.execute(
+        f"""CREATE TABLE IF NOT EXISTS events (
+                {id_column},
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                date TEXT NOT NULL,
+                start_time TEXT NOT NULL,
+                end_time TEXT,
+                end_date TEXT,
+                category TEXT NOT NULL,
+                secondary_category TEXT,
+                address TEXT NOT NULL,
+                lat REAL NOT NULL,
+                lng REAL NOT NULL,
+                recurring BOOLEAN NOT NULL DEFAULT {false},
+                frequency TEXT,
+                created_by INTEGER,
+                interest_count INTEGER DEFAULT 0,
+                view_count INTEGER DEFAULT 0,
+                fee_required TEXT,
+                event_url TEXT,
+                host_name TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                verified BOOLEAN DEFAULT FALSE,
+                FOREIGN KEY(created_by) REFERENCES users(id)
+            )"""
+    )
+
+    # One column listing instead of a probe per column
+    columns = set(_table_columns(cursor, "events", is_postgres))
+    if "time" in columns and "start_time" not in columns:
+        cursor.execute("ALTER TABLE events RENAME COLUMN time TO start_time")
+        columns.add("start_time")
+        logger.info("✅ Migrated 'time' column to 'start_time'")
+    for column, definition in LEGACY_EVENT_COLUMNS:
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE events ADD COLUMN {column} {definition}")
+            logger.info(f"✅ Added '{column}' column")
+
+    cursor.execute(
+        f"""CREATE TABLE IF NOT EXISTS activity_logs (
+                {id_column},
+                user_id INTEGER,
+                action TEXT NOT NULL,
+                details TEXT,
+                timestamp {timestamp} DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY(user_id) REFERENCES users(id)
+            )"""
+    )
+    cursor.execute(
+        f"""CREATE TABLE IF NOT EXISTS event_interests (
+                {id_column},
+                event_id INTEGER NOT NULL,
+                user_id INTEGER,
+                browser_fingerprint TEXT NOT NULL DEFAULT 'legacy',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(event_id, user_id, browser_fingerprint),
+                FOREIGN KEY(event_id) REFERENCES events(id) ON DELETE CASCADE,
+                FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE SET NULL
+            )"""
+    )
+    cursor.execute(
+        f"""CREATE TABLE IF NOT EXISTS event_views (
+                {id_column},
+                event_id INTEGER NOT NULL,
+                user_id INTEGER,
+                browser_fingerprint TEXT NOT NULL DEFAULT 'legacy',
+                viewed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(event_id, user_id, browser_fingerprint),
+                FOREIGN KEY(event_id) REFERENCES events(id) ON DELETE CASCADE,
+                FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE SET NULL
+            )"""
+    )
+    cursor.execute(
+        f"""CREATE TABLE IF NOT EXISTS page_visits (
+                {id_column},
+                page_type TEXT NOT NULL,
+                page_path TEXT NOT NULL,
+                user_id INTEGER,
+                browser_fingerprint TEXT NOT NULL DEFAULT 'anonymous',
+                visited_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE SET NULL
+            )"""
+    )
+    # CCPA privacy requests
+    cursor.execute(
+        f"""CREATE TABLE IF NOT EXISTS privacy_requests (
+                {id_column},
+                request_type TEXT NOT NULL CHECK (request_type IN ('access', 'delete', 'opt_out')),
+                email TEXT NOT NULL,
+                full_name TEXT,
+                verification_info TEXT,
+                details TEXT,
+                status TEXT DEFAULT 'pending' CHECK (status IN ('pending', 'in_progress', 'completed', 'denied')),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                completed_at TIMESTAMP,
+                admin_notes TEXT
+            )"""
+    )
+    cursor.execute(
+        f"""CREATE TABLE IF NOT EXISTS event_reports (
+                {id_column},
+                event_id INTEGER NOT NULL,
+                event_title TEXT,
+                event_address TEXT,
+                event_date TEXT,
+                reason TEXT NOT NULL,
+                category TEXT NOT NULL,
+                description TEXT NOT NULL,
+                reporter_email TEXT NOT NULL,
+                reporter_name TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                status TEXT DEFAULT 'pending',
+                FOREIGN KEY(event_id) REFERENCES events(id) ON DELETE CASCADE
+            )"""
+    )
+    cursor.execute(
+        f"""CREATE TABLE IF NOT EXISTS password_resets (
+                {id_column},
+                email TEXT NOT NULL,
+                reset_code TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                expires_at TIMESTAMP NOT NULL
+            )"""
+    )
+
+
+def create_page_visit_rollups(cursor, is_postgres: bool) -> None:
+    """Hourly page visit rollups read by the admin page-visit analytics"""
+    cursor.execute(PAGE_VISIT_HOURLY_TABLE_SQL)
+    backfill_hourly_rollups(cursor, is_postgres)
+
+
+# (version, name, apply(cursor, is_postgres)); append only
+MIGRATIONS = [
+    (1, "core_tables", create_core_tables),
+    (2, "page_visit_hourly", create_page_visit_rollups),
+    # Daily event facts read by the /admin/analytics/* endpoints
+    (3, "event_daily_facts", ensure_event_facts),
+    # Local mirror of Stripe subscriptions, kept current by /stripe/webhook
+    (4, "stripe_subscriptions", lambda cursor, is_postgres: ensure_subscription_tables(cursor)),
+    # Outbound email queue drained by the background sender
+    (5, "email_outbox", ensure_email_outbox),
+    # Precomputed SEO artifacts served by /api/seo/events/{id} and /api/seo/validate/{id}
+    (6, "event_seo", ensure_event_seo),
+    # Typed event_date kept in step with date by triggers; slugs made unique for the index
+    (7, "event_date", add_event_date),
+    # start_ts / end_ts next to event_date, all three kept current by one set of triggers
+    (8, "event_timestamps", add_event_timestamps),
+    # Banner/logo bytes for the database media store (the production default)
+    (9, "media_blobs", ensure_media_blobs),
+    # GiST index on ll_to_earth(lat, lng) for the GEO_USE_EARTHDISTANCE radius search (PostgreSQL)
+    (10, "events_earth_index", ensure_earth_index),
+]
+
+# (name, checksum(cursor), apply(cursor, is_postgres)); re-applied when the checksum changes
+REPEATABLE = [
+    # Change version behind ETags on public event reads; the triggers list every events column
+    ("event_version_triggers", tracking_checksum, install_event_version_tracking),
+    # Unique slug and case-insensitive location indexes read by the SEO endpoints
+    ("event_indexes", index_checksum, install_event_indexes),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _timestamp() -> str:
+    return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def applied_versions(cursor) -> List[int]:
+    cursor.execute(SCHEMA_VERSION_TABLE_SQL)
+    cursor.execute("SELECT version FROM schema_version ORDER BY version")
+    return [row["version"] for row in cursor.fetchall()]
+
+
+def schema_stamp(cursor) -> str:
+    """Changes whenever a migration or a repeatable step is applied, by any worker"""
+    cursor.execute(
+        "SELECT (SELECT MAX(version) FROM schema_version) AS version, "
+        "(SELECT MAX(applied_at) FROM schema_checksums) AS checksummed"
+    )
+    row = cursor.fetchone()
+    return f"{row['version']}:{row['checksummed']}"
+
+
+def _stale_repeatables(cursor) -> list:
+    cursor.execute(SCHEMA_CHECKSUMS_TABLE_SQL)
+    cursor.execute("SELECT name, checksum FROM schema_checksums")
+    stored = {row["name"]: row["checksum"] for row in cursor.fetchall()}
+    stale = []
+    for name, checksum, apply in REPEATABLE:
+        try:
+            current = checksum(cursor)
+        except Exception:
+            # The table it depends on does not exist yet; a pending migration creates it
+            continue
+        if stored.get(name) != current:
+            stale.append((name, checksum, apply))
+    return stale
+
+
+def pending_migrations(cursor) -> list:
+    applied = set(applied_versions(cursor))
+    return [migration for migration in MIGRATIONS if migration[0] not in applied]
+
+
+def run_migrations(get_db: Callable, is_postgres: bool, apply: bool = True) -> List[str]:
+    """
+    Apply pending migrations and stale repeatable steps; returns the names applied. With
+    apply=False only reports what is pending. A current database costs one round of SELECTs.
+
+    get_db must hand out connections with transaction control (get_db_transaction in the
+    app): steps commit one at a time and some take table locks. Each step runs with the
+    pool's statement_timeout lifted, since backfills and index builds on a full-size table
+    outlast a request-sized limit. A failing step is rolled back and re-raised.
+    """
+    with get_db() as conn:
+        if is_postgres and getattr(conn, "autocommit", False) is True:
+            raise RuntimeError("run_migrations needs a connection with autocommit disabled")
+        cursor = conn.cursor()
+        pending = pending_migrations(cursor)
+        stale = _stale_repeatables(cursor)
+        conn.commit()
+        if not pending and not stale:
+            return []
+        if not apply:
+            return [name for _, name, _ in pending] + [name for name, _, _ in stale]
+
+        if is_postgres:
+            cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+        try:
+            placeholder = "%s" if is_postgres else "?"
+            applied = []
+            # Another worker may have migrated while we waited for the lock
+            for version, name, step in pending_migrations(cursor):
+                started = datetime.utcnow()
+                try:
+                    lift_statement_timeout(cursor, is_postgres)
+                    step(cursor, is_postgres)
+                    cursor.execute(
+                        f"INSERT INTO schema_version (version, name, applied_at) "
+                        f"VALUES ({placeholder}, {placeholder}, {placeholder})",
+                        (version, name, _timestamp()),
+                    )
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    logger.error(f"❌ Migration {version} ({name}) failed")
+                    raise
+                elapsed = (datetime.utcnow() - started).total_seconds()
+                logger.info(f"✅ Applied migration {version} ({name}) in {elapsed:.2f}s")
+                applied.append(name)
+
+            for name, checksum, step in _stale_repeatables(cursor):
+                try:
+                    lift_statement_timeout(cursor, is_postgres)
+                    step(cursor, is_postgres)
+                    cursor.execute(
+                        f"""
+                        INSERT INTO schema_checksums (name, checksum, applied_at)
+                        VALUES ({placeholder}, {placeholder}, {placeholder})
+                        ON CONFLICT (name) DO UPDATE
+                        SET checksum = excluded.checksum, applied_at = excluded.applied_at
+                        """,
+                        (name, checksum(cursor), _timestamp()),
+                    )
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    logger.error(f"❌ Repeatable step {name} failed")
+                    raise
+                logger.info(f"✅ Re-applied {name}")
+                applied.append(name)
+            return applied
+        finally:
+            if is_postgres:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+                conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply or inspect schema migrations")
+    parser.add_argument("--status", action="store_true", help="list applied and pending steps only")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from shared_utils import DB_URL, IS_PRODUCTION, get_db
+
+    is_postgres = bool(IS_PRODUCTION and DB_URL)
+    if args.status:
+        with get_db() as conn:
+            cursor = conn.cursor()
+            applied = applied_versions(cursor)
+            conn.commit()
+        print(f"Database: {'PostgreSQL' if is_postgres else 'SQLite'}")
+        print(f"Applied versions: {applied or 'none'} (latest is {LATEST_VERSION})")
+        pending = run_migrations(get_db, is_postgres, apply=False)
+        print(f"Pending: {', '.join(pending) if pending else 'nothing'}")
+        return
+
+    applied = run_migrations(get_db, is_postgres)
+    print(f"Applied: {', '.join(applied)}" if applied else "Schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,6 @@ Contains database connection helpers, authentication utilities, and other shared
 """
 
 import os
-import sqlite3
 import logging
 import json
 from contextlib import contextmanager
@@ -18,6 +17,8 @@ from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 from dotenv import load_dotenv
 
+from db_pool import pooled_connection
+
 # Load environment variables
 load_dotenv()
 
@@ -43,38 +44,15 @@ DB_FILE = os.path.join(os.path.dirname(__file__), "events.db")
 
 @contextmanager
 def get_db():
-    """Database connection context manager"""
+    """Database connection context manager (backed by the shared db_pool connections)"""
     if IS_PRODUCTION and DB_URL:
-        # Production with PostgreSQL
-        import psycopg2
-        from psycopg2.extras import RealDictCursor
-        
-        try:
-            conn = psycopg2.connect(
-                DB_URL,
-                cursor_factory=RealDictCursor,
-                connect_timeout=8,
-                keepalives=1,
-                keepalives_idle=30,
-                keepalives_interval=5,
-                keepalives_count=3,
-                application_name='todoevents'
-            )
+        # Production with PostgreSQL - transactions are managed by the caller
+        with pooled_connection(db_url=DB_URL, autocommit=False) as conn:
             yield conn
-        finally:
-            if conn:
-                conn.close()
     else:
         # Local development with SQLite
-        conn = sqlite3.connect(DB_FILE, timeout=10)
-        conn.row_factory = sqlite3.Row
-        conn.execute('PRAGMA journal_mode=WAL')
-        conn.execute('PRAGMA synchronous=NORMAL')
-        conn.execute('PRAGMA cache_size=10000')
-        try:
+        with pooled_connection(db_file=DB_FILE) as conn:
             yield conn
-        finally:
-            conn.close()
 
 
 def get_placeholder():
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Sitemap Store
+Sharded sitemap files behind a sitemap index, rebuilt incrementally and kept on disk.
+
+Upcoming events are split by month of their date into shards named events-YYYY-MM.xml. A
+month with more than SITEMAP_MAX_URLS URLs continues in events-YYYY-MM-2.xml, -3, ...
+pages.xml holds the static pages. /sitemap.xml is the index over whatever shard files exist.
+
+Event writes call mark_dates() with the dates they touched, and a background thread
+rebuilds only those months every SITEMAP_FLUSH_SECONDS, one query per month. On the first
+build of a new day it also rebuilds the current month (days that have passed drop out) and
+deletes shards for past months. Archive cleanup and other bulk changes call mark_all(),
+which rebuilds every month that has upcoming events.
+
+Shards are written atomically under SITEMAP_DIR, and a file is only rewritten when its
+content changes. Every worker serves the same files, and a new worker can serve them at
+once. Reads are cached per file by (mtime, size) and answered with a content ETag.
+"""
+
+import os
+import re
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from xml.sax.saxutils import escape
+
+from background_flusher import BackgroundFlusher
+from seo_utils import slugify
+
+logger = logging.getLogger(__name__)
+
+SITEMAP_DIR = os.getenv("SITEMAP_DIR", os.path.join("uploads", "sitemaps"))
+SITEMAP_BASE_URL = os.getenv("SITEMAP_BASE_URL", "https://todo-events.com").rstrip("/")
+SITEMAP_FLUSH_SECONDS = float(os.getenv("SITEMAP_FLUSH_SECONDS", 30))
+# The sitemaps.org limit per file
+SITEMAP_MAX_URLS = int(os.getenv("SITEMAP_MAX_URLS", 50000))
+
+SITEMAP_XMLNS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+STATIC_PAGES = (
+    ("/", "daily", "1.0"),
+    ("/hosts", "weekly", "0.8"),
+    ("/creators", "weekly", "0.8"),
+)
+
+_SHARD_PATTERN = re.compile(r"^(?:pages|events-(\d{4}-\d{2})(?:-(\d+))?)\.xml$")
+_DATE_PATTERN = re.compile(r"^(\d{4}-\d{2})-\d{2}")
+
+# Columns read per event; older databases may lack some of them
+EVENT_COLUMNS = ("id", "title", "slug", "city", "state", "updated_at", "created_at", "date")
+
+
+def month_bucket(value) -> Optional[str]:
+    """'YYYY-MM' for a date / datetime / ISO string, None if it is not one"""
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m")
+    match = _DATE_PATTERN.match(str(value or ""))
+    return match.group(1) if match else None
+
+
+def _next_month(bucket: str) -> str:
+    year, month = int(bucket[:4]), int(bucket[5:7])
+    return f"{year + month // 12:04d}-{month % 12 + 1:02d}"
+
+
+def _url(loc: str, lastmod: str, changefreq: str, priority: str) -> str:
+    return (
+        f"  <url>\n    <loc>{escape(loc)}</loc>\n    <lastmod>{lastmod}</lastmod>\n"
+        f"    <changefreq>{changefreq}</changefreq>\n    <priority>{priority}</priority>\n  </url>"
+    )
+
+
+def _urlset(urls: List[str]) -> bytes:
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_XMLNS}">\n'
+        + "\n".join(urls)
+        + "\n</urlset>\n"
+    ).encode("utf-8")
+
+
+def _lastmod(event: dict, today: str) -> str:
+    for field in ("updated_at", "created_at"):
+        value = event.get(field)
+        if value:
+            try:
+                return datetime.fromisoformat(str(value).replace("Z", "+00:00")).strftime("%Y-%m-%d")
+            except ValueError:
+                continue
+    return today
+
+
+def event_urls(event: dict, base_url: str, today: str) -> List[str]:
+    """The /e/, geographic and /events/ URLs for one event"""
+    slug = event.get("slug") or f"{slugify(event.get('title') or 'event')}-{event.get('id', '')}"
+    lastmod = _lastmod(event, today)
+    urls = [_url(f"{base_url}/e/{slug}", lastmod, "monthly", "0.8")]
+    if event.get("city") and event.get("state"):
+        urls.append(_url(
+            f"{base_url}/us/{slugify(event['state'].lower())}/{slugify(event['city'])}/events/{slug}",
+            lastmod, "monthly", "0.9",
+        ))
+    urls.append(_url(f"{base_url}/events/{slug}", lastmod, "monthly", "0.85"))
+    return urls
+
+
+def _shard_order(name: str) -> tuple:
+    match = _SHARD_PATTERN.match(name)
+    return (match.group(1) or "", int(match.group(2) or 1))
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest()[:24] + '"'
+
+
+class SitemapStore(BackgroundFlusher):
+    """Builds, persists and serves the sitemap shards"""
+
+    thread_name = "sitemap-build"
+
+    def __init__(self, get_db: Callable, get_placeholder: Callable[[], str],
+                 root: str = SITEMAP_DIR, base_url: str = SITEMAP_BASE_URL,
+                 flush_interval: float = SITEMAP_FLUSH_SECONDS,
+                 max_urls: int = SITEMAP_MAX_URLS):
+        super().__init__(flush_interval)
+        self.get_db = get_db
+        self.get_placeholder = get_placeholder
+        self.root = root
+        self.base_url = base_url
+        self.max_urls = max_urls
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._dirty: Set[str] = set()
+        self._rebuild_all = False
+        self._rolled_for: Optional[str] = None
+        self._files: Dict[str, Tuple[Tuple[int, int], bytes, str, datetime]] = {}
+        self._index: Optional[Tuple[tuple, bytes, str, datetime]] = None
+        self._stats = {"builds": 0, "shards_written": 0, "shards_unchanged": 0, "shards_removed": 0}
+
+    # -- write side -------------------------------------------------------------------
+
+    def mark_dates(self, *dates) -> None:
+        """Schedule the months of the given event dates for a rebuild"""
+        buckets = {month_bucket(value) for value in dates} - {None}
+        if buckets:
+            with self._lock:
+                self._dirty.update(buckets)
+
+    def mark_all(self) -> None:
+        with self._lock:
+            self._rebuild_all = True
+
+    def start(self) -> None:
+        # A fresh disk (first deploy, new volume) gets a full build right away
+        if not self.shard_names():
+            self.mark_all()
+            self.wake()
+        super().start()
+
+    def flush(self) -> int:
+        """Rebuild the months marked since the last flush; returns the number of shards written"""
+        with self._flush_lock:
+            today = datetime.now(timezone.utc).date().isoformat()
+            current = today[:7]
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+                rebuild_all, self._rebuild_all = self._rebuild_all, False
+                rolled = self._rolled_for == today
+            if not dirty and not rebuild_all and rolled:
+                return 0
+
+            try:
+                written = 0
+                with self.get_db() as conn:
+                    cursor = conn.cursor()
+                    if rebuild_all:
+                        dirty |= self._upcoming_buckets(cursor, today) | self._shard_buckets()
+                    if not rolled:
+                        dirty.add(current)
+                    for bucket in sorted(dirty):
+                        if bucket >= current:
+                            written += self._build_bucket(cursor, bucket, today)
+                written += self._write_file("pages.xml", self._pages(today))
+                self._remove_past(current)
+                if written:
+                    logger.info(f"🗺️ Sitemap rebuilt for {len(dirty)} months, {written} files changed")
+            except Exception as e:
+                # Keep serving the current files and retry the same months next time
+                logger.error(f"❌ Sitemap build failed: {e}")
+                with self._lock:
+                    self._dirty |= dirty
+                    self._rebuild_all = self._rebuild_all or rebuild_all
+                return 0
+
+            with self._lock:
+                self._rolled_for = today
+                self._stats["builds"] += 1
+            return written
+
+    def _columns(self, cursor) -> List[str]:
+        cursor.execute("SELECT * FROM events LIMIT 0")
+        available = {column[0] for column in cursor.description}
+        return [column for column in EVENT_COLUMNS if column in available]
+
+    def _upcoming_buckets(self, cursor, today: str) -> Set[str]:
+        placeholder = self.get_placeholder()
+        cursor.execute(
+            f"SELECT DISTINCT event_date FROM events WHERE event_date >= {placeholder}", (today,)
+        )
+        return {month_bucket(row["event_date"]) for row in cursor.fetchall()} - {None}
+
+    def _build_bucket(self, cursor, bucket: str, today: str) -> int:
+        placeholder = self.get_placeholder()
+        start = max(today, f"{bucket}-01")
+        cursor.execute(
+            f"SELECT {', '.join(self._columns(cursor))} FROM events "
+            f"WHERE event_date >= {placeholder} AND event_date < {placeholder} ORDER BY event_date, id",
+            (start, f"{_next_month(bucket)}-01"),
+        )
+        urls: List[str] = []
+        for row in cursor.fetchall():
+            urls.extend(event_urls(dict(row), self.base_url, today))
+
+        parts = [urls[i:i + self.max_urls] for i in range(0, len(urls), self.max_urls)]
+        written = 0
+        for number, part in enumerate(parts, 1):
+            name = f"events-{bucket}.xml" if number == 1 else f"events-{bucket}-{number}.xml"
+            written += self._write_file(name, _urlset(part))
+        # Drop parts (or the whole month) that are no longer needed
+        for name in self.shard_names():
+            match = _SHARD_PATTERN.match(name)
+            if match.group(1) == bucket and int(match.group(2) or 1) > len(parts):
+                self._remove_file(name)
+        return written
+
+    def _pages(self, today: str) -> bytes:
+        return _urlset([
+            _url(f"{self.base_url}{path}", today, changefreq, priority)
+            for path, changefreq, priority in STATIC_PAGES
+        ])
+
+    def _remove_past(self, current: str) -> None:
+        for name in self.shard_names():
+            bucket = _SHARD_PATTERN.match(name).group(1)
+            if bucket and bucket < current:
+                self._remove_file(name)
+
+    def _write_file(self, name: str, body: bytes) -> int:
+        path = os.path.join(self.root, name)
+        try:
+            with open(path, "rb") as existing:
+                if existing.read() == body:
+                    # Unchanged content keeps its mtime, so lastmod and the ETag stay put
+                    self._stats["shards_unchanged"] += 1
+                    return 0
+        except FileNotFoundError:
+            pass
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(body)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._stats["shards_written"] += 1
+        return 1
+
+    def _remove_file(self, name: str) -> None:
+        try:
+            os.remove(os.path.join(self.root, name))
+            self._stats["shards_removed"] += 1
+        except FileNotFoundError:
+            pass
+
+    def _shard_buckets(self) -> Set[str]:
+        return {_SHARD_PATTERN.match(name).group(1) for name in self.shard_names()} - {None}
+
+    # -- read side ----------------------------------------------------------------------
+
+    def shard_names(self) -> List[str]:
+        try:
+            names = [name for name in os.listdir(self.root) if _SHARD_PATTERN.match(name)]
+        except FileNotFoundError:
+            return []
+        # pages.xml first, then months and their parts in order
+        return sorted(names, key=_shard_order)
+
+    def read_shard(self, name: str) -> Optional[Tuple[bytes, str, datetime]]:
+        """(body, ETag, last modified) for a shard file, or None if there is no such shard"""
+        if not _SHARD_PATTERN.match(name):
+            return None
+        path = os.path.join(self.root, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._files.pop(name, None)
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._files.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1:]
+        try:
+            with open(path, "rb") as handle:
+                body = handle.read()
+        except FileNotFoundError:
+            return None
+        modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+        self._files[name] = (key, body, make_etag(body), modified)
+        return body, make_etag(body), modified
+
+    def read_index(self) -> Optional[Tuple[bytes, str, datetime]]:
+        """The sitemap index over the current shard files, or None before the first build"""
+        entries = []
+        for name in self.shard_names():
+            try:
+                entries.append((name, os.stat(os.path.join(self.root, name)).st_mtime))
+            except FileNotFoundError:
+                continue
+        if not entries:
+            return None
+        signature = tuple(entries)
+        cached = self._index
+        if cached is not None and cached[0] == signature:
+            return cached[1:]
+
+        lines = [f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_XMLNS}">']
+        for name, mtime in entries:
+            lastmod = datetime.fromtimestamp(mtime, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+00:00")
+            lines.append(
+                f"  <sitemap>\n    <loc>{escape(self.base_url)}/sitemaps/{name}</loc>\n"
+                f"    <lastmod>{lastmod}</lastmod>\n  </sitemap>"
+            )
+        lines.append("</sitemapindex>\n")
+        body = "\n".join(lines).encode("utf-8")
+        modified = datetime.fromtimestamp(max(mtime for _, mtime in entries), tz=timezone.utc)
+        self._index = (signature, body, make_etag(body), modified)
+        return body, make_etag(body), modified
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = sorted(self._dirty)
+            rebuild_all = self._rebuild_all
+        names = self.shard_names()
+        return {
+            "shards": len(names),
+            "pending_months": pending,
+            "rebuild_all_pending": rebuild_all,
+            "built_for": self._rolled_for,
+            "running": self.running,
+            "directory": self.root,
+            **self._stats,
+        }
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Stripe Subscriptions
+Local mirror of Stripe subscription state, and a non-blocking wrapper for live Stripe calls.
+
+The subscriptions table holds one row per Stripe subscription and stripe_customers maps
+users to Stripe customers. The /stripe/webhook handlers keep both current (subscription
+created/updated/paused/resumed/deleted, invoice created/upcoming/paid), so dashboard reads
+are a local query instead of several serial Stripe round trips:
+
+    known, customer_id, subscriptions = load_user_subscriptions(cursor, placeholder, user_id)
+
+A user the mirror has never seen (e.g. subscribed before the table existed) is pulled from
+Stripe once by refresh_user_subscriptions(); after that the webhooks keep them current.
+Webhooks can arrive out of order, so every write carries the Stripe event time and an
+older event never overwrites a newer row.
+
+Stripe SDK calls are blocking HTTP requests. stripe_call() runs them on a small dedicated
+executor with a timeout (raising stripe.error.APIConnectionError, so existing
+`except stripe.error.StripeError` handling still applies):
+
+    customers = await stripe_call(stripe.Customer.list, email=email, limit=1)
+
+Point STRIPE_API_BASE at stripe-mock (http://localhost:12111) to exercise all of this
+without a Stripe account.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import stripe
+
+from db_async import run_db
+
+logger = logging.getLogger(__name__)
+
+STRIPE_CALL_TIMEOUT = float(os.getenv("STRIPE_CALL_TIMEOUT", 10))  # Seconds, including queue time
+STRIPE_EXECUTOR_WORKERS = int(os.getenv("STRIPE_EXECUTOR_WORKERS", 4))
+
+SUBSCRIPTIONS_TABLE_SQL = """CREATE TABLE IF NOT EXISTS subscriptions (
+                            id TEXT PRIMARY KEY,
+                            user_id INTEGER,
+                            customer_id TEXT,
+                            status TEXT NOT NULL,
+                            pricing_tier TEXT,
+                            price_id TEXT,
+                            amount INTEGER NOT NULL DEFAULT 0,
+                            currency TEXT NOT NULL DEFAULT 'usd',
+                            cancel_at_period_end BOOLEAN NOT NULL DEFAULT FALSE,
+                            current_period_start TEXT,
+                            current_period_end TEXT,
+                            canceled_at TEXT,
+                            next_billing_at TEXT,
+                            next_amount INTEGER,
+                            latest_invoice_id TEXT,
+                            stripe_event_at BIGINT NOT NULL DEFAULT 0,
+                            synced_at TEXT NOT NULL
+                        )"""
+
+STRIPE_CUSTOMERS_TABLE_SQL = """CREATE TABLE IF NOT EXISTS stripe_customers (
+                            user_id INTEGER PRIMARY KEY,
+                            customer_id TEXT,
+                            synced_at TEXT NOT NULL
+                        )"""
+
+# Statuses that still grant (or are about to grant) premium access
+ACTIVE_STATUSES = ("active", "trialing", "past_due")
+
+_SUBSCRIPTION_COLUMNS = (
+    "id", "user_id", "customer_id", "status", "pricing_tier", "price_id", "amount", "currency",
+    "cancel_at_period_end", "current_period_start", "current_period_end", "canceled_at",
+    "stripe_event_at", "synced_at",
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def ensure_subscription_tables(cursor) -> None:
+    cursor.execute(SUBSCRIPTIONS_TABLE_SQL)
+    cursor.execute(STRIPE_CUSTOMERS_TABLE_SQL)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_subscriptions_user ON subscriptions(user_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_subscriptions_customer ON subscriptions(customer_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_stripe_customers_customer ON stripe_customers(customer_id)")
+
+
+def get_stripe_executor() -> ThreadPoolExecutor:
+    """Threads for Stripe HTTP calls, kept apart from the database executor"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=STRIPE_EXECUTOR_WORKERS, thread_name_prefix="stripe-worker"
+                )
+    return _executor
+
+
+async def stripe_call(func, *args, timeout: float = STRIPE_CALL_TIMEOUT, **kwargs):
+    """Run a blocking Stripe SDK call off the event loop; APIConnectionError on timeout"""
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(get_stripe_executor(), functools.partial(func, *args, **kwargs)),
+            timeout,
+        )
+    except asyncio.TimeoutError:
+        name = getattr(func, "__qualname__", getattr(func, "__name__", str(func)))
+        logger.warning(f"Stripe call {name} exceeded timeout of {timeout}s")
+        raise stripe.error.APIConnectionError(f"Stripe request timed out after {timeout}s")
+
+
+def to_plain(obj: Any) -> Any:
+    """Stripe objects as plain dicts (newer SDKs no longer make them dict subclasses)"""
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    for method in ("to_dict_recursive", "to_dict"):
+        if hasattr(type(obj), method):
+            try:
+                return to_plain(getattr(obj, method)())
+            except TypeError:
+                continue
+    if isinstance(obj, dict):
+        return {key: to_plain(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_plain(value) for value in obj]
+    return obj
+
+
+def _iso(timestamp) -> Optional[str]:
+    # Same local-time ISO strings the status endpoints have always returned
+    if not timestamp:
+        return None
+    try:
+        return datetime.fromtimestamp(int(timestamp)).isoformat()
+    except (ValueError, TypeError, OSError):
+        return None
+
+
+def _now() -> str:
+    return datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def subscription_row(subscription, user_id: Optional[int] = None, event_at: Optional[int] = None) -> Dict:
+    """Mirror row for a Stripe subscription object (or webhook payload)"""
+    sub = to_plain(subscription) or {}
+    metadata = sub.get("metadata") or {}
+    items = (sub.get("items") or {}).get("data") or []
+    item = items[0] if items else {}
+    price = item.get("price") or {}
+    plan = sub.get("plan") or {}
+
+    if user_id is None and str(metadata.get("user_id", "")).isdigit():
+        user_id = int(metadata["user_id"])
+
+    # Newer API versions moved the billing period from the subscription to its items
+    period_start = sub.get("current_period_start") or item.get("current_period_start") or sub.get("start_date")
+    period_end = sub.get("current_period_end") or item.get("current_period_end")
+
+    return {
+        "id": sub.get("id"),
+        "user_id": user_id,
+        "customer_id": sub.get("customer") if isinstance(sub.get("customer"), str)
+        else (sub.get("customer") or {}).get("id"),
+        "status": sub.get("status") or "unknown",
+        "pricing_tier": metadata.get("pricing_tier"),
+        "price_id": price.get("id") or plan.get("id"),
+        "amount": price.get("unit_amount") or plan.get("amount") or 0,
+        "currency": price.get("currency") or plan.get("currency") or "usd",
+        "cancel_at_period_end": bool(sub.get("cancel_at_period_end")),
+        "current_period_start": _iso(period_start),
+        "current_period_end": _iso(period_end),
+        "canceled_at": _iso(sub.get("canceled_at")),
+        # Snapshots read straight from the API are newer than any event already applied
+        "stripe_event_at": int(event_at if event_at is not None else time.time()),
+        "synced_at": _now(),
+    }
+
+
+def _user_for_customer(cursor, placeholder: str, customer_id: Optional[str]) -> Optional[int]:
+    if not customer_id:
+        return None
+    cursor.execute(
+        f"SELECT user_id FROM stripe_customers WHERE customer_id = {placeholder} LIMIT 1",
+        (customer_id,),
+    )
+    row = cursor.fetchone()
+    return row["user_id"] if row else None
+
+
+def user_for_customer(cursor, placeholder: str, customer_id: Optional[str]) -> Optional[Tuple[int, str]]:
+    """(user id, email) for a Stripe customer, if the mirror knows it"""
+    user_id = _user_for_customer(cursor, placeholder, customer_id)
+    if user_id is None:
+        return None
+    cursor.execute(f"SELECT id, email FROM users WHERE id = {placeholder}", (user_id,))
+    row = cursor.fetchone()
+    return (row["id"], row["email"]) if row else None
+
+
+def record_customer(cursor, placeholder: str, user_id: int, customer_id: Optional[str]) -> None:
+    """Remember a user's Stripe customer; customer_id None records 'no customer in Stripe'"""
+    cursor.execute(
+        f"""
+        INSERT INTO stripe_customers (user_id, customer_id, synced_at)
+        VALUES ({placeholder}, {placeholder}, {placeholder})
+        ON CONFLICT (user_id) DO UPDATE SET
+            customer_id = COALESCE(excluded.customer_id, stripe_customers.customer_id),
+            synced_at = excluded.synced_at
+        """,
+        (user_id, customer_id, _now()),
+    )
+
+
+def upsert_subscription(cursor, placeholder: str, row: Dict) -> Optional[int]:
+    """
+    Insert or update a mirror row unless the stored one came from a newer event.
+    A row without a user inherits it from the stored row or the customer mapping.
+    Returns the user id the subscription belongs to, if known.
+    """
+    if not row.get("id"):
+        return None
+    if row.get("user_id") is None:
+        row = dict(row, user_id=_user_for_customer(cursor, placeholder, row.get("customer_id")))
+
+    columns = ", ".join(_SUBSCRIPTION_COLUMNS)
+    values = ", ".join([placeholder] * len(_SUBSCRIPTION_COLUMNS))
+    updates = ", ".join(
+        f"{column} = excluded.{column}"
+        for column in _SUBSCRIPTION_COLUMNS
+        if column not in ("id", "user_id", "pricing_tier")
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO subscriptions ({columns}) VALUES ({values})
+        ON CONFLICT (id) DO UPDATE SET
+            {updates},
+            user_id = COALESCE(excluded.user_id, subscriptions.user_id),
+            pricing_tier = COALESCE(excluded.pricing_tier, subscriptions.pricing_tier)
+        WHERE excluded.stripe_event_at >= subscriptions.stripe_event_at
+        """,
+        tuple(row[column] for column in _SUBSCRIPTION_COLUMNS),
+    )
+
+    cursor.execute(f"SELECT user_id FROM subscriptions WHERE id = {placeholder}", (row["id"],))
+    stored = cursor.fetchone()
+    user_id = stored["user_id"] if stored else row.get("user_id")
+    if user_id is not None and row.get("customer_id"):
+        record_customer(cursor, placeholder, user_id, row["customer_id"])
+    return user_id
+
+
+def apply_invoice(cursor, placeholder: str, invoice, upcoming: bool = False) -> None:
+    """Fold an invoice webhook into its subscription row (next charge, latest invoice)"""
+    invoice = to_plain(invoice) or {}
+    subscription_id = invoice.get("subscription")
+    if isinstance(subscription_id, dict):
+        subscription_id = subscription_id.get("id")
+    if not subscription_id:
+        return
+    if upcoming:
+        next_at = invoice.get("next_payment_attempt") or invoice.get("period_end")
+        cursor.execute(
+            f"""
+            UPDATE subscriptions SET next_billing_at = {placeholder}, next_amount = {placeholder},
+                   synced_at = {placeholder}
+            WHERE id = {placeholder}
+            """,
+            (_iso(next_at), invoice.get("amount_due"), _now(), subscription_id),
+        )
+    else:
+        cursor.execute(
+            f"UPDATE subscriptions SET latest_invoice_id = {placeholder}, synced_at = {placeholder} "
+            f"WHERE id = {placeholder}",
+            (invoice.get("id"), _now(), subscription_id),
+        )
+
+
+def _status_dict(row) -> Dict:
+    row = dict(row)
+    row["cancel_at_period_end"] = bool(row.get("cancel_at_period_end"))
+    # Without an upcoming-invoice webhook yet, a live subscription renews at its period end
+    if not row.get("next_billing_at") and row["status"] in ACTIVE_STATUSES and not row["cancel_at_period_end"]:
+        row["next_billing_at"] = row.get("current_period_end")
+    return row
+
+
+def load_user_subscriptions(cursor, placeholder: str, user_id: int) -> Tuple[bool, Optional[str], List[Dict]]:
+    """
+    (known, customer_id, subscriptions newest first) for a user. known is False when
+    the mirror has never synced this user, i.e. a live refresh is needed once.
+    """
+    cursor.execute(
+        f"SELECT customer_id FROM stripe_customers WHERE user_id = {placeholder}", (user_id,)
+    )
+    customer = cursor.fetchone()
+    cursor.execute(
+        f"""
+        SELECT * FROM subscriptions WHERE user_id = {placeholder}
+        ORDER BY current_period_start DESC, id
+        LIMIT 10
+        """,
+        (user_id,),
+    )
+    subscriptions = [_status_dict(row) for row in cursor.fetchall()]
+    customer_id = customer["customer_id"] if customer else None
+    if customer_id is None and subscriptions:
+        customer_id = subscriptions[0]["customer_id"]
+    return customer is not None or bool(subscriptions), customer_id, subscriptions
+
+
+def active_subscriptions(subscriptions: List[Dict]) -> List[Dict]:
+    return [sub for sub in subscriptions if sub["status"] in ACTIVE_STATUSES]
+
+
+async def refresh_user_subscriptions(get_db, placeholder: str, user_id: int, email: str) -> None:
+    """Pull a user's customer and subscriptions from Stripe into the mirror"""
+    customers = await stripe_call(stripe.Customer.list, email=email, limit=1)
+    customer_id = customers.data[0].id if customers.data else None
+    rows = []
+    if customer_id:
+        subscriptions = await stripe_call(
+            stripe.Subscription.list, customer=customer_id, status="all", limit=10
+        )
+        rows = [subscription_row(sub, user_id=user_id) for sub in subscriptions.data]
+
+    def store():
+        with get_db() as conn:
+            cursor = conn.cursor()
+            record_customer(cursor, placeholder, user_id, customer_id)
+            for row in rows:
+                upsert_subscription(cursor, placeholder, row)
+            conn.commit()
+
+    await run_db(store)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test script for the daily event fact rollups behind the admin analytics
+Runs against a temporary SQLite database.
+"""
+
+import os
+import sys
+import sqlite3
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import analytics_rollups
+from analytics_rollups import (
+    adjust_event_facts,
+    ensure_event_facts,
+    rebuild_event_facts,
+    remove_host_facts,
+)
+
+
+def make_db():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("""CREATE TABLE events (
+                        id INTEGER PRIMARY KEY,
+                        date TEXT,
+                        category TEXT,
+                        secondary_category TEXT,
+                        created_by INTEGER,
+                        state TEXT,
+                        city TEXT,
+                        interest_count INTEGER DEFAULT 0,
+                        view_count INTEGER DEFAULT 0
+                    )""")
+    conn.executemany(
+        "INSERT INTO events (id, date, category, created_by, state, city, view_count) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (1, "2025-03-01", "music", 1, "TX", "Austin", 4),
+            (2, "2025-03-01", "music", 1, "TX", "Austin", 2),
+            (3, "2025-03-02", "arts", 2, None, None, 0),
+        ],
+    )
+    return conn
+
+
+def facts(conn):
+    return sorted(tuple(row) for row in conn.execute("SELECT * FROM event_daily_facts").fetchall())
+
+
+def test_ensure_builds_facts_once():
+    """Existing events are rolled up when the table is created, and only then"""
+    conn = make_db()
+    ensure_event_facts(conn.cursor(), is_postgres=False)
+    assert facts(conn) == [
+        ("2025-03-01", "music", "", 1, "TX", "Austin", 2, 0, 6),
+        ("2025-03-02", "arts", "", 2, "", "", 1, 0, 0),
+    ]
+    conn.execute("DELETE FROM events WHERE id = 3")
+    ensure_event_facts(conn.cursor(), is_postgres=False)
+    assert len(facts(conn)) == 2
+    return True
+
+
+def test_incremental_adjustments_match_rebuild():
+    """Insert, update and delete adjustments leave the same facts as a full rebuild"""
+    conn = make_db()
+    ensure_event_facts(conn.cursor(), is_postgres=False)
+    cursor = conn.cursor()
+
+    cursor.execute("INSERT INTO events (id, date, category, created_by) VALUES (4, '2025-03-02', 'arts', 2)")
+    adjust_event_facts(cursor, "?", [4], 1)
+
+    adjust_event_facts(cursor, "?", [1], -1)
+    cursor.execute("UPDATE events SET date = '2025-03-05', category = 'food' WHERE id = 1")
+    adjust_event_facts(cursor, "?", [1], 1)
+
+    adjust_event_facts(cursor, "?", [3], -1)
+    cursor.execute("DELETE FROM events WHERE id = 3")
+
+    incremental = facts(conn)
+    rebuild_event_facts(cursor, is_postgres=False)
+    assert incremental == facts(conn)
+    assert all(row[6] > 0 for row in incremental)
+    return True
+
+
+def test_missing_columns_and_host_removal():
+    """Key columns absent from events count as '' and a deleted host loses all facts"""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, date TEXT, category TEXT, created_by INTEGER, "
+                 "interest_count INTEGER DEFAULT 0, view_count INTEGER DEFAULT 0)")
+    conn.execute("INSERT INTO events (id, date, category, created_by) VALUES (1, '2025-03-01', 'music', 9)")
+    ensure_event_facts(conn.cursor(), is_postgres=False)
+    assert facts(conn) == [("2025-03-01", "music", "", 9, "", "", 1, 0, 0)]
+    # PostgreSQL rejects constants in GROUP BY, so missing columns must stay out of it
+    _, group_sql = analytics_rollups._fact_key_sql(conn.cursor())
+    assert group_sql == "COALESCE(date, ''), COALESCE(category, ''), COALESCE(created_by, 0)"
+
+    remove_host_facts(conn.cursor(), "?", 9)
+    assert facts(conn) == []
+    return True
+
+
+def test_columns_added_later_join_the_key():
+    """city/state added after the first build (migration 7 after 3) are keyed at once"""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, date TEXT, category TEXT, created_by INTEGER, "
+                 "interest_count INTEGER DEFAULT 0, view_count INTEGER DEFAULT 0)")
+    ensure_event_facts(conn.cursor(), is_postgres=False)
+    conn.execute("ALTER TABLE events ADD COLUMN state TEXT")
+    conn.execute("ALTER TABLE events ADD COLUMN city TEXT")
+    conn.execute("INSERT INTO events (id, date, category, created_by, state, city) "
+                 "VALUES (1, '2025-03-01', 'music', 9, 'TX', 'Austin')")
+    adjust_event_facts(conn.cursor(), "?", [1], 1)
+    assert facts(conn) == [("2025-03-01", "music", "", 9, "TX", "Austin", 1, 0, 0)]
+
+    class SchemaCache:
+        """Stands in for backend.py's cache, which serves columns until it is refreshed"""
+        def __init__(self, columns):
+            self.columns = frozenset(columns)
+
+        def column_set(self, cursor, table):
+            return self.columns
+
+    analytics_rollups.use_schema_cache(SchemaCache(["date", "category", "created_by"]))
+    try:
+        _, group_sql = analytics_rollups._fact_key_sql(conn.cursor())
+    finally:
+        analytics_rollups.use_schema_cache(None)
+    assert group_sql == "COALESCE(date, ''), COALESCE(category, ''), COALESCE(created_by, 0)"
+    return True
+
+
+def main():
+    """Run all analytics rollup tests"""
+    print("🚀 Starting Analytics Rollup Tests...")
+    tests = [
+        test_ensure_builds_facts_once,
+        test_incremental_adjustments_match_rebuild,
+        test_missing_columns_and_host_removal,
+        test_columns_added_later_join_the_key,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
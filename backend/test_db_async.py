@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script for the database executor behind async handlers
+The handler tests import the app and replace its run_db, so no database is touched.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import contextvars
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import HTTPException
+
+import db_async
+from db_async import DBQueryTimeoutError, offload_db, run_db
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+def test_run_db_returns_result_with_caller_context():
+    """Work runs on a db-worker thread and sees the caller's contextvars"""
+    def work(value):
+        return value * 2, request_id.get(), threading.current_thread().name
+
+    async def call():
+        request_id.set("req-1")
+        return await run_db(work, 21)
+
+    value, seen_request_id, thread_name = asyncio.run(call())
+    assert value == 42 and seen_request_id == "req-1"
+    assert thread_name.startswith("db-worker")
+    return True
+
+
+def test_slow_work_raises_timeout():
+    """Work running past its timeout raises DBQueryTimeoutError and is counted"""
+    timeouts = db_async.executor_stats()["timeouts"]
+
+    @offload_db(timeout=0.05)
+    def slow():
+        time.sleep(0.3)
+
+    try:
+        asyncio.run(slow())
+        raise AssertionError("slow() should have timed out")
+    except DBQueryTimeoutError:
+        pass
+    assert db_async.executor_stats()["timeouts"] == timeouts + 1
+    return True
+
+
+def _with_timed_out_db(handler, *args, **kwargs):
+    """Call an async handler with backend.run_db timing out; returns the HTTPException"""
+    import backend
+
+    async def timed_out(func, *call_args, **call_kwargs):
+        raise DBQueryTimeoutError("Database query timeout after 0.0s")
+
+    original = backend.run_db
+    backend.run_db = timed_out
+    try:
+        asyncio.run(handler(*args, **kwargs))
+    except HTTPException as e:
+        return e
+    finally:
+        backend.run_db = original
+    raise AssertionError(f"{handler.__name__} did not raise HTTPException")
+
+
+def test_local_events_timeout_maps_to_504():
+    """GET /api/v1/local-events answers 504 when its query times out"""
+    import backend
+
+    error = _with_timed_out_db(backend.get_local_events_for_ai, lat=30.0, lng=-97.0, radius=25.0,
+                               category=None, limit=10)
+    assert error.status_code == 504
+    return True
+
+
+def test_route_batch_timeout_maps_to_504():
+    """POST /events/route-batch answers 504 when its query times out"""
+    import backend
+
+    request = backend.RouteEventRequest(coordinates=[{"lat": 30.0, "lng": -97.0}], radius=10.0)
+    error = _with_timed_out_db(backend.get_route_events_batch, request)
+    assert error.status_code == 504
+    return True
+
+
+def main():
+    """Run all database executor tests"""
+    print("🚀 Starting Database Executor Tests...")
+    tests = [
+        test_run_db_returns_result_with_caller_context,
+        test_slow_work_raises_timeout,
+        test_local_events_timeout_maps_to_504,
+        test_route_batch_timeout_maps_to_504,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
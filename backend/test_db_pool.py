@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared database connection pools
+The PostgreSQL pool runs against in-process stand-in connections, so no server is needed;
+the SQLite pool runs against a temporary database file.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import db_pool
+from db_pool import PoolTimeoutError, PostgresConnectionPool, SQLiteConnectionPool
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+
+
+class FakeConnection:
+    """Just enough of a psycopg2 connection for the pool's bookkeeping"""
+
+    def __init__(self):
+        self.closed = 0
+        self.autocommit = True
+        self.rollbacks = 0
+        self.info = type("Info", (), {"transaction_status": TRANSACTION_STATUS_IDLE})()
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                if connection.closed:
+                    raise RuntimeError("connection already closed")
+
+        return Cursor()
+
+    def close(self):
+        self.closed = 1
+
+
+class FakePool(PostgresConnectionPool):
+    def __init__(self, *args, **kwargs):
+        self.opened = []
+        super().__init__("postgresql://pool-test", *args, **kwargs)
+
+    def _connect(self):
+        conn = FakeConnection()
+        conn.created_at = conn.returned_at = time.monotonic()
+        self.opened.append(conn)
+        return conn
+
+
+def test_returned_connections_stay_open():
+    """Connections above min_size are kept idle and reused instead of closed on return"""
+    pool = FakePool(min_size=1, max_size=4)
+    held = [pool.getconn() for _ in range(4)]
+    for conn in held:
+        pool.putconn(conn)
+    assert not any(conn.closed for conn in held)
+    assert pool.stats()["idle"] == 4
+
+    again = [pool.getconn() for _ in range(4)]
+    assert {id(conn) for conn in again} == {id(conn) for conn in held}
+    assert len(pool.opened) == 4
+    for conn in again:
+        pool.putconn(conn)
+    return True
+
+
+def test_open_transaction_is_rolled_back_on_return():
+    """A connection handed back mid-transaction is rolled back before reuse"""
+    pool = FakePool(min_size=0, max_size=1)
+    conn = pool.getconn(autocommit=False)
+    assert conn.autocommit is False
+    conn.info.transaction_status = TRANSACTION_STATUS_INTRANS
+    pool.putconn(conn)
+    assert conn.rollbacks == 1 and pool.getconn() is conn
+    return True
+
+
+def test_old_and_dead_connections_are_recycled():
+    """Connections past their lifetime or closed underneath us are replaced"""
+    pool = FakePool(min_size=0, max_size=2)
+    old = pool.getconn()
+    pool.putconn(old)
+    old.created_at -= db_pool.DB_POOL_MAX_LIFETIME + 1
+    fresh = pool.getconn()
+    assert fresh is not old and old.closed
+
+    dead = pool.getconn()
+    dead.close()
+    pool.putconn(dead)
+    pool.putconn(fresh)
+    stats = pool.stats()
+    assert stats["discarded"] == 2 and stats["idle"] == 1 and stats["in_use"] == 0
+    return True
+
+
+def test_surplus_idle_connections_are_trimmed():
+    """Only connections idle past DB_POOL_MAX_IDLE and above min_size are closed"""
+    pool = FakePool(min_size=1, max_size=3)
+    first, second, third = pool.getconn(), pool.getconn(), pool.getconn()
+    for conn in (first, second, third):
+        pool.putconn(conn)
+    first.returned_at -= db_pool.DB_POOL_MAX_IDLE + 1
+    second.returned_at -= db_pool.DB_POOL_MAX_IDLE + 1
+
+    pool.putconn(pool.getconn())
+    assert first.closed and second.closed and not third.closed
+    assert pool.stats()["idle"] == 1
+    return True
+
+
+def test_exhausted_pool_times_out():
+    """With every connection checked out, callers wait up to the timeout and then fail"""
+    pool = FakePool(min_size=0, max_size=1, timeout=0.1)
+    conn = pool.getconn()
+    try:
+        pool.getconn()
+        raise AssertionError("getconn() should have timed out")
+    except PoolTimeoutError:
+        pass
+
+    threading.Timer(0.02, pool.putconn, args=(conn,)).start()
+    assert pool.getconn() is conn
+    stats = pool.stats()
+    assert stats["timeouts"] == 1 and stats["waits"] == 2
+    return True
+
+
+def test_sqlite_connections_are_reused_per_thread():
+    """SQLite connections are opened once per thread and nested checkouts get their own"""
+    pool = SQLiteConnectionPool(os.path.join(tempfile.mkdtemp(), "pool.db"))
+    outer = pool.getconn()
+    inner = pool.getconn()
+    assert outer is not inner
+    pool.putconn(inner)
+    pool.putconn(outer)
+    assert pool.getconn() is outer
+    assert pool.stats()["opened"] == 2
+    return True
+
+
+def main():
+    """Run all connection pool tests"""
+    print("🚀 Starting Connection Pool Tests...")
+    tests = [
+        test_returned_connections_stay_open,
+        test_open_transaction_is_rolled_back_on_return,
+        test_old_and_dead_connections_are_recycled,
+        test_surplus_idle_connections_are_trimmed,
+        test_exhausted_pool_times_out,
+        test_sqlite_connections_are_reused_per_thread,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Test script for the outbound email queue
+Runs the outbox against a temporary SQLite database. With aiosmtpd installed
+(pip install aiosmtpd) the last test also delivers through a local SMTP stand-in.
+"""
+
+import os
+import sys
+import time
+import smtplib
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from email_outbox import EmailOutbox, ensure_email_outbox, retry_delay
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    Controller = None
+
+
+def make_db():
+    db_file = os.path.join(tempfile.mkdtemp(), "outbox.db")
+
+    @contextmanager
+    def get_db():
+        conn = sqlite3.connect(db_file)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    with get_db() as conn:
+        ensure_email_outbox(conn.cursor(), is_postgres=False)
+        conn.commit()
+    return get_db
+
+
+def statuses(get_db):
+    with get_db() as conn:
+        rows = conn.execute("SELECT id, status, attempts FROM email_outbox ORDER BY id").fetchall()
+    return [(row["status"], row["attempts"]) for row in rows]
+
+
+class RecordingTransport:
+    """SMTP stand-in that records deliveries and fails for chosen recipients"""
+
+    def __init__(self, failures=None):
+        self.failures = failures or {}
+        self.connections = 0
+        self.delivered = []
+        self.message_ids = []
+
+    def connect(self):
+        self.connections += 1
+
+        class Connection:
+            def noop(self):
+                return (250, b"OK")
+
+            def quit(self):
+                pass
+
+        return Connection()
+
+    def deliver(self, connection, to_email, subject, html_content, text_content=None, cc_email=None,
+                message_id=None):
+        if to_email in self.failures:
+            raise self.failures[to_email]
+        self.delivered.append((to_email, subject))
+        self.message_ids.append(message_id)
+
+
+def test_batch_reuses_one_connection():
+    """A batch of queued messages goes out over a single SMTP connection"""
+    get_db = make_db()
+    transport = RecordingTransport()
+    outbox = EmailOutbox(get_db, lambda: "?", transport, rate_limit_per_minute=100)
+    for i in range(5):
+        outbox.enqueue(f"user{i}@example.com", f"Hello {i}", "<p>Hi</p>", "Hi")
+    assert statuses(get_db) == [("pending", 0)] * 5
+
+    assert outbox.flush() == 5
+    assert transport.connections == 1 and len(transport.delivered) == 5
+    assert statuses(get_db) == [("sent", 1)] * 5
+    return True
+
+
+def test_failures_back_off_then_give_up():
+    """Temporary errors are rescheduled with backoff; 5xx rejections fail at once"""
+    get_db = make_db()
+    transport = RecordingTransport({
+        "flaky@example.com": smtplib.SMTPServerDisconnected("connection lost"),
+        "bad@example.com": smtplib.SMTPRecipientsRefused({"bad@example.com": (550, b"No such user")}),
+    })
+    outbox = EmailOutbox(get_db, lambda: "?", transport, max_attempts=2)
+    outbox.enqueue("flaky@example.com", "Retry me", "<p>x</p>")
+    outbox.enqueue("bad@example.com", "Reject me", "<p>x</p>")
+
+    assert outbox.flush() == 0
+    assert statuses(get_db) == [("pending", 1), ("failed", 1)]
+    # Not due again until the backoff has passed
+    assert outbox.flush() == 0 and statuses(get_db)[0] == ("pending", 1)
+
+    with get_db() as conn:
+        conn.execute("UPDATE email_outbox SET next_attempt_at = '2000-01-01 00:00:00'")
+        conn.commit()
+    outbox.flush()
+    assert statuses(get_db) == [("failed", 2), ("failed", 1)]
+
+    del transport.failures["flaky@example.com"]
+    assert outbox.requeue(1) and not outbox.requeue(1)
+    assert outbox.flush() == 1 and statuses(get_db)[0] == ("sent", 1)
+    assert 30 <= retry_delay(1) <= 33 and 60 <= retry_delay(2) <= 66 and retry_delay(20) <= 3960
+    return True
+
+
+def test_rate_limit_leaves_the_rest_queued():
+    """Messages over the per-minute limit stay pending for a later run"""
+    get_db = make_db()
+    transport = RecordingTransport()
+    outbox = EmailOutbox(get_db, lambda: "?", transport, rate_limit_per_minute=2)
+    for i in range(5):
+        outbox.enqueue(f"user{i}@example.com", "Hi", "<p>Hi</p>")
+
+    assert outbox.flush() == 2
+    assert [status for status, _ in statuses(get_db)] == ["sent"] * 2 + ["pending"] * 3
+    assert outbox.stats()["rate_limited"] == 3
+    return True
+
+
+def test_reclaimed_message_is_not_sent_twice():
+    """A message another worker reclaimed is skipped by the worker that lost it"""
+    get_db = make_db()
+    transport = RecordingTransport()
+    outbox = EmailOutbox(get_db, lambda: "?", transport)
+    outbox.enqueue("a@example.com", "First", "<p>x</p>")
+    outbox.enqueue("b@example.com", "Second", "<p>x</p>")
+
+    batch = outbox._claim()
+    with get_db() as conn:
+        conn.execute("UPDATE email_outbox SET claim_token = 'other-worker' WHERE id = 2")
+        conn.commit()
+    assert outbox._deliver_batch(batch) == (1, False)
+    assert transport.delivered == [("a@example.com", "First")]
+    assert transport.message_ids[0].startswith("outbox.1.")
+    assert statuses(get_db) == [("sent", 1), ("sending", 0)]
+    return True
+
+
+def test_send_email_falls_back_to_inline_delivery():
+    """If the outbox cannot take a message, EmailService sends it directly"""
+    from email_config import EmailService
+
+    class BrokenOutbox:
+        def enqueue(self, *args):
+            raise sqlite3.OperationalError("no such table: email_outbox")
+
+    transport = RecordingTransport()
+    service = EmailService()
+    service.config = dict(service.config, smtp_password="secret")
+    service.connect = transport.connect
+    service.deliver = transport.deliver
+    service.use_outbox(BrokenOutbox())
+
+    assert service.send_email("reset@example.com", "Reset your password", "<p>code</p>") is True
+    assert transport.delivered == [("reset@example.com", "Reset your password")]
+    return True
+
+
+def test_background_sender_with_local_smtp():
+    """EmailService queues instantly and the worker delivers through aiosmtpd (optional)"""
+    if Controller is None:
+        print("⏭️  aiosmtpd not installed, skipping local SMTP delivery")
+        return True
+    from email_config import EmailService
+
+    received = []
+
+    class Handler:
+        async def handle_DATA(self, server, session, envelope):
+            received.append(envelope)
+            return "250 Message accepted for delivery"
+
+    controller = Controller(Handler(), hostname="127.0.0.1", port=8025)
+    controller.start()
+    try:
+        service = EmailService()
+        service.config = dict(service.config, smtp_server="127.0.0.1", smtp_port=8025,
+                              smtp_security="none", smtp_password="")
+        get_db = make_db()
+        outbox = EmailOutbox(get_db, lambda: "?", service, interval_ms=50)
+        service.use_outbox(outbox)
+        outbox.start()
+
+        started = time.perf_counter()
+        for i in range(3):
+            assert service.send_email(f"user{i}@example.com", f"Subject {i}", "<p>Hi</p>", "Hi")
+        assert time.perf_counter() - started < 0.5
+
+        deadline = time.time() + 5
+        while len(received) < 3 and time.time() < deadline:
+            time.sleep(0.05)
+        outbox.stop()
+        assert len(received) == 3 and outbox.stats()["connections_opened"] == 1
+        assert statuses(get_db) == [("sent", 1)] * 3
+    finally:
+        controller.stop()
+    return True
+
+
+def main():
+    """Run all email outbox tests"""
+    print("🚀 Starting Email Outbox Tests...")
+    tests = [
+        test_batch_reuses_one_connection,
+        test_failures_back_off_then_give_up,
+        test_rate_limit_leaves_the_rest_queued,
+        test_reclaimed_message_is_not_sent_twice,
+        test_send_email_falls_back_to_inline_delivery,
+        test_background_sender_with_local_smtp,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test script for the write-behind engagement tracker
+Runs against a temporary SQLite database.
+"""
+
+import os
+import sys
+import tempfile
+import sqlite3
+from contextlib import contextmanager
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from background_flusher import BackgroundFlusher
+from engagement_tracker import EngagementTracker
+
+
+def make_tracker():
+    db_file = os.path.join(tempfile.mkdtemp(), "engagement.db")
+
+    @contextmanager
+    def get_db():
+        conn = sqlite3.connect(db_file)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    with get_db() as conn:
+        conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, view_count INTEGER DEFAULT 0, "
+                     "interest_count INTEGER DEFAULT 0)")
+        conn.execute("CREATE TABLE event_views (id INTEGER PRIMARY KEY, event_id INTEGER NOT NULL, "
+                     "user_id INTEGER, browser_fingerprint TEXT NOT NULL DEFAULT 'legacy')")
+        conn.executemany("INSERT INTO events (id) VALUES (?)", [(1,), (2,)])
+        conn.commit()
+
+    return EngagementTracker(get_db, lambda: "?", flush_max_items=1000), get_db
+
+
+def counts(get_db, event_id):
+    with get_db() as conn:
+        row = conn.execute("SELECT view_count, interest_count FROM events WHERE id = ?", (event_id,)).fetchone()
+        return row["view_count"], row["interest_count"]
+
+
+def test_views_are_buffered_and_deduplicated():
+    """Repeat views from one viewer are counted once and nothing is written before a flush"""
+    tracker, get_db = make_tracker()
+
+    assert tracker.record_view(1, None, "fp-a") is True
+    assert tracker.record_view(1, None, "fp-a") is False
+    assert tracker.record_view(1, 7, "fp-b") is True
+    assert tracker.record_view(2, None, "fp-a") is True
+
+    assert counts(get_db, 1) == (0, 0)
+    assert tracker.pending_views(1) == 2
+
+    assert tracker.flush() == 3
+    assert counts(get_db, 1) == (2, 0)
+    assert counts(get_db, 2) == (1, 0)
+    assert tracker.view_count(1) == 2
+    return True
+
+
+def test_flush_skips_views_already_stored_and_missing_events():
+    """Views recorded before a restart and views of deleted events are not counted again"""
+    tracker, get_db = make_tracker()
+    tracker.record_view(1, None, "fp-a")
+    tracker.flush()
+
+    restarted, _ = make_tracker()
+    restarted.get_db = get_db
+    restarted.record_view(1, None, "fp-a")
+    restarted.record_view(99, None, "fp-a")
+    assert restarted.flush() == 0
+    assert counts(get_db, 1) == (1, 0)
+    assert restarted.view_count(1) == 1
+    assert restarted.view_count(99) is None
+    return True
+
+
+def test_view_count_seeded_from_database():
+    """A count read from the database is remembered and includes buffered views"""
+    tracker, get_db = make_tracker()
+    assert tracker.view_count(1) is None
+    tracker.record_view(1, None, "fp-a")
+    assert tracker.remember_view_count(1, 5) == 6
+    assert tracker.view_count(1) == 6
+
+    with get_db() as conn:
+        conn.execute("DELETE FROM events WHERE id = 1")
+        conn.commit()
+    tracker.record_view(1, None, "fp-b")
+    tracker.flush()
+    assert tracker.view_count(1) is None
+    return True
+
+
+def test_failed_flush_requeues_and_stop_drains():
+    """A flush that fails keeps its batch, and stop() writes it out"""
+    tracker, get_db = make_tracker()
+    working_get_db = tracker.get_db
+
+    @contextmanager
+    def broken_get_db():
+        raise sqlite3.OperationalError("database is locked")
+        yield
+
+    tracker.get_db = broken_get_db
+    tracker.record_view(1, None, "fp-a")
+    assert tracker.flush() == 0
+    assert tracker.stats()["flush_failures"] == 1
+
+    tracker.get_db = working_get_db
+    tracker.start()
+    tracker.stop()
+    assert counts(get_db, 1) == (1, 0)
+    assert tracker.stats()["pending_views"] == 0
+    return True
+
+
+def test_flusher_without_flush_fails_at_construction():
+    """A write-behind buffer that does not define flush() cannot be instantiated"""
+    class Partial(BackgroundFlusher):
+        pass
+
+    try:
+        Partial(1.0)
+        raise AssertionError("Partial() should not be constructible")
+    except TypeError:
+        pass
+    return True
+
+
+def main():
+    """Run all engagement tracker tests"""
+    print("🚀 Starting Engagement Tracker Tests...")
+    tests = [
+        test_views_are_buffered_and_deduplicated,
+        test_flush_skips_views_already_stored_and_missing_events,
+        test_view_count_seeded_from_database,
+        test_failed_flush_requeues_and_stop_drains,
+        test_flusher_without_flush_fails_at_construction,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-memory event grid
+Runs against temporary SQLite databases.
+"""
+
+import os
+import sys
+import random
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from event_grid import EventGrid
+from event_versions import EventVersionTracker
+from geo_query import radius_condition
+from schema_migrations import run_migrations
+
+
+def make_grid(columns=()):
+    db_file = os.path.join(tempfile.mkdtemp(), "event_grid.db")
+
+    @contextmanager
+    def get_db():
+        conn = sqlite3.connect(db_file)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    run_migrations(get_db, False)
+    versions = EventVersionTracker(get_db, ttl=0)
+    grid = EventGrid(get_db, lambda: "?", lambda: versions.current()[0], columns=columns, enabled=True)
+    return get_db, grid
+
+
+def add_event(get_db, title, days_ahead, lat, lng, start_time="19:00", category="music"):
+    day = (datetime.utcnow() + timedelta(days=days_ahead)).date().isoformat()
+    with get_db() as conn:
+        cursor = conn.execute(
+            "INSERT INTO events (title, description, date, start_time, category, address, lat, lng) "
+            "VALUES (?, 'desc', ?, ?, ?, '1 Main St', ?, ?)",
+            (title, day, start_time, category, lat, lng),
+        )
+        conn.commit()
+        return cursor.lastrowid
+
+
+def test_radius_matches_sql():
+    """Radius searches return the same upcoming events, in the same order, as the SQL filter"""
+    get_db, grid = make_grid()
+    rng = random.Random(7)
+    for i in range(400):
+        add_event(get_db, f"Event {i}", rng.randint(-5, 30), 30 + rng.uniform(-2, 2),
+                  -97.7 + rng.uniform(-2, 2), start_time=f"{rng.randint(8, 22):02d}:00")
+    assert grid.flush() > 0
+
+    snapshot = grid.view()
+    today = datetime.utcnow().date().isoformat()
+    with get_db() as conn:
+        for lat, lng, radius in ((30.0, -97.7, 25), (31.2, -96.1, 60), (29.0, -99.5, 5)):
+            sql, params = radius_condition(lat, lng, radius, "?", False)
+            expected = [row[0] for row in conn.execute(
+                f"SELECT id FROM events WHERE event_date >= ? AND {sql} ORDER BY start_ts, id",
+                [today] + params,
+            )]
+            found = [row["id"] for _, row in snapshot.upcoming(lat, lng, radius)]
+            assert found == expected, (lat, lng, radius, len(found), len(expected))
+    return True
+
+
+def test_writes_and_direct_writes():
+    """apply() keeps the snapshot current after API writes; direct writes make it stale"""
+    get_db, grid = make_grid()
+    near = add_event(get_db, "Near", 1, 30.27, -97.74)
+    grid.flush()
+    assert [row["id"] for _, row in grid.view().upcoming(30.27, -97.74, 10)] == [near]
+
+    moved = add_event(get_db, "Moved", 2, 40.0, -75.0)
+    grid.apply([moved])
+    with get_db() as conn:
+        conn.execute("UPDATE events SET lat = 30.28, lng = -97.75 WHERE id = ?", (moved,))
+        conn.execute("DELETE FROM events WHERE id = ?", (near,))
+        conn.commit()
+    grid.apply([moved, near])
+    snapshot = grid.view()
+    assert snapshot is not None
+    assert [row["id"] for _, row in snapshot.upcoming(30.27, -97.74, 10)] == [moved]
+    assert snapshot.within([(40.0, -75.0)], 10) == {}
+
+    # A write that does not go through apply() is caught by the change version
+    add_event(get_db, "Scraped", 3, 30.27, -97.74)
+    assert grid.view() is None
+    grid.flush()
+    assert len(grid.view().upcoming(30.27, -97.74, 10)) == 2
+    return True
+
+
+def test_cursor_filters_and_antimeridian():
+    """Cursor keys, category/date filters and boxes across the antimeridian behave like SQL"""
+    get_db, grid = make_grid()
+    first = add_event(get_db, "Early", 1, 30.27, -97.74, start_time="09:00")
+    second = add_event(get_db, "Late", 1, 30.27, -97.74, start_time="21:00", category="arts")
+    third = add_event(get_db, "Tomorrow", 2, 30.27, -97.74, start_time="08:00")
+    add_event(get_db, "Past", -1, 30.27, -97.74)
+    east = add_event(get_db, "Fiji", 1, -17.7, 179.9)
+    west = add_event(get_db, "Samoa", 1, -17.7, -179.9)
+    grid.flush()
+    snapshot = grid.view()
+
+    page = snapshot.upcoming(30.27, -97.74, 10, limit=2)
+    assert [row["id"] for _, row in page] == [first, second]
+    last = page[-1][1]
+    rest = snapshot.upcoming(30.27, -97.74, 10, after=(last["start_ts"], last["id"]))
+    assert [row["id"] for _, row in rest] == [third]
+    assert [row["id"] for _, row in snapshot.upcoming(30.27, -97.74, 10, category="arts")] == [second]
+    day = (datetime.utcnow() + timedelta(days=2)).date().isoformat()
+    assert [row["id"] for _, row in snapshot.upcoming(30.27, -97.74, 10, event_date=day)] == [third]
+    assert set(snapshot.within([(-17.7, 180.0)], 20)) == {east, west}
+    return True
+
+
+def test_compact_rows_and_projection():
+    """Only key and payload columns are held; project() reads the rest by id"""
+    get_db, grid = make_grid(columns=("title", "logo_image"))
+    kept = add_event(get_db, "Kept", 1, 30.27, -97.74)
+    gone = add_event(get_db, "Gone", 2, 30.27, -97.74)
+    logo = "data:image/png;base64," + "A" * 2000
+    with get_db() as conn:
+        conn.execute("UPDATE events SET logo_image = ? WHERE id = ?", (logo, kept))
+        conn.commit()
+    grid.flush()
+    snapshot = grid.view()
+
+    rows = [row for _, row in snapshot.upcoming(30.27, -97.74, 10)]
+    assert rows[0]["title"] == "Kept" and "description" not in rows[0] and "logo_image" not in rows[0]
+    assert rows[1]["logo_image"] is None
+
+    with get_db() as conn:
+        conn.execute("DELETE FROM events WHERE id = ?", (gone,))
+        conn.commit()
+        assert grid.project(rows, ("id", "title"), conn.cursor()) == [
+            {"id": kept, "title": "Kept"}, {"id": gone, "title": "Gone"}]
+        projected = grid.project(rows, ("id", "description", "logo_image"), conn.cursor())
+    assert projected == [{"id": kept, "description": "desc", "logo_image": logo}]
+    return True
+
+
+def main():
+    """Run all event grid tests"""
+    print("🚀 Starting Event Grid Tests...")
+    tests = [
+        test_radius_matches_sql,
+        test_writes_and_direct_writes,
+        test_cursor_filters_and_antimeridian,
+        test_compact_rows_and_projection,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for the set-based bulk event import helpers
+Runs against temporary SQLite databases.
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from event_import import find_duplicates, insert_rows, resolve_unique_slugs
+from schema_migrations import run_migrations
+
+
+def make_db():
+    db_file = os.path.join(tempfile.mkdtemp(), "event_import.db")
+
+    @contextmanager
+    def get_db():
+        conn = sqlite3.connect(db_file)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    run_migrations(get_db, False)
+    return get_db
+
+
+def event(title, lat=30.27, **extra):
+    return dict(
+        title=title, description="desc", date="2026-05-01", start_time="10:00",
+        category="music", address="1 Main St", lat=lat, lng=-97.74, **extra
+    )
+
+
+COLUMNS = ["title", "description", "date", "start_time", "category", "address", "lat", "lng", "slug"]
+
+
+def as_row(data):
+    return tuple(data.get(column) for column in COLUMNS)
+
+
+def test_slugs_resolved_against_table_and_batch():
+    """Taken slugs and repeats within the batch get the next free numeric suffix"""
+    get_db = make_db()
+    with get_db() as conn:
+        cursor = conn.cursor()
+        for slug in ("jazz-night", "jazz-night-2", "open-mic"):
+            cursor.execute("INSERT INTO events (" + ", ".join(COLUMNS) + ") VALUES "
+                           "(?, ?, ?, ?, ?, ?, ?, ?, ?)", as_row(event(slug, slug=slug)))
+        resolved = resolve_unique_slugs(
+            cursor, ["jazz-night", "fresh", "fresh", "", "open-mic", "jazz-night"], False
+        )
+    assert resolved == ["jazz-night-3", "fresh", "fresh-2", "", "open-mic-2", "jazz-night-4"]
+    return True
+
+
+def test_duplicates_match_create_event_rule():
+    """Same title (case/space-insensitive), date, time, category and spot is a duplicate"""
+    get_db = make_db()
+    with get_db() as conn:
+        cursor = conn.cursor()
+        insert_rows(cursor, "events", COLUMNS, [as_row(event("Jazz Night"))], False)
+        duplicates = find_duplicates(cursor, [
+            event(" jazz night"),             # already in the table
+            event("Jazz Night", lat=30.28),   # different place
+            event("Open Mic"),
+            event("OPEN MIC"),                # repeats the row above
+        ], False)
+    assert sorted(duplicates) == [0, 3]
+    assert "already exists" in duplicates[0] and "earlier event" in duplicates[3]
+    return True
+
+
+def test_bad_row_is_reported_without_losing_the_chunk():
+    """A failing chunk is retried row by row; only the bad row is left out"""
+    get_db = make_db()
+    rows = [as_row(event(f"Event {i}", slug=f"event-{i}")) for i in range(10)]
+    rows[6] = as_row(event(None, slug="no-title"))  # title is NOT NULL
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        ids, errors = insert_rows(cursor, "events", COLUMNS, rows, False, chunk_size=4)
+        cursor.execute("COMMIT")
+        stored = dict(conn.execute("SELECT id, slug FROM events").fetchall())
+    assert list(errors) == [6] and "NOT NULL" in errors[6]
+    assert ids[6] is None and len(stored) == 9
+    assert all(stored[event_id] == f"event-{i}" for i, event_id in enumerate(ids) if event_id)
+    return True
+
+
+def main():
+    """Run all event import tests"""
+    print("🚀 Starting Event Import Tests...")
+    tests = [
+        test_slugs_resolved_against_table_and_batch,
+        test_duplicates_match_create_event_rule,
+        test_bad_row_is_reported_without_losing_the_chunk,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
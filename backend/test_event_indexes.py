@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Test script for the typed event date/time columns and the managed event indexes
+Runs against temporary SQLite databases.
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import migration_utils
+from event_data_builder import typed_event_columns
+from schema_migrations import run_migrations
+
+
+def make_db(setup_sql=None):
+    db_file = os.path.join(tempfile.mkdtemp(), "event_indexes.db")
+
+    @contextmanager
+    def get_db():
+        conn = sqlite3.connect(db_file)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    if setup_sql:
+        with get_db() as conn:
+            conn.executescript(setup_sql)
+    run_migrations(get_db, False)
+    return get_db
+
+
+def add_event(conn, title, date, slug=None, city="Austin", state="TX"):
+    cursor = conn.execute(
+        "INSERT INTO events (title, description, date, start_time, category, address, lat, lng, "
+        "slug, city, state) VALUES (?, 'desc', ?, '19:00', 'music', '1 Main St', 30.27, -97.74, ?, ?, ?)",
+        (title, date, slug, city, state),
+    )
+    return cursor.lastrowid
+
+
+def test_event_date_follows_date():
+    """Inserts and updates of date keep event_date in step, whoever writes the row"""
+    get_db = make_db()
+    with get_db() as conn:
+        event_id = add_event(conn, "Jazz Night", "2026-05-01")
+        assert conn.execute("SELECT event_date FROM events WHERE id = ?", (event_id,)).fetchone()[0] == "2026-05-01"
+        conn.execute("UPDATE events SET date = '2026-06-15' WHERE id = ?", (event_id,))
+        conn.execute("UPDATE events SET event_date = '1999-01-01' WHERE id = ?", (event_id,))
+        assert conn.execute("SELECT event_date FROM events WHERE id = ?", (event_id,)).fetchone()[0] == "2026-06-15"
+        add_event(conn, "No Date Yet", "soon")
+        assert conn.execute("SELECT event_date FROM events WHERE title = 'No Date Yet'").fetchone()[0] is None
+    return True
+
+
+def test_timestamps_match_the_builder():
+    """The triggers and typed_event_columns agree, including overnight and missing times"""
+    get_db = make_db()
+    cases = [
+        {"date": "2026-05-01", "start_time": "19:00", "end_time": "22:30"},
+        {"date": "2026-05-01", "start_time": "22:00", "end_time": "02:00"},
+        {"date": "2026-05-01", "start_time": "09:00:15", "end_date": "2026-05-03", "end_time": "17:00"},
+        {"date": "2026-05-01", "start_time": "evening"},
+    ]
+    with get_db() as conn:
+        for case in cases:
+            data = dict(title="Case", description="desc", category="music", address="1 Main St",
+                        lat=30.27, lng=-97.74, **case)
+            event_id = conn.execute(
+                f"INSERT INTO events ({', '.join(data)}) VALUES ({', '.join('?' * len(data))})",
+                list(data.values()),
+            ).lastrowid
+            row = conn.execute(
+                "SELECT event_date, start_ts, end_ts FROM events WHERE id = ?", (event_id,)
+            ).fetchone()
+            assert dict(row) == typed_event_columns(case), (dict(row), typed_event_columns(case))
+        assert typed_event_columns(cases[1])["end_ts"] == "2026-05-02 02:00:00"
+        conn.execute("UPDATE events SET start_time = '20:00' WHERE id = 1")
+        assert conn.execute("SELECT start_ts FROM events WHERE id = 1").fetchone()[0] == "2026-05-01 20:00:00"
+    return True
+
+
+def test_existing_events_are_backfilled_in_batches():
+    """Rows written before the migration get typed columns, across several id ranges"""
+    cases = [
+        ("2026-05-01", "19:00", None, "22:30"),
+        ("2026-05-01", "22:00", None, "02:00"),
+        ("2026-05-01", "09:00:15", "2026-05-03", "17:00"),
+        ("2026-05-01", "evening", None, None),
+        ("someday", "19:00", None, None),
+    ]
+    values = ", ".join(
+        f"({i + 1}, 'E', '{day}', '{start}', {repr(end_day) if end_day else 'NULL'}, "
+        f"{repr(end) if end else 'NULL'})"
+        for i, (day, start, end_day, end) in enumerate(cases)
+    )
+    original = migration_utils.BACKFILL_BATCH_SIZE
+    migration_utils.BACKFILL_BATCH_SIZE = 2
+    try:
+        get_db = make_db(
+            "CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT, description TEXT, date TEXT, "
+            "start_time TEXT, end_date TEXT, end_time TEXT, category TEXT, address TEXT, lat REAL, "
+            "lng REAL, recurring BOOLEAN, frequency TEXT, created_by INTEGER);"
+            f"INSERT INTO events (id, title, date, start_time, end_date, end_time) VALUES {values};"
+        )
+    finally:
+        migration_utils.BACKFILL_BATCH_SIZE = original
+
+    with get_db() as conn:
+        for i, (day, start, end_day, end) in enumerate(cases):
+            row = conn.execute(
+                "SELECT event_date, start_ts, end_ts FROM events WHERE id = ?", (i + 1,)
+            ).fetchone()
+            expected = typed_event_columns({"date": day, "start_time": start, "end_date": end_day,
+                                            "end_time": end})
+            assert dict(row) == expected, (dict(row), expected)
+    return True
+
+
+def test_existing_duplicate_slugs_are_suffixed():
+    """Blank slugs become NULL and repeats get the event id appended before the unique index"""
+    get_db = make_db(
+        "CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT, description TEXT, date TEXT, "
+        "start_time TEXT, category TEXT, address TEXT, lat REAL, lng REAL, recurring BOOLEAN, "
+        "frequency TEXT, created_by INTEGER, slug TEXT);"
+        "INSERT INTO events (id, title, date, slug) VALUES (1, 'A', '2026-05-01', 'show'), "
+        "(2, 'B', '2026-05-02', 'show'), (3, 'C', '2026-05-03', ''), (4, 'D', '2026-05-04', ''), "
+        "(5, 'E', '2026-05-05', 'show');"
+    )
+    with get_db() as conn:
+        slugs = dict(conn.execute("SELECT id, slug FROM events").fetchall())
+        assert slugs == {1: "show", 2: "show-2", 3: None, 4: None, 5: "show-5"}
+        assert conn.execute("SELECT event_date FROM events WHERE id = 1").fetchone()[0] == "2026-05-01"
+        try:
+            add_event(conn, "Copy", "2026-05-01", slug="show")
+            return False
+        except sqlite3.IntegrityError:
+            pass
+    return True
+
+
+def test_city_page_queries_stay_on_the_index():
+    """The location page and its count are answered from idx_events_state_city_date alone"""
+    get_db = make_db()
+    where = (
+        "WHERE lower(state) = ? AND lower(city) = ? AND event_date >= CURRENT_DATE "
+        "AND (is_published = TRUE OR is_published IS NULL)"
+    )
+    with get_db() as conn:
+        count_plan = " ".join(row[3] for row in conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT COUNT(*) FROM events {where}", ("tx", "austin")))
+        page_plan = " ".join(row[3] for row in conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT * FROM events {where} ORDER BY event_date, start_time LIMIT 10",
+            ("tx", "austin")))
+        slug_plan = " ".join(row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM events WHERE slug = ?", ("jazz-night",)))
+    assert "COVERING INDEX idx_events_state_city_date" in count_plan
+    assert "idx_events_state_city_date" in page_plan and "TEMP B-TREE" not in page_plan
+    assert "idx_events_slug_unique" in slug_plan
+    return True
+
+
+def main():
+    """Run all event index tests"""
+    print("🚀 Starting Event Index Tests...")
+    tests = [
+        test_event_date_follows_date,
+        test_timestamps_match_the_builder,
+        test_existing_events_are_backfilled_in_batches,
+        test_existing_duplicate_slugs_are_suffixed,
+        test_city_page_queries_stay_on_the_index,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
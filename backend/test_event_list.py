@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Test script for GET /events pagination and list projections
+Imports the app against a temporary SQLite database and calls it through a TestClient.
+"""
+
+import os
+import sys
+import uuid
+import tempfile
+from datetime import datetime, timedelta
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import db_pool
+
+# Event columns production databases get from /admin/fix-production-database rather than
+# the versioned migrations; the full list view selects them
+PRODUCTION_EVENT_COLUMNS = {
+    "short_description": "TEXT",
+    "country": "VARCHAR(50) DEFAULT 'USA'",
+    "price": "DECIMAL(10,2) DEFAULT 0.0",
+    "currency": "VARCHAR(3) DEFAULT 'USD'",
+    "organizer_url": "TEXT",
+    "start_datetime": "TIMESTAMP",
+    "end_datetime": "TIMESTAMP",
+    "updated_at": "TIMESTAMP",
+}
+
+
+def app_client():
+    """The backend module on a temporary database, and a client for its app"""
+    import backend
+
+    # The SQLite pool is process-wide; only the first caller picks its file
+    if db_pool._pool is None:
+        backend.DB_FILE = os.path.join(tempfile.mkdtemp(), "event_list.db")
+    backend.init_db()
+    with backend.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM events LIMIT 0")
+        columns = {column[0] for column in cursor.description}
+        for column, definition in PRODUCTION_EVENT_COLUMNS.items():
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE events ADD COLUMN {column} {definition}")
+        conn.commit()
+    return backend, TestClient(backend.app)
+
+
+def add_events(backend, category, events):
+    """Insert (days_ahead, start_time, lat, lng) events in `category`; returns their ids"""
+    ids = []
+    with backend.get_db() as conn:
+        cursor = conn.cursor()
+        for index, (days_ahead, start_time, lat, lng) in enumerate(events):
+            day = (datetime.utcnow() + timedelta(days=days_ahead)).date().isoformat()
+            cursor.execute(
+                "INSERT INTO events (title, description, short_description, date, start_time, category, "
+                "address, lat, lng, created_by) "
+                "VALUES (?, 'A long description', 'Short', ?, ?, ?, '1 Main St', ?, ?, 1)",
+                (f"{category} {index}", day, start_time, category, lat, lng),
+            )
+            ids.append(cursor.lastrowid)
+        conn.commit()
+    return ids
+
+
+def fetch_pages(client, params, limit):
+    """Follow X-Next-Cursor from the first page to the last; returns the pages"""
+    pages, cursor = [], None
+    while True:
+        page_params = dict(params, limit=limit)
+        if cursor:
+            page_params["cursor"] = cursor
+        response = client.get("/events", params=page_params)
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+        assert len(pages) < 50, "cursor pagination did not terminate"
+
+
+def test_cursor_pages_cover_every_event_once():
+    """Following the cursor returns each event once, upcoming first, then by start time and id"""
+    backend, client = app_client()
+    category = f"cursor-{uuid.uuid4().hex[:8]}"
+    specs = [(day, f"{hour:02d}:00", 30.0, -97.0) for day in (1, 2, 3) for hour in (20, 9, 14)]
+    specs += [(1, "09:00", 30.0, -97.0), (-3, "10:00", 30.0, -97.0), (-1, "10:00", 30.0, -97.0)]
+    ids = add_events(backend, category, specs)
+
+    pages = fetch_pages(client, {"category": category}, limit=5)
+    assert [len(page) for page in pages] == [5, 5, 2]
+    returned = [event["id"] for page in pages for event in page]
+    assert sorted(returned) == sorted(ids)
+
+    today = datetime.utcnow().date()
+    expected = sorted(
+        zip(ids, specs),
+        key=lambda item: (item[1][0] < 0, today + timedelta(days=item[1][0]), item[1][1], item[0]),
+    )
+    assert returned == [event_id for event_id, _ in expected]
+    return True
+
+
+def test_radius_is_applied_before_paging():
+    """With lat/lng every page is full of in-radius events until the last one"""
+    backend, client = app_client()
+    category = f"radius-{uuid.uuid4().hex[:8]}"
+    near = [(day, "12:00", 30.0 + day * 0.01, -97.0) for day in range(1, 10)]
+    far = [(day, "11:00", 35.0, -90.0) for day in range(1, 10)]
+    near_ids = add_events(backend, category, near)
+    add_events(backend, category, far)
+
+    pages = fetch_pages(client, {"category": category, "lat": 30.0, "lng": -97.0, "radius": 25}, limit=4)
+    assert [len(page) for page in pages] == [4, 4, 1]
+    assert [event["id"] for page in pages for event in page] == near_ids
+    return True
+
+
+def test_malformed_cursor_is_rejected():
+    """A cursor that does not decode is a 400, not a silent first page"""
+    _, client = app_client()
+    response = client.get("/events", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    return True
+
+
+def test_pin_view_selects_pin_fields():
+    """view=pin returns just what a map marker needs"""
+    backend, client = app_client()
+    category = f"pin-{uuid.uuid4().hex[:8]}"
+    add_events(backend, category, [(1, "12:00", 30.0, -97.0)])
+
+    response = client.get("/events", params={"category": category, "view": "pin"})
+    assert response.status_code == 200
+    [pin] = response.json()
+    assert set(pin) == {"id", "title", "date", "category", "lat", "lng"}
+    assert set(pin) == set(backend.EventPinResponse.model_fields)
+    assert pin["category"] == category and pin["lat"] == 30.0
+    return True
+
+
+def test_card_view_leaves_out_the_description():
+    """view=card carries the short description and card fields but not the full description"""
+    backend, client = app_client()
+    category = f"card-{uuid.uuid4().hex[:8]}"
+    add_events(backend, category, [(1, "12:00", 30.0, -97.0)])
+
+    response = client.get("/events", params={"category": category, "view": "card"})
+    assert response.status_code == 200
+    [card] = response.json()
+    assert set(card) == set(backend.EventCardResponse.model_fields)
+    assert "description" not in card and card["short_description"] == "Short"
+
+    full = client.get("/events", params={"category": category}).json()[0]
+    assert full["description"] == "A long description"
+    return True
+
+
+def test_fields_select_columns():
+    """fields= returns id plus the listed columns and rejects unknown names and views"""
+    backend, client = app_client()
+    category = f"fields-{uuid.uuid4().hex[:8]}"
+    add_events(backend, category, [(1, "12:00", 30.0, -97.0)])
+
+    response = client.get("/events", params={"category": category, "fields": "title,lat"})
+    assert response.status_code == 200
+    assert set(response.json()[0]) == {"id", "title", "lat"}
+
+    assert client.get("/events", params={"fields": "title,password"}).status_code == 400
+    assert client.get("/events", params={"view": "thumbnail"}).status_code == 400
+    return True
+
+
+def main():
+    """Run all event list tests"""
+    print("🚀 Starting Event List Tests...")
+    tests = [
+        test_cursor_pages_cover_every_event_once,
+        test_radius_is_applied_before_paging,
+        test_malformed_cursor_is_rejected,
+        test_pin_view_selects_pin_fields,
+        test_card_view_leaves_out_the_description,
+        test_fields_select_columns,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
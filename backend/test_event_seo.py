@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test script for precomputed event SEO artifacts
+Runs against temporary SQLite databases.
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from event_seo import backfill_event_seo, build_event_seo, load_event_seo, refresh_event_seo
+from schema_migrations import run_migrations
+
+
+def make_db():
+    db_file = os.path.join(tempfile.mkdtemp(), "event_seo.db")
+
+    @contextmanager
+    def get_db():
+        conn = sqlite3.connect(db_file)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    run_migrations(get_db, False)
+    with get_db() as conn:
+        conn.execute("ALTER TABLE events ADD COLUMN updated_at TEXT")
+        conn.commit()
+    return get_db
+
+
+def add_event(get_db, title, **extra):
+    data = dict(
+        title=title, description="A night of live music downtown", date="2026-05-01",
+        start_time="19:00", end_time="22:00", category="music",
+        address="1 Main St, Austin, TX 78701, USA", lat=30.27, lng=-97.74, **extra
+    )
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"INSERT INTO events ({', '.join(data)}) VALUES ({', '.join('?' * len(data))})",
+            list(data.values()),
+        )
+        conn.commit()
+        return cursor.lastrowid
+
+
+def test_stored_artifacts_match_fresh_build():
+    """The stored package is what the processor builds, with the live counters overlaid"""
+    get_db = make_db()
+    event_id = add_event(get_db, "Jazz Night", slug="jazz-night", updated_at="2026-04-01T12:00:00")
+    with get_db() as conn:
+        cursor = conn.cursor()
+        assert refresh_event_seo(cursor, "?", [event_id]) == 1
+        cursor.execute("UPDATE events SET view_count = 42 WHERE id = ?", (event_id,))
+        stored = load_event_seo(cursor, "?", event_id)
+        cursor.execute("SELECT * FROM events WHERE id = ?", (event_id,))
+        fresh = build_event_seo(dict(cursor.fetchone()))
+
+    assert stored["seo_data"]["event"]["view_count"] == 42
+    stored["seo_data"]["event"].pop("view_count")
+    stored["seo_data"]["event"].pop("interest_count")
+    assert stored["seo_data"] == fresh["seo_data"] and stored["issues"] == fresh["issues"]
+    assert stored["seo_data"]["json_ld"]["event"]["@type"] == "MusicEvent"
+    return True
+
+
+def test_unchanged_events_are_not_rebuilt():
+    """Only events whose source columns changed are rebuilt; counters don't count as changes"""
+    get_db = make_db()
+    first = add_event(get_db, "Jazz Night")
+    add_event(get_db, "Open Mic")
+    with get_db() as conn:
+        cursor = conn.cursor()
+        assert refresh_event_seo(cursor, "?", [first, first + 1]) == 2
+        cursor.execute("UPDATE events SET interest_count = 5 WHERE id = ?", (first,))
+        assert refresh_event_seo(cursor, "?", [first, first + 1]) == 0
+        cursor.execute("UPDATE events SET title = 'Late Jazz Night' WHERE id = ?", (first,))
+        assert refresh_event_seo(cursor, "?", [first, first + 1]) == 1
+        assert load_event_seo(cursor, "?", first)["seo_data"]["event"]["title"] == "Late Jazz Night"
+    return True
+
+
+def test_backfill_batches_and_prunes():
+    """Backfill covers every event in batches and drops rows of deleted events"""
+    get_db = make_db()
+    ids = [add_event(get_db, f"Show {i}") for i in range(7)]
+    with get_db() as conn:
+        conn.execute("UPDATE events SET is_published = 0 WHERE id = ?", (ids[0],))
+        conn.commit()
+
+    assert backfill_event_seo(get_db, "?", batch_size=3) == 7
+    with get_db() as conn:
+        conn.execute("DELETE FROM events WHERE id = ?", (ids[1],))
+        conn.commit()
+    assert backfill_event_seo(get_db, "?", batch_size=3) == 0
+
+    with get_db() as conn:
+        cursor = conn.cursor()
+        stored = [row[0] for row in cursor.execute("SELECT event_id FROM event_seo ORDER BY event_id")]
+        assert stored == [ids[0]] + ids[2:]
+        assert load_event_seo(cursor, "?", ids[0]) is not None
+        assert load_event_seo(cursor, "?", ids[0], published_only=True) is None
+    return True
+
+
+def main():
+    """Run all event SEO tests"""
+    print("🚀 Starting Event SEO Tests...")
+    tests = [
+        test_stored_artifacts_match_fresh_build,
+        test_unchanged_events_are_not_rebuilt,
+        test_backfill_batches_and_prunes,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test script for streamed JSON / NDJSON event responses
+"""
+
+import os
+import sys
+import json
+import zlib
+import asyncio
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import event_stream
+from event_stream import JSONArrayEncoder, StreamCancelled, choose_encoding, stream_rows
+
+
+def collect(produce, ndjson=False, encoding=None):
+    async def run():
+        return [chunk async for chunk in stream_rows(produce, ndjson=ndjson, encoding=encoding)]
+
+    return asyncio.run(run())
+
+
+def test_encoding_negotiation():
+    """gzip is picked when accepted, q=0 opts out, identity otherwise"""
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, deflate") is None
+    assert choose_encoding("") is None
+    assert choose_encoding("*") == "gzip"
+    return True
+
+
+def test_array_framing():
+    """Batches join into one valid JSON array, including the empty case"""
+    encoder = JSONArrayEncoder()
+    body = encoder.encode([{"id": 1}]) + encoder.encode([]) + encoder.encode([{"id": 2}, {"id": 3}]) + encoder.close()
+    assert json.loads(body) == [{"id": 1}, {"id": 2}, {"id": 3}]
+    assert JSONArrayEncoder().close() == b"[]"
+    return True
+
+
+def test_stream_rows_gzip_round_trip():
+    """Every batch is emitted as its own compressed chunk and the whole stream decodes"""
+    def produce(emit):
+        for start in range(0, 1000, 100):
+            emit([{"id": i, "title": f"Event {i}"} for i in range(start, start + 100)])
+
+    chunks = collect(produce, encoding="gzip")
+    assert len(chunks) > 10
+    events = json.loads(zlib.decompress(b"".join(chunks), 31))
+    assert [event["id"] for event in events] == list(range(1000))
+
+    lines = b"".join(collect(produce, ndjson=True)).splitlines()
+    assert len(lines) == 1000 and json.loads(lines[-1])["id"] == 999
+    return True
+
+
+def test_producer_errors_reach_the_response():
+    """A failing producer aborts the stream instead of ending it as if complete"""
+    def produce(emit):
+        emit([{"id": 1}])
+        raise RuntimeError("cursor lost")
+
+    try:
+        collect(produce)
+    except RuntimeError:
+        return True
+    raise AssertionError("stream completed despite producer failure")
+
+
+def test_stalled_client_releases_the_producer():
+    """A client that stops reading ends the stream instead of pinning a connection"""
+    finished = []
+
+    def produce(emit):
+        try:
+            for i in range(20):
+                emit([{"id": i}])
+        finally:
+            finished.append(True)
+
+    async def run():
+        chunks = []
+        stream = stream_rows(produce, ndjson=True)
+        async for chunk in stream:
+            chunks.append(chunk)
+            if len(chunks) == 1:
+                await asyncio.sleep(2.5)
+        return chunks
+
+    stall_seconds = event_stream.EVENT_STREAM_STALL_SECONDS
+    event_stream.EVENT_STREAM_STALL_SECONDS = 1
+    try:
+        asyncio.run(run())
+        raise AssertionError("stalled stream was not ended")
+    except StreamCancelled:
+        pass
+    finally:
+        event_stream.EVENT_STREAM_STALL_SECONDS = stall_seconds
+    assert finished == [True]
+    return True
+
+
+def main():
+    """Run all event stream tests"""
+    print("🚀 Starting Event Stream Tests...")
+    tests = [
+        test_encoding_negotiation,
+        test_array_framing,
+        test_stream_rows_gzip_round_trip,
+        test_producer_errors_reach_the_response,
+        test_stalled_client_releases_the_producer,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
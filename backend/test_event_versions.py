@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test script for the events change version behind ETag / conditional GET
+Runs against a temporary SQLite database.
+"""
+
+import os
+import sys
+import tempfile
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from event_versions import (
+    EventVersionTracker,
+    install_event_version_tracking,
+    is_not_modified,
+    make_etag,
+)
+
+
+def make_db():
+    db_file = os.path.join(tempfile.mkdtemp(), "versions.db")
+
+    @contextmanager
+    def get_db():
+        conn = sqlite3.connect(db_file)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    with get_db() as conn:
+        conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT, view_count INTEGER DEFAULT 0, "
+                     "interest_count INTEGER DEFAULT 0)")
+        install_event_version_tracking(conn.cursor(), is_postgres=False)
+        install_event_version_tracking(conn.cursor(), is_postgres=False)
+        conn.commit()
+    return get_db
+
+
+def test_writes_bump_version_but_counters_do_not():
+    """Inserts, edits and deletes change the version; view/interest counter updates do not"""
+    get_db = make_db()
+    tracker = EventVersionTracker(get_db, ttl=0)
+    start, _ = tracker.current()
+
+    with get_db() as conn:
+        conn.execute("INSERT INTO events (id, title) VALUES (1, 'a')")
+        conn.commit()
+        inserted, _ = tracker.current()
+        conn.execute("UPDATE events SET view_count = view_count + 3, interest_count = 1 WHERE id = 1")
+        conn.commit()
+        assert tracker.current()[0] == inserted
+        conn.execute("UPDATE events SET title = 'b' WHERE id = 1")
+        conn.execute("DELETE FROM events WHERE id = 1")
+        conn.commit()
+
+    assert inserted == start + 1
+    assert tracker.current()[0] == inserted + 2
+    return True
+
+
+def test_tracker_serves_cached_version_until_invalidated():
+    """Within the TTL the version comes from memory; invalidate() forces a re-read"""
+    get_db = make_db()
+    tracker = EventVersionTracker(get_db, ttl=3600)
+    assert tracker.cached() is None
+    version, _ = tracker.current()
+    assert tracker.cached()[0] == version
+    with get_db() as conn:
+        conn.execute("INSERT INTO events (id, title) VALUES (1, 'a')")
+        conn.commit()
+    assert tracker.current()[0] == version
+    tracker.invalidate()
+    assert tracker.cached() is None
+    assert tracker.current()[0] == version + 1
+    return True
+
+
+def test_version_sums_every_shard():
+    """The change version adds up all counter rows, including shards from a larger layout"""
+    get_db = make_db()
+    tracker = EventVersionTracker(get_db, ttl=0)
+    with get_db() as conn:
+        conn.execute("INSERT INTO events (id, title) VALUES (1, 'a')")
+        conn.execute("INSERT INTO event_change_version (id, version, updated_at) "
+                     "VALUES (7, 5, '2030-01-01T00:00:00')")
+        conn.commit()
+    version, updated_at = tracker.current()
+    assert version == 6 and updated_at.year == 2030
+    return True
+
+
+def test_conditional_request_matching():
+    """If-None-Match (weak or strong, lists, *) wins over If-Modified-Since"""
+    etag = make_etag(7, "/events", "limit=10")
+    assert etag != make_etag(8, "/events", "limit=10")
+    # Other representations of the same page never share a strong ETag
+    assert make_etag(7, "/events", "limit=10", "json", "identity") != make_etag(
+        7, "/events", "limit=10", "ndjson", "identity")
+    assert make_etag(7, "/events", "limit=10", "json", "identity") != make_etag(
+        7, "/events", "limit=10", "json", "gzip")
+    modified = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+    assert is_not_modified(etag, None, etag, modified)
+    assert is_not_modified(f'"other", W/{etag}', None, etag, modified)
+    # "*" is not answered, since the validators run before the event is looked up
+    assert not is_not_modified("*", None, etag, modified)
+    assert not is_not_modified('"other"', "Wed, 01 Jan 2025 12:00:00 GMT", etag, modified)
+    assert is_not_modified(None, "Wed, 01 Jan 2025 12:00:00 GMT", etag, modified)
+    assert not is_not_modified(None, "Wed, 01 Jan 2025 11:59:59 GMT", etag, modified)
+    assert not is_not_modified(None, "not a date", etag, modified)
+    return True
+
+
+def main():
+    """Run all event version tests"""
+    print("🚀 Starting Event Version Tests...")
+    tests = [
+        test_writes_bump_version_but_counters_do_not,
+        test_tracker_serves_cached_version_until_invalidated,
+        test_version_sums_every_shard,
+        test_conditional_request_matching,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
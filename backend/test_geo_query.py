@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared radius-search helpers
+The nearby-cities test runs against a temporary SQLite database.
+"""
+
+import os
+import sys
+import math
+import asyncio
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI
+
+from geo_query import EARTH_RADIUS_MILES, bounding_box, haversine_miles
+from recommendations_endpoints import create_recommendations_endpoints
+from schema_migrations import run_migrations
+
+
+def test_box_encloses_the_circle():
+    """Points on the search circle fall inside the box, which is symmetric around the center"""
+    lat, lng, radius = 40.7128, -74.0060, 50
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius)
+    assert min_lat < lat < max_lat and min_lng < lng < max_lng
+    assert math.isclose(lat - min_lat, max_lat - lat) and math.isclose(lng - min_lng, max_lng - lng)
+
+    for bearing in range(0, 360, 15):
+        # Destination point `radius` miles away along `bearing`
+        angle, theta = radius / EARTH_RADIUS_MILES, math.radians(bearing)
+        lat1, lng1 = math.radians(lat), math.radians(lng)
+        lat2 = math.asin(math.sin(lat1) * math.cos(angle) + math.cos(lat1) * math.sin(angle) * math.cos(theta))
+        lng2 = lng1 + math.atan2(math.sin(theta) * math.sin(angle) * math.cos(lat1),
+                                 math.cos(angle) - math.sin(lat1) * math.sin(lat2))
+        point = (math.degrees(lat2), math.degrees(lng2))
+        assert math.isclose(haversine_miles(lat, lng, *point), radius, rel_tol=1e-9)
+        assert min_lat <= point[0] <= max_lat and min_lng <= point[1] <= max_lng
+    return True
+
+
+def test_box_across_the_antimeridian_drops_longitude():
+    """A circle wrapping +/-180 degrees keeps only the latitude band"""
+    for lng in (179.5, -179.5):
+        min_lat, max_lat, min_lng, max_lng = bounding_box(10.0, lng, 100)
+        assert min_lng is None and max_lng is None
+        assert math.isclose(max_lat - 10.0, 100 / 69.0)
+
+    # Close to the line but not across it still gets longitude bounds
+    _, _, min_lng, max_lng = bounding_box(10.0, 178.0, 50)
+    assert min_lng is not None and max_lng < 180
+    return True
+
+
+def test_box_at_the_poles_drops_longitude():
+    """Latitudes are clamped to +/-90 and a box touching a pole spans every longitude"""
+    for lat in (90.0, 89.9, -90.0, -89.9):
+        min_lat, max_lat, min_lng, max_lng = bounding_box(lat, 25.0, 20)
+        assert -90.0 <= min_lat <= max_lat <= 90.0
+        assert min_lng is None and max_lng is None
+
+    # A circle reaching over the pole contains points on the opposite meridian
+    _, max_lat, min_lng, _ = bounding_box(89.0, 0.0, 100)
+    assert max_lat == 90.0 and min_lng is None
+    assert haversine_miles(89.0, 0.0, 89.8, 180.0) < 100
+    return True
+
+
+def test_haversine_distances():
+    """Known distances, including across the antimeridian and between the poles"""
+    assert math.isclose(haversine_miles(40.7128, -74.0060, 34.0522, -118.2437), 2445, rel_tol=0.005)
+    assert haversine_miles(30.0, -97.0, 30.0, -97.0) == 0
+
+    across = haversine_miles(0.0, 179.9, 0.0, -179.9)
+    assert math.isclose(across, EARTH_RADIUS_MILES * math.radians(0.2), rel_tol=1e-9)
+    assert math.isclose(across, haversine_miles(0.0, -179.9, 0.0, 179.9))
+
+    assert math.isclose(haversine_miles(90.0, 0.0, 90.0, 120.0), 0.0, abs_tol=1e-9)
+    assert math.isclose(haversine_miles(90.0, 0.0, -90.0, 0.0), math.pi * EARTH_RADIUS_MILES)
+    return True
+
+
+def test_nearby_cities_use_the_city_centroid():
+    """Cities are kept or dropped by the centroid of all their events, not by single events"""
+    db_file = os.path.join(tempfile.mkdtemp(), "geo.db")
+
+    @contextmanager
+    def get_db():
+        conn = sqlite3.connect(db_file)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    run_migrations(get_db, False)
+    day = (datetime.utcnow() + timedelta(days=3)).date().isoformat()
+    events = [
+        # Centroid 31.1 is within 100 miles; the 31.7 event lies outside the search box
+        ("Edgeville", "TX", 30.5), ("Edgeville", "TX", 31.7),
+        # Two events inside the box, but the centroid 32.6 is about 180 miles out
+        ("Farton", "TX", 31.4), ("Farton", "TX", 31.4), ("Farton", "TX", 35.0),
+    ]
+    with get_db() as conn:
+        conn.executemany(
+            "INSERT INTO events (title, description, date, event_date, start_time, category, address, "
+            "city, state, lat, lng) VALUES ('Show', 'desc', ?, ?, '19:00', 'music', '1 Main St', ?, ?, ?, -97.0)",
+            [(day, day, city, state, lat) for city, state, lat in events],
+        )
+        conn.commit()
+
+    app = FastAPI()
+    create_recommendations_endpoints(app, get_db, lambda: "?")
+    endpoint = next(route.endpoint for route in app.routes
+                    if getattr(route, "path", None) == "/api/recommendations/nearby-cities")
+    cities = asyncio.run(endpoint(lat=30.0, lng=-97.0, max_distance=100.0, limit=10))
+
+    assert [city["city"] for city in cities] == ["Edgeville"]
+    assert cities[0]["event_count"] == 2
+    assert math.isclose(cities[0]["lat"], 31.1)
+    assert math.isclose(cities[0]["distance"], haversine_miles(30.0, -97.0, 31.1, -97.0), abs_tol=0.1)
+    return True
+
+
+def main():
+    """Run all geo query tests"""
+    print("🚀 Starting Geo Query Tests...")
+    tests = [
+        test_box_encloses_the_circle,
+        test_box_across_the_antimeridian_drops_longitude,
+        test_box_at_the_poles_drops_longitude,
+        test_haversine_distances,
+        test_nearby_cities_use_the_city_centroid,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test script for the content-addressed media store
+Runs against a temporary directory and SQLite database.
+"""
+
+import os
+import sys
+import base64
+import tempfile
+import sqlite3
+from contextlib import contextmanager
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from media_store import (
+    DatabaseMediaStore,
+    LocalMediaStore,
+    MediaStore,
+    ensure_media_blobs,
+    media_key_from_value,
+    media_url,
+    migrate_inline_images,
+    unreferenced_media_keys,
+)
+
+
+def make_db():
+    db_file = os.path.join(tempfile.mkdtemp(), "media.db")
+
+    @contextmanager
+    def get_db():
+        conn = sqlite3.connect(db_file)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    with get_db() as conn:
+        conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, banner_image TEXT, logo_image TEXT)")
+        conn.commit()
+    return get_db
+
+
+def test_identical_content_is_stored_once():
+    """The key is the content hash, so the same bytes map to one stored file"""
+    store = LocalMediaStore(tempfile.mkdtemp())
+    key = store.put(b"jpeg-bytes")
+    assert store.put(b"jpeg-bytes") == key
+    assert store.put(b"other-bytes") != key
+    assert store.get(key) == b"jpeg-bytes"
+    assert media_key_from_value(media_url("banners", key)) == key
+    assert store.local_path("../../etc/passwd") is None
+
+    store.delete(key)
+    assert not store.exists(key)
+    return True
+
+
+def test_migration_moves_data_urls_into_store():
+    """Inline data: URLs become short media URLs and the bytes land in the store"""
+    get_db = make_db()
+    store = LocalMediaStore(tempfile.mkdtemp())
+    banner = "data:image/jpeg;base64," + base64.b64encode(b"banner").decode()
+    with get_db() as conn:
+        conn.executemany(
+            "INSERT INTO events (id, banner_image, logo_image) VALUES (?, ?, ?)",
+            [(1, banner, None), (2, banner, "legacy_logo.png"), (3, None, None)],
+        )
+        conn.commit()
+
+    try:
+        migrate_inline_images(get_db, "?", store)
+        raise AssertionError("migration into a local store was not refused")
+    except RuntimeError:
+        pass
+    assert migrate_inline_images(get_db, "?", store, batch_size=1, allow_local=True) == {"banners": 2, "logos": 0}
+    assert migrate_inline_images(get_db, "?", store, allow_local=True) == {"banners": 0, "logos": 0}
+
+    with get_db() as conn:
+        rows = conn.execute("SELECT banner_image, logo_image FROM events ORDER BY id").fetchall()
+        url = rows[0]["banner_image"]
+        assert url.startswith("/uploads/banners/") and rows[1]["banner_image"] == url
+        assert rows[1]["logo_image"] == "legacy_logo.png"
+        assert store.get(media_key_from_value(url)) == b"banner"
+
+        # Still referenced by event 2 after event 1 drops it
+        conn.execute("UPDATE events SET banner_image = NULL WHERE id = 1")
+        assert unreferenced_media_keys(conn.cursor(), "?", [url]) == []
+        conn.execute("UPDATE events SET banner_image = NULL WHERE id = 2")
+        assert unreferenced_media_keys(conn.cursor(), "?", [url]) == [media_key_from_value(url)]
+    return True
+
+
+def test_database_store_round_trip():
+    """The database backend stores each key once and serves it back without a local path"""
+    get_db = make_db()
+    with get_db() as conn:
+        ensure_media_blobs(conn.cursor(), is_postgres=False)
+        conn.commit()
+    store = DatabaseMediaStore(get_db, "?")
+    key = store.put(b"png-bytes", "image/png")
+    assert store.put(b"png-bytes", "image/png") == key and key.endswith(".png")
+    assert store.exists(key) and store.get(key) == b"png-bytes"
+    assert store.local_path(key) is None
+
+    banner = "data:image/jpeg;base64," + base64.b64encode(b"banner").decode()
+    with get_db() as conn:
+        conn.execute("INSERT INTO events (id, banner_image) VALUES (1, ?)", (banner,))
+        conn.commit()
+    assert migrate_inline_images(get_db, "?", store) == {"banners": 1, "logos": 0}
+
+    store.delete(key)
+    assert not store.exists(key) and store.get(key) is None
+    return True
+
+
+def test_incomplete_backend_fails_at_construction():
+    """A backend missing an override cannot be instantiated"""
+    class Partial(MediaStore):
+        def put(self, data, content_type="image/jpeg"):
+            return ""
+
+    try:
+        Partial()
+        raise AssertionError("Partial() should not be constructible")
+    except TypeError:
+        pass
+    return True
+
+
+def main():
+    """Run all media store tests"""
+    print("🚀 Starting Media Store Tests...")
+    tests = [
+        test_identical_content_is_stored_once,
+        test_migration_moves_data_urls_into_store,
+        test_database_store_round_trip,
+        test_incomplete_backend_fails_at_construction,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for the table column cache
+Runs against temporary SQLite databases.
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from schema_cache import SchemaCache
+from schema_migrations import run_migrations
+
+
+def make_db():
+    db_file = os.path.join(tempfile.mkdtemp(), "schema_cache.db")
+
+    @contextmanager
+    def get_db():
+        conn = sqlite3.connect(db_file)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    return get_db
+
+
+class CountingCursor:
+    """Wraps a cursor and counts the statements sent through it"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.executed = 0
+
+    def execute(self, *args):
+        self.executed += 1
+        return self.cursor.execute(*args)
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+
+def test_columns_load_once():
+    """After refresh() lookups are served from memory, in declaration order"""
+    get_db = make_db()
+    run_migrations(get_db, False)
+    cache = SchemaCache(get_db, False, check_interval=60)
+    cache.refresh()
+    assert set(cache.stats()["tables"]) == {"events", "users"}
+
+    with get_db() as conn:
+        cursor = CountingCursor(conn.cursor())
+        for _ in range(100):
+            columns = cache.column_set(cursor, "events")
+        ordered = cache.columns(cursor, "events")
+    assert cursor.executed == 0
+    assert isinstance(columns, frozenset) and {"title", "start_time", "verified"} <= columns
+    assert ordered[:2] == ("id", "title")
+    return True
+
+
+def test_missing_table_is_not_cached():
+    """A table that does not exist yet is looked up again on the next call"""
+    get_db = make_db()
+    cache = SchemaCache(get_db, False, check_interval=60)
+    with get_db() as conn:
+        cursor = conn.cursor()
+        assert cache.column_set(cursor, "events") == frozenset()
+        conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT)")
+        assert cache.column_set(cursor, "events") == {"id", "title"}
+    return True
+
+
+def test_migration_elsewhere_reloads_columns():
+    """A new schema_version row (another worker migrated) drops the cached columns"""
+    get_db = make_db()
+    run_migrations(get_db, False)
+    cache = SchemaCache(get_db, False, check_interval=0)
+    cache.refresh()
+    with get_db() as conn:
+        assert "ticket_tier" not in cache.column_set(conn.cursor(), "events")
+        conn.execute("ALTER TABLE events ADD COLUMN ticket_tier TEXT")
+        conn.execute("INSERT INTO schema_version (version, name, applied_at) VALUES (999, 'x', 'now')")
+        conn.commit()
+        assert "ticket_tier" in cache.column_set(conn.cursor(), "events")
+    assert cache.stats()["reloads"] == 1
+
+    # Without a version change only invalidate() picks up an ALTER
+    with get_db() as conn:
+        conn.execute("ALTER TABLE events ADD COLUMN age_limit TEXT")
+        conn.commit()
+        assert "age_limit" not in cache.column_set(conn.cursor(), "events")
+        cache.invalidate("events")
+        assert "age_limit" in cache.column_set(conn.cursor(), "events")
+    return True
+
+
+def main():
+    """Run all schema cache tests"""
+    print("🚀 Starting Schema Cache Tests...")
+    tests = [
+        test_columns_load_once,
+        test_missing_table_is_not_cached,
+        test_migration_elsewhere_reloads_columns,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Test script for the versioned schema migration runner
+Runs against temporary SQLite databases.
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import migration_utils
+import schema_migrations
+from schema_migrations import LATEST_VERSION, applied_versions, run_migrations
+
+
+def make_db(setup_sql=None):
+    db_file = os.path.join(tempfile.mkdtemp(), "migrations.db")
+
+    @contextmanager
+    def get_db():
+        conn = sqlite3.connect(db_file)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    if setup_sql:
+        with get_db() as conn:
+            conn.executescript(setup_sql)
+    return get_db
+
+
+def columns(get_db, table):
+    with get_db() as conn:
+        return {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+
+
+def test_fresh_database_migrates_once():
+    """Every step runs on an empty database; a second run finds nothing to do"""
+    get_db = make_db()
+    assert run_migrations(get_db, False, apply=False)[0] == "core_tables"
+
+    applied = run_migrations(get_db, False)
+    assert applied[:2] == ["core_tables", "page_visit_hourly"]
+    assert applied[-2:] == ["event_version_triggers", "event_indexes"]
+    with get_db() as conn:
+        assert applied_versions(conn.cursor()) == list(range(1, LATEST_VERSION + 1))
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"users", "events", "password_resets", "email_outbox", "subscriptions"} <= tables
+
+    assert run_migrations(get_db, False) == []
+    return True
+
+
+def test_legacy_events_table_is_upgraded():
+    """An old events table gets start_time (renamed from time) and the later columns"""
+    get_db = make_db(
+        "CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT, description TEXT, date TEXT, "
+        "time TEXT, category TEXT, address TEXT, lat REAL, lng REAL, recurring BOOLEAN, "
+        "frequency TEXT, created_by INTEGER);"
+        "INSERT INTO events (title, time) VALUES ('Old', '18:30');"
+    )
+    run_migrations(get_db, False)
+
+    event_columns = columns(get_db, "events")
+    assert "time" not in event_columns
+    assert {"start_time", "end_date", "view_count", "verified", "is_premium_event"} <= event_columns
+    with get_db() as conn:
+        assert conn.execute("SELECT start_time FROM events").fetchone()[0] == "18:30"
+    return True
+
+
+def test_triggers_follow_new_event_columns():
+    """Adding an events column makes the change-version triggers stale until re-applied"""
+    get_db = make_db()
+    run_migrations(get_db, False)
+    with get_db() as conn:
+        conn.execute("ALTER TABLE events ADD COLUMN organizer_url TEXT")
+        conn.commit()
+
+    assert run_migrations(get_db, False, apply=False) == ["event_version_triggers"]
+    assert run_migrations(get_db, False) == ["event_version_triggers"]
+    with get_db() as conn:
+        trigger = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'events_change_version_update'"
+        ).fetchone()[0]
+    assert "organizer_url" in trigger
+    return True
+
+
+def test_backfills_add_up_across_id_batches():
+    """Hourly visit and daily fact backfills give the same totals when split into id ranges"""
+    visits = "".join(
+        f"INSERT INTO page_visits (page_type, page_path, visited_at) "
+        f"VALUES ('{kind}', '/', '2025-03-0{day} 10:{minute:02d}:00');"
+        for minute, (kind, day) in enumerate([("home", 1)] * 5 + [("event", 1)] * 2 + [("home", 2)] * 2)
+    )
+    get_db = make_db(
+        "CREATE TABLE page_visits (id INTEGER PRIMARY KEY AUTOINCREMENT, page_type TEXT NOT NULL, "
+        "page_path TEXT NOT NULL, user_id INTEGER, browser_fingerprint TEXT NOT NULL DEFAULT 'anonymous', "
+        "visited_at TIMESTAMP);" + visits
+    )
+    original = migration_utils.BACKFILL_BATCH_SIZE
+    migration_utils.BACKFILL_BATCH_SIZE = 2
+    try:
+        run_migrations(get_db, False)
+    finally:
+        migration_utils.BACKFILL_BATCH_SIZE = original
+
+    with get_db() as conn:
+        rows = conn.execute(
+            "SELECT hour_start, page_type, visits FROM page_visit_hourly ORDER BY hour_start, page_type"
+        ).fetchall()
+    assert [tuple(row) for row in rows] == [
+        ("2025-03-01 10:00:00", "event", 2),
+        ("2025-03-01 10:00:00", "home", 5),
+        ("2025-03-02 10:00:00", "home", 2),
+    ]
+    return True
+
+
+def test_failing_step_raises_and_is_not_recorded():
+    """A step that fails is re-raised and left unrecorded so the next start retries it"""
+    get_db = make_db()
+
+    def broken(cursor, is_postgres):
+        raise RuntimeError("boom")
+
+    original = schema_migrations.MIGRATIONS
+    schema_migrations.MIGRATIONS = original[:2] + [(3, "broken", broken)]
+    try:
+        try:
+            run_migrations(get_db, False)
+            raise AssertionError("run_migrations swallowed the failure")
+        except RuntimeError as e:
+            assert str(e) == "boom"
+    finally:
+        schema_migrations.MIGRATIONS = original
+
+    with get_db() as conn:
+        assert applied_versions(conn.cursor()) == [1, 2]
+    return True
+
+
+def main():
+    """Run all schema migration tests"""
+    print("🚀 Starting Schema Migration Tests...")
+    tests = [
+        test_fresh_database_migrates_once,
+        test_legacy_events_table_is_upgraded,
+        test_triggers_follow_new_event_columns,
+        test_backfills_add_up_across_id_batches,
+        test_failing_step_raises_and_is_not_recorded,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared (Redis) response cache
+Runs against fakeredis by default; set CACHE_TEST_REDIS_URL to use a local redis server.
+"""
+
+import os
+import sys
+import time
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from response_cache import CacheBackend, RedisCache, event_list_tags, event_write_tags
+
+
+def make_client():
+    url = os.getenv("CACHE_TEST_REDIS_URL")
+    if url:
+        import redis
+
+        return redis.Redis.from_url(url)
+    import fakeredis
+
+    return fakeredis.FakeRedis(server=fakeredis.FakeServer())
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_workers_share_entries():
+    """An entry written by one worker is served to another"""
+    client = make_client()
+    worker_a = RedisCache(client, ttl_seconds=60, prefix="test:share:", subscribe=False)
+    worker_b = RedisCache(client, ttl_seconds=60, prefix="test:share:", subscribe=False)
+
+    worker_a.set("events:all", ([{"id": 1}], "cursor-1"), tags=event_list_tags(None, None, None, [1]))
+    value = worker_b.get("events:all")
+
+    assert value is not None
+    result, next_cursor = value
+    assert result == [{"id": 1}] and next_cursor == "cursor-1"
+    assert worker_b.stats()["remote_hits"] == 1
+    return True
+
+
+def test_invalidation_reaches_other_workers():
+    """Tag invalidation on one worker clears the other worker's front cache via pub/sub"""
+    client = make_client()
+    worker_a = RedisCache(client, ttl_seconds=60, prefix="test:pubsub:")
+    worker_b = RedisCache(client, ttl_seconds=60, prefix="test:pubsub:")
+    try:
+        worker_a.set("events:music", [{"id": 7}], tags=event_list_tags("music", None, None, [7]))
+        assert worker_b.get("events:music") == [{"id": 7}]  # now in worker_b's front cache
+
+        worker_a.invalidate_tags(event_write_tags({"id": 99, "category": "music", "date": "2030-01-01"}))
+
+        assert wait_for(lambda: worker_b.local.get("events:music") is None)
+        assert worker_b.get("events:music") is None
+    finally:
+        for worker in (worker_a, worker_b):
+            if worker._pubsub_thread:
+                worker._pubsub_thread.stop()
+    return True
+
+
+def test_unrelated_pages_survive_writes():
+    """A write in one category leaves other categories cached"""
+    client = make_client()
+    cache = RedisCache(client, ttl_seconds=60, prefix="test:scope:", subscribe=False)
+
+    cache.set("events:arts", [{"id": 1}], tags=event_list_tags("arts", None, None, [1]))
+    cache.set("events:sports", [{"id": 2}], tags=event_list_tags("sports", None, None, [2]))
+    cache.invalidate_tags(event_write_tags({"id": 3, "category": "sports", "date": "2030-01-01"}))
+
+    cache.local.clear()  # force reads through to Redis
+    assert cache.get("events:arts") == [{"id": 1}]
+    assert cache.get("events:sports") is None
+    return True
+
+
+def test_incomplete_backend_fails_at_construction():
+    """A backend missing an override cannot be instantiated"""
+    class Partial(CacheBackend):
+        def get(self, key):
+            return None
+
+    try:
+        Partial()
+        raise AssertionError("Partial() should not be constructible")
+    except TypeError:
+        pass
+    return True
+
+
+def main():
+    """Run all shared cache tests"""
+    print("🚀 Starting Shared Cache Tests...")
+    tests = [
+        test_workers_share_entries,
+        test_invalidation_reaches_other_workers,
+        test_unrelated_pages_survive_writes,
+        test_incomplete_backend_fails_at_construction,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test script for the sharded sitemap store
+Runs against temporary SQLite databases and shard directories.
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sitemap_store import SitemapStore, month_bucket
+
+
+def make_db():
+    db_file = os.path.join(tempfile.mkdtemp(), "sitemaps.db")
+
+    @contextmanager
+    def get_db():
+        conn = sqlite3.connect(db_file)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    with get_db() as conn:
+        conn.execute(
+            "CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT, slug TEXT, date TEXT, "
+            "event_date DATE, city TEXT, state TEXT, created_at TEXT)"
+        )
+        conn.commit()
+    return get_db
+
+
+def add_event(get_db, title, days_ahead, city=None, state=None):
+    day = (datetime.now(timezone.utc) + timedelta(days=days_ahead)).date().isoformat()
+    with get_db() as conn:
+        conn.execute(
+            "INSERT INTO events (title, slug, date, event_date, city, state) VALUES (?, ?, ?, ?, ?, ?)",
+            (title, title.lower().replace(" ", "-"), day, day, city, state),
+        )
+        conn.commit()
+    return day
+
+
+def make_store(get_db, max_urls=50000):
+    return SitemapStore(get_db, lambda: "?", root=tempfile.mkdtemp(),
+                        base_url="https://example.com", max_urls=max_urls)
+
+
+def test_index_lists_month_shards():
+    """A first build writes pages.xml and one shard per upcoming month; past events are left out"""
+    get_db = make_db()
+    add_event(get_db, "Old Show", -40)
+    near = add_event(get_db, "Jazz Night", 1, city="Austin", state="TX")
+    far = add_event(get_db, "Fall Fair", 70)
+    store = make_store(get_db)
+    store.mark_all()
+    assert store.flush() == 3
+
+    assert store.shard_names() == [
+        "pages.xml", f"events-{month_bucket(near)}.xml", f"events-{month_bucket(far)}.xml"
+    ]
+    body, etag, _ = store.read_index()
+    assert body.count(b"<sitemap>") == 3 and b"https://example.com/sitemaps/pages.xml" in body
+    shard, _, _ = store.read_shard(f"events-{month_bucket(near)}.xml")
+    assert b"/e/jazz-night" in shard and b"/us/tx/austin/events/jazz-night" in shard
+    assert b"old-show" not in shard
+    assert store.read_shard("../sitemaps.db") is None
+    return True
+
+
+def test_only_marked_months_are_rewritten():
+    """A write marks its month; other shards keep their files (and ETags)"""
+    get_db = make_db()
+    near = add_event(get_db, "Jazz Night", 1)
+    far = add_event(get_db, "Fall Fair", 70)
+    store = make_store(get_db)
+    store.mark_all()
+    store.flush()
+    far_etag = store.read_shard(f"events-{month_bucket(far)}.xml")[1]
+    near_etag = store.read_shard(f"events-{month_bucket(near)}.xml")[1]
+
+    assert store.flush() == 0
+    store.mark_dates(add_event(get_db, "Open Mic", 1))
+    assert store.flush() == 1
+    assert store.read_shard(f"events-{month_bucket(far)}.xml")[1] == far_etag
+    assert store.read_shard(f"events-{month_bucket(near)}.xml")[1] != near_etag
+
+    # Another worker reading the same directory serves the files without building
+    other = SitemapStore(get_db, lambda: "?", root=store.root, base_url="https://example.com")
+    assert other.read_index()[1] == store.read_index()[1]
+    return True
+
+
+def test_large_month_is_split_and_empty_month_removed():
+    """A month over the URL limit continues in -2, -3 ...; a month with no events loses its files"""
+    get_db = make_db()
+    day = add_event(get_db, "Show 0", 70)
+    for i in range(1, 6):
+        add_event(get_db, f"Show {i}", 70)
+    store = make_store(get_db, max_urls=5)
+    store.mark_all()
+    store.flush()
+    bucket = month_bucket(day)
+    assert [name for name in store.shard_names() if bucket in name] == [
+        f"events-{bucket}.xml", f"events-{bucket}-2.xml", f"events-{bucket}-3.xml"
+    ]
+
+    with get_db() as conn:
+        conn.execute("DELETE FROM events")
+        conn.commit()
+    store.mark_dates(day)
+    store.flush()
+    assert store.shard_names() == ["pages.xml"]
+    return True
+
+
+def main():
+    """Run all sitemap store tests"""
+    print("🚀 Starting Sitemap Store Tests...")
+    tests = [
+        test_index_lists_month_shards,
+        test_only_marked_months_are_rewritten,
+        test_large_month_is_split_and_empty_month_removed,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Test script for the local Stripe subscriptions mirror
+Webhook-shaped payloads are applied to a temporary SQLite database. Set STRIPE_MOCK_URL
+(e.g. http://localhost:12111, from `docker run -p 12111:12111 stripe/stripe-mock`) to also
+run a live round trip through stripe_call against stripe-mock.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import sqlite3
+import tempfile
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import stripe
+
+from stripe_subscriptions import (
+    apply_invoice,
+    ensure_subscription_tables,
+    load_user_subscriptions,
+    record_customer,
+    stripe_call,
+    subscription_row,
+    upsert_subscription,
+    user_for_customer,
+)
+
+
+def make_cursor():
+    conn = sqlite3.connect(os.path.join(tempfile.mkdtemp(), "subscriptions.db"))
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT)")
+    cursor.execute("INSERT INTO users (id, email) VALUES (7, 'host@example.com')")
+    ensure_subscription_tables(cursor)
+    return cursor
+
+
+def subscription_payload(status="active", cancel_at_period_end=False, metadata=None):
+    return {
+        "id": "sub_123",
+        "object": "subscription",
+        "customer": "cus_123",
+        "status": status,
+        "cancel_at_period_end": cancel_at_period_end,
+        "canceled_at": None,
+        "metadata": {"user_id": "7", "pricing_tier": "premium"} if metadata is None else metadata,
+        "items": {
+            "object": "list",
+            "data": [
+                {
+                    "price": {"id": "price_1", "unit_amount": 799, "currency": "usd"},
+                    "current_period_start": 1735689600,
+                    "current_period_end": 1738368000,
+                }
+            ],
+        },
+    }
+
+
+def test_webhook_payloads_build_the_mirror():
+    """A subscription event creates the row and the customer mapping used by invoice events"""
+    cursor = make_cursor()
+    user_id = upsert_subscription(cursor, "?", subscription_row(subscription_payload(), event_at=100))
+    assert user_id == 7
+    assert user_for_customer(cursor, "?", "cus_123") == (7, "host@example.com")
+
+    # Later events without metadata still belong to the user
+    upsert_subscription(cursor, "?", subscription_row(
+        subscription_payload(cancel_at_period_end=True, metadata={}), event_at=200))
+    apply_invoice(cursor, "?", {"id": "in_1", "subscription": "sub_123", "amount_due": 799,
+                                "next_payment_attempt": 1738368000}, upcoming=True)
+
+    known, customer_id, subscriptions = load_user_subscriptions(cursor, "?", 7)
+    assert known and customer_id == "cus_123" and len(subscriptions) == 1
+    sub = subscriptions[0]
+    assert sub["user_id"] == 7 and sub["pricing_tier"] == "premium"
+    assert sub["cancel_at_period_end"] is True and sub["amount"] == 799
+    assert sub["next_amount"] == 799 and sub["next_billing_at"] and sub["current_period_end"]
+    return True
+
+
+def test_out_of_order_events_are_ignored():
+    """An older event delivered late never overwrites a newer state"""
+    cursor = make_cursor()
+    upsert_subscription(cursor, "?", subscription_row(subscription_payload("canceled"), event_at=300))
+    upsert_subscription(cursor, "?", subscription_row(subscription_payload("active"), event_at=200))
+    _, _, subscriptions = load_user_subscriptions(cursor, "?", 7)
+    assert subscriptions[0]["status"] == "canceled"
+    return True
+
+
+def test_unknown_users_need_a_sync():
+    """The mirror says when a user has never been synced, and remembers users without a customer"""
+    cursor = make_cursor()
+    assert load_user_subscriptions(cursor, "?", 7) == (False, None, [])
+    record_customer(cursor, "?", 7, None)
+    assert load_user_subscriptions(cursor, "?", 7) == (True, None, [])
+    return True
+
+
+def test_stripe_call_times_out_as_stripe_error():
+    """A hung Stripe call surfaces as APIConnectionError instead of blocking the handler"""
+    async def run():
+        return await stripe_call(time.sleep, 2, timeout=0.1)
+
+    try:
+        asyncio.run(run())
+    except stripe.error.APIConnectionError:
+        return True
+    raise AssertionError("stripe_call did not time out")
+
+
+def test_stripe_mock_round_trip():
+    """Customer and subscription calls through stripe_call against stripe-mock (optional)"""
+    if not os.getenv("STRIPE_MOCK_URL"):
+        print("⏭️  STRIPE_MOCK_URL not set, skipping stripe-mock round trip")
+        return True
+    stripe.api_key = "sk_test_123"
+    stripe.api_base = os.environ["STRIPE_MOCK_URL"]
+
+    async def run():
+        customers = await stripe_call(stripe.Customer.list, email="host@example.com", limit=1)
+        return await stripe_call(
+            stripe.Subscription.list, customer=customers.data[0].id, status="all", limit=10
+        )
+
+    subscriptions = asyncio.run(run())
+    cursor = make_cursor()
+    for sub in subscriptions.data:
+        upsert_subscription(cursor, "?", subscription_row(sub, user_id=7))
+    _, _, mirrored = load_user_subscriptions(cursor, "?", 7)
+    assert len(mirrored) == len(subscriptions.data) and mirrored[0]["id"]
+    return True
+
+
+def main():
+    """Run all Stripe subscription mirror tests"""
+    print("🚀 Starting Stripe Subscription Mirror Tests...")
+    tests = [
+        test_webhook_payloads_build_the_mirror,
+        test_out_of_order_events_are_ignored,
+        test_unknown_users_need_a_sync,
+        test_stripe_call_times_out_as_stripe_error,
+        test_stripe_mock_round_trip,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test script for the token-to-user cache behind the auth dependencies
+Imports the app against a temporary SQLite database and calls the admin handlers directly.
+"""
+
+import os
+import sys
+import uuid
+import asyncio
+import tempfile
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import db_pool
+
+
+def app_with_users():
+    """The backend module on a temporary database whose users table has the premium columns"""
+    import backend
+
+    # The SQLite pool is process-wide; only the first caller picks its file
+    if db_pool._pool is None:
+        backend.DB_FILE = os.path.join(tempfile.mkdtemp(), "user_cache.db")
+    backend.init_db()
+    with backend.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users LIMIT 0")
+        columns = {column[0] for column in cursor.description}
+        # Production databases get these outside the versioned migrations
+        for column, definition in (("premium_expires_at", "TIMESTAMP"), ("premium_granted_by", "INTEGER")):
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE users ADD COLUMN {column} {definition}")
+        conn.commit()
+    return backend
+
+
+def add_user(backend, role):
+    email = f"{role}-{uuid.uuid4().hex[:8]}@example.com"
+    with backend.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO users (email, hashed_password, role) VALUES (?, 'x', ?)", (email, role)
+        )
+        conn.commit()
+        return {"id": cursor.lastrowid, "email": email, "role": role}
+
+
+def set_role_behind_cache(backend, user_id, role):
+    """Change a role without going through the app, so nothing invalidates the cache"""
+    with backend.get_db() as conn:
+        conn.execute("UPDATE users SET role = ? WHERE id = ?", (role, user_id))
+        conn.commit()
+
+
+def resolve(backend, email):
+    return asyncio.run(backend.resolve_token_user(email))
+
+
+def test_resolved_users_are_cached():
+    """A token subject is read from the database once and then served from the cache"""
+    backend = app_with_users()
+    user = add_user(backend, "user")
+    assert resolve(backend, user["email"]) == user
+
+    set_role_behind_cache(backend, user["id"], "premium")
+    assert resolve(backend, user["email"])["role"] == "user"
+
+    backend.invalidate_cached_user(user["id"])
+    assert resolve(backend, user["email"])["role"] == "premium"
+    return True
+
+
+def test_role_change_invalidates():
+    """PUT /admin/users/{id}/role drops the cached entry, so the next request sees the new role"""
+    backend = app_with_users()
+    admin = add_user(backend, "admin")
+    user = add_user(backend, "user")
+    resolve(backend, user["email"])
+
+    asyncio.run(backend.update_user_role(user["id"], backend.UserRole.ENTERPRISE, current_user=admin))
+    assert resolve(backend, user["email"])["role"] == "enterprise"
+    return True
+
+
+def test_premium_grant_and_removal_invalidate():
+    """Granting and removing premium both take effect on the next request"""
+    backend = app_with_users()
+    admin = add_user(backend, "admin")
+    user = add_user(backend, "user")
+    resolve(backend, user["email"])
+
+    asyncio.run(backend.grant_premium(user["id"], backend.PremiumGrantRequest(months=1), current_user=admin))
+    assert resolve(backend, user["email"])["role"] == "premium"
+
+    asyncio.run(backend.remove_premium(user["id"], current_user=admin))
+    assert resolve(backend, user["email"])["role"] == "user"
+    return True
+
+
+def test_deleted_user_is_not_resolved():
+    """A deleted account stops resolving even while its token is still valid"""
+    backend = app_with_users()
+    admin = add_user(backend, "admin")
+    user = add_user(backend, "user")
+    resolve(backend, user["email"])
+
+    asyncio.run(backend.delete_user(user["id"], current_user=admin))
+    assert resolve(backend, user["email"]) is None
+    return True
+
+
+def main():
+    """Run all user cache tests"""
+    print("🚀 Starting User Cache Tests...")
+    tests = [
+        test_resolved_users_are_cached,
+        test_role_change_invalidates,
+        test_premium_grant_and_removal_invalidate,
+        test_deleted_user_is_not_resolved,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script for batched page visit ingestion and hourly rollups
+Runs against a temporary SQLite database.
+"""
+
+import os
+import sys
+import tempfile
+import sqlite3
+from contextlib import contextmanager
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from visit_ingestion import PageVisitIngestor, PAGE_VISIT_HOURLY_TABLE_SQL, backfill_hourly_rollups
+
+
+def make_db():
+    db_file = os.path.join(tempfile.mkdtemp(), "visits.db")
+
+    @contextmanager
+    def get_db():
+        conn = sqlite3.connect(db_file)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    with get_db() as conn:
+        conn.execute("""CREATE TABLE page_visits (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            page_type TEXT NOT NULL,
+                            page_path TEXT NOT NULL,
+                            user_id INTEGER,
+                            browser_fingerprint TEXT NOT NULL DEFAULT 'anonymous',
+                            visited_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        )""")
+        conn.execute(PAGE_VISIT_HOURLY_TABLE_SQL)
+        conn.commit()
+    return get_db
+
+
+def test_repeat_visits_are_deduplicated():
+    """The same fingerprint on the same path counts once per window"""
+    ingestor = PageVisitIngestor(make_db(), lambda: "?")
+    assert ingestor.track("homepage", "/", None, "fp-a") is True
+    assert ingestor.track("homepage", "/", None, "fp-a") is False
+    assert ingestor.track("homepage", "/events", None, "fp-a") is True
+    assert ingestor.track("homepage", "/", 5, "fp-a") is True
+    assert ingestor.stats()["pending"] == 3
+    return True
+
+
+def test_flush_writes_raw_rows_and_rollups():
+    """One flush writes every visit and rollup counts that match the raw rows"""
+    get_db = make_db()
+    ingestor = PageVisitIngestor(get_db, lambda: "?")
+    for i in range(5):
+        ingestor.track("homepage", "/", None, f"fp-{i}")
+    ingestor.track("event_detail", "/e/1", 7, "fp-x")
+    assert ingestor.flush() == 6
+
+    ingestor.track("homepage", "/", None, "fp-late")
+    ingestor.flush()
+
+    with get_db() as conn:
+        raw = conn.execute("SELECT COUNT(*) FROM page_visits").fetchone()[0]
+        rolled = conn.execute("SELECT SUM(visits) FROM page_visit_hourly").fetchone()[0]
+        homepage = conn.execute(
+            "SELECT SUM(visits) FROM page_visit_hourly WHERE page_type = 'homepage' AND user_id = 0"
+        ).fetchone()[0]
+    assert raw == rolled == 7
+    assert homepage == 6
+    return True
+
+
+def test_backfill_builds_rollups_from_existing_visits():
+    """Existing page_visits rows are rolled up once when the rollup table is created"""
+    get_db = make_db()
+    with get_db() as conn:
+        conn.executemany(
+            "INSERT INTO page_visits (page_type, page_path, user_id, visited_at) VALUES (?, ?, ?, ?)",
+            [
+                ("homepage", "/", None, "2025-01-01 10:15:00"),
+                ("homepage", "/", None, "2025-01-01 10:45:00"),
+                ("homepage", "/", 3, "2025-01-01 11:05:00"),
+            ],
+        )
+        backfill_hourly_rollups(conn.cursor(), is_postgres=False)
+        backfill_hourly_rollups(conn.cursor(), is_postgres=False)
+        rows = conn.execute(
+            "SELECT hour_start, user_id, visits FROM page_visit_hourly ORDER BY hour_start"
+        ).fetchall()
+    assert [tuple(row) for row in rows] == [
+        ("2025-01-01 10:00:00", 0, 2),
+        ("2025-01-01 11:00:00", 3, 1),
+    ]
+    return True
+
+
+def main():
+    """Run all page visit ingestion tests"""
+    print("🚀 Starting Page Visit Ingestion Tests...")
+    tests = [
+        test_repeat_visits_are_deduplicated,
+        test_flush_writes_raw_rows_and_rollups,
+        test_backfill_builds_rollups_from_existing_visits,
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            results.append(bool(test()))
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {str(e)}")
+            results.append(False)
+
+    print(f"\n📊 Passed: {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
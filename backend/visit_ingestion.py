@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Page Visit Ingestion
+Batched, deduplicated writes for /api/track-visit plus hourly rollups for the admin
+page-visit analytics.
+
+track() is memory-only: a visit is dropped if the same fingerprint hit the same path
+within VISIT_DEDUPE_WINDOW_SECONDS, otherwise it is queued. Each flush writes the queue
+in one transaction (get_db must hand out connections with autocommit off, since a failed
+flush is requeued whole):
+  - multi-row INSERT into page_visits (raw rows, still used for data export/deletion)
+  - upsert of per-(hour, page_type, user) counts into page_visit_hourly
+
+get_page_visits_analytics reads page_visit_hourly, so dashboard queries scan at most
+one row per hour, page type and signed-in visitor instead of every visit.
+"""
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from background_flusher import BackgroundFlusher, insert_rows
+from migration_utils import id_ranges
+
+logger = logging.getLogger(__name__)
+
+VISIT_FLUSH_INTERVAL_MS = int(os.getenv("VISIT_FLUSH_INTERVAL_MS", 5000))
+VISIT_FLUSH_MAX_ITEMS = int(os.getenv("VISIT_FLUSH_MAX_ITEMS", 1000))
+VISIT_DEDUPE_WINDOW_SECONDS = int(os.getenv("VISIT_DEDUPE_WINDOW_SECONDS", 1800))
+VISIT_DEDUPE_SIZE = int(os.getenv("VISIT_DEDUPE_SIZE", 200000))
+VISIT_MAX_PENDING = int(os.getenv("VISIT_MAX_PENDING", 100000))
+
+# Anonymous visits are rolled up under user_id 0 so the rollup key has no NULLs
+ANONYMOUS_USER_ID = 0
+
+PAGE_VISIT_HOURLY_TABLE_SQL = """CREATE TABLE IF NOT EXISTS page_visit_hourly (
+                            hour_start TEXT NOT NULL,
+                            page_type TEXT NOT NULL,
+                            user_id INTEGER NOT NULL DEFAULT 0,
+                            visits INTEGER NOT NULL DEFAULT 0,
+                            PRIMARY KEY (hour_start, page_type, user_id)
+                        )"""
+
+
+def hour_bucket(visited_at: datetime) -> str:
+    return visited_at.strftime("%Y-%m-%d %H:00:00")
+
+
+def backfill_hourly_rollups(cursor, is_postgres: bool) -> None:
+    """
+    Build page_visit_hourly from page_visits once, when the rollup table is still empty.
+    Visits are summed one id range at a time so no statement aggregates the whole table;
+    an hour split across ranges adds up through the upsert. All ranges share the
+    migration's transaction, so a failure leaves the table empty for the retry.
+    """
+    cursor.execute("SELECT 1 FROM page_visit_hourly LIMIT 1")
+    if cursor.fetchone():
+        return
+    hour_sql = (
+        "TO_CHAR(DATE_TRUNC('hour', visited_at), 'YYYY-MM-DD HH24:00:00')"
+        if is_postgres
+        else "strftime('%Y-%m-%d %H:00:00', visited_at)"
+    )
+    placeholder = "%s" if is_postgres else "?"
+    for low, high in id_ranges(cursor, "page_visits"):
+        cursor.execute(
+            f"""
+            INSERT INTO page_visit_hourly (hour_start, page_type, user_id, visits)
+            SELECT {hour_sql}, page_type, COALESCE(user_id, {ANONYMOUS_USER_ID}), COUNT(*)
+            FROM page_visits
+            WHERE id BETWEEN {placeholder} AND {placeholder} AND visited_at IS NOT NULL
+            GROUP BY {hour_sql}, page_type, COALESCE(user_id, {ANONYMOUS_USER_ID})
+            ON CONFLICT (hour_start, page_type, user_id)
+            DO UPDATE SET visits = page_visit_hourly.visits + excluded.visits
+            """,
+            (low, high),
+        )
+
+
+class PageVisitIngestor(BackgroundFlusher):
+    """Queues page visits and writes them (plus hourly rollups) in batches"""
+
+    thread_name = "page-visit-flush"
+
+    def __init__(self, get_db: Callable, get_placeholder: Callable[[], str],
+                 flush_interval_ms: int = VISIT_FLUSH_INTERVAL_MS,
+                 flush_max_items: int = VISIT_FLUSH_MAX_ITEMS,
+                 dedupe_window: int = VISIT_DEDUPE_WINDOW_SECONDS,
+                 dedupe_size: int = VISIT_DEDUPE_SIZE,
+                 max_pending: int = VISIT_MAX_PENDING):
+        super().__init__(flush_interval_ms / 1000.0)
+        self.get_db = get_db
+        self.get_placeholder = get_placeholder
+        self.flush_max_items = flush_max_items
+        self.dedupe_window = dedupe_window
+        self.dedupe_size = dedupe_size
+        self.max_pending = max_pending
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_seen: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._pending: List[Tuple[str, str, Optional[int], str, datetime]] = []
+        self._counters = {
+            "visits_received": 0,
+            "visits_deduplicated": 0,
+            "visits_written": 0,
+            "visits_dropped": 0,
+            "flushes": 0,
+            "flush_failures": 0,
+        }
+        self._last_flush_ms = 0.0
+
+    def track(self, page_type: str, page_path: str, user_id: Optional[int] = None,
+              browser_fingerprint: Optional[str] = None) -> bool:
+        """Queue a visit; returns False if it repeats a recent visit to the same path"""
+        fingerprint = browser_fingerprint or "anonymous"
+        now = time.monotonic()
+        key = (f"u:{user_id}" if user_id else f"f:{fingerprint}", page_path)
+        with self._lock:
+            self._counters["visits_received"] += 1
+            last_seen = self._last_seen.get(key)
+            if last_seen is not None and now - last_seen < self.dedupe_window:
+                self._counters["visits_deduplicated"] += 1
+                return False
+            self._last_seen[key] = now
+            self._last_seen.move_to_end(key)
+            if len(self._last_seen) > self.dedupe_size:
+                self._last_seen.popitem(last=False)
+
+            self._pending.append((page_type, page_path, user_id, fingerprint, datetime.utcnow()))
+            if len(self._pending) > self.max_pending:
+                self._pending.pop(0)
+                self._counters["visits_dropped"] += 1
+            should_flush = len(self._pending) >= self.flush_max_items
+
+        if should_flush:
+            self.wake()
+        return True
+
+    def flush(self) -> int:
+        """Write queued visits and their rollups; returns the number of visits written"""
+        with self._flush_lock:
+            with self._lock:
+                visits, self._pending = self._pending, []
+            if not visits:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                self._write(visits)
+            except Exception as e:
+                logger.error(f"Page visit flush failed, requeueing {len(visits)} visits: {type(e).__name__}: {e}")
+                with self._lock:
+                    self._pending = visits + self._pending
+                    self._counters["flush_failures"] += 1
+                return 0
+
+            with self._lock:
+                self._counters["flushes"] += 1
+                self._counters["visits_written"] += len(visits)
+                self._last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+            return len(visits)
+
+    def _write(self, visits: List[Tuple[str, str, Optional[int], str, datetime]]) -> None:
+        placeholder = self.get_placeholder()
+        rollups: Dict[Tuple[str, str, int], int] = {}
+        rows = []
+        for page_type, page_path, user_id, fingerprint, visited_at in visits:
+            rows.append((page_type, page_path, user_id, fingerprint, visited_at.strftime("%Y-%m-%d %H:%M:%S")))
+            rollup_key = (hour_bucket(visited_at), page_type, user_id or ANONYMOUS_USER_ID)
+            rollups[rollup_key] = rollups.get(rollup_key, 0) + 1
+
+        with self.get_db() as conn:
+            cursor = conn.cursor()
+            insert_rows(
+                cursor, "page_visits",
+                ("page_type", "page_path", "user_id", "browser_fingerprint", "visited_at"),
+                rows, placeholder,
+            )
+            for (hour_start, page_type, user_id), count in sorted(rollups.items()):
+                cursor.execute(
+                    f"""
+                    INSERT INTO page_visit_hourly (hour_start, page_type, user_id, visits)
+                    VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder})
+                    ON CONFLICT (hour_start, page_type, user_id)
+                    DO UPDATE SET visits = page_visit_hourly.visits + excluded.visits
+                    """,
+                    (hour_start, page_type, user_id, count),
+                )
+            conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["pending"] = len(self._pending)
+            stats["dedupe_entries"] = len(self._last_seen)
+            stats["last_flush_ms"] = self._last_flush_ms
+        stats["dedupe_window_seconds"] = self.dedupe_window
+        stats["running"] = self.running
+        return stats
@@ -23,7 +23,7 @@ import { AuthContext } from './AuthContext';
 import AddressAutocomplete from './AddressAutocomplete';
 import PrivacyNotice from '../PrivacyNotice';
 import ImageUpload from '../ImageUpload';
-import { API_URL } from '@/config';
+import { API_URL, mediaUrl } from '@/config';
 import { fetchWithTimeout } from '@/utils/fetchWithTimeout';
 
 const CreateEventForm = ({
@@ -1233,7 +1233,7 @@ const CreateEventForm = ({
                       <div className="space-y-3">
                         <div className="relative">
                           <img
-                            src={bannerImage || bannerPreview}
+                            src={mediaUrl(bannerImage) || bannerPreview}
                             alt="Banner"
                             className="w-full h-24 object-cover rounded-lg border"
                           />
@@ -1276,7 +1276,7 @@ const CreateEventForm = ({
                       <div className="space-y-3">
                         <div className="relative">
                           <img
-                            src={logoImage || logoPreview}
+                            src={mediaUrl(logoImage) || logoPreview}
                             alt="Logo"
                             className="w-16 h-16 object-cover rounded-lg border mx-auto"
                           />
@@ -74,7 +74,7 @@ import WelcomePopup from '../WelcomePopup';
 import RoutePlanner from './RoutePlanner';
 import RouteTimeline from './RouteTimeline';
 
-import { API_URL } from '@/config';
+import { API_URL, mediaUrl } from '@/config';
 import { fetchWithTimeout } from '@/utils/fetchWithTimeout';
 import EventInteractionComponents from './EventInteractionComponents';
 import ExternalLinkWarning from './ExternalLinkWarning';
@@ -485,7 +485,7 @@ const EventDetailsPanel = ({ event, user, onClose, onEdit, onDelete, onReport, a
         <div className="relative h-32 w-full" key={`banner-${event.id}`}>
           <img
             key={`banner-img-${event.id}`}
-            src={event.banner_image}
+            src={mediaUrl(event.banner_image)}
             alt="Event Banner"
             className="w-full h-full object-cover"
             onError={(e) => {
@@ -505,7 +505,7 @@ const EventDetailsPanel = ({ event, user, onClose, onEdit, onDelete, onReport, a
               <div className="relative" key={`logo-${event.id}`}>
                 <img
                   key={`logo-img-${event.id}`}
-                  src={event.logo_image}
+                  src={mediaUrl(event.logo_image)}
                   alt="Event Logo"
                   className="w-12 h-12 object-cover rounded-lg"
                   onError={(e) => {
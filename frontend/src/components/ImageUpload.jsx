@@ -1,7 +1,7 @@
 import React, { useState, useContext } from 'react';
 import { Upload, X, Image, Crown } from 'lucide-react';
 import { AuthContext } from './EventMap/AuthContext';
-import { API_URL } from '@/config';
+import { API_URL, mediaUrl } from '@/config';
 
 const ImageUpload = ({ eventId, imageType, currentImage, onImageUpdate, onClose }) => {
   const { user, token } = useContext(AuthContext);
@@ -52,7 +52,7 @@ const ImageUpload = ({ eventId, imageType, currentImage, onImageUpdate, onClose
       }
 
       const result = await response.json();
-      onImageUpdate(result.filename);
+      onImageUpdate(result.url || result.filename);
       onClose();
     } catch (error) {
       console.error('Upload error:', error);
@@ -172,7 +172,7 @@ const ImageUpload = ({ eventId, imageType, currentImage, onImageUpdate, onClose
             <p className="text-sm font-medium text-gray-700 mb-2">Current Image:</p>
             <div className="relative">
               <img
-                src={`${API_URL}/uploads/${imageType === 'banner' ? 'banners' : 'logos'}/${currentImage}`}
+                src={currentImage.includes('/') ? mediaUrl(currentImage) : `${API_URL}/uploads/${imageType === 'banner' ? 'banners' : 'logos'}/${currentImage}`}
                 alt={`Current ${imageType}`}
                 className="w-full h-32 object-cover rounded-lg border"
               />
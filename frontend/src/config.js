@@ -14,6 +14,9 @@ const FALLBACK_API_URLS = [
 export const API_URL = PRIMARY_API_URL;
 export const FALLBACK_URLS = FALLBACK_API_URLS;
 
+// Event banner/logo values are API-relative media URLs (/uploads/...) or legacy data: URLs
+export const mediaUrl = (value) => (value && value.startsWith('/') ? `${API_URL}${value}` : value);
+
 export const fetchConfig = {
   credentials: 'include',
   headers: {
@@ -2,8 +2,10 @@ const fs = require('fs');
 const https = require('https');
 const path = require('path');
 
-const BACKEND_SITEMAP_URL = 'https://todoevents-backend.onrender.com/sitemap.xml';
+const BACKEND_URL = 'https://todoevents-backend.onrender.com';
+const BACKEND_SITEMAP_URL = `${BACKEND_URL}/sitemap.xml`;
 const FRONTEND_SITEMAP_PATH = path.join(__dirname, 'public', 'sitemap.xml');
+const FRONTEND_SHARDS_DIR = path.join(__dirname, 'public', 'sitemaps');
 
 /**
  * Fetches the sitemap from the backend and saves it to the frontend public directory
@@ -14,14 +16,27 @@ async function syncSitemap() {
     try {
         const sitemapContent = await fetchSitemap(BACKEND_SITEMAP_URL);
         
-        // Replace backend domain with frontend domain in the sitemap
-        const frontendSitemap = sitemapContent.replace(
-            /https:\/\/todoevents-backend\.onrender\.com/g,
-            'https://todo-events.com'
-        );
+        if (sitemapContent.includes('<sitemapindex')) {
+            // The backend serves a sitemap index over per-month shards: copy every shard too
+            const shardNames = (sitemapContent.match(/\/sitemaps\/[^<]+\.xml/g) || [])
+                .map(loc => loc.split('/').pop());
+            fs.mkdirSync(FRONTEND_SHARDS_DIR, { recursive: true });
+            
+            let urlCount = 0;
+            for (const name of shardNames) {
+                const shard = enhanceSitemap(await fetchSitemap(`${BACKEND_URL}/sitemaps/${name}`));
+                fs.writeFileSync(path.join(FRONTEND_SHARDS_DIR, name), shard, 'utf8');
+                urlCount += (shard.match(/<loc>/g) || []).length;
+            }
+            fs.writeFileSync(FRONTEND_SITEMAP_PATH, toFrontendDomain(sitemapContent), 'utf8');
+            
+            console.log('✅ Sitemap index successfully synced to frontend');
+            console.log(`📍 ${shardNames.length} shards saved to: ${FRONTEND_SHARDS_DIR}`);
+            console.log(`📊 Total URLs in sitemap: ${urlCount}`);
+            return;
+        }
         
-        // Post-process to ensure alternate event URL formats exist
-        const enhancedSitemap = addAlternateEventUrls(frontendSitemap);
+        const enhancedSitemap = enhanceSitemap(sitemapContent);
         
         // Write the synchronized sitemap to the frontend
         fs.writeFileSync(FRONTEND_SITEMAP_PATH, enhancedSitemap, 'utf8');
@@ -41,6 +56,23 @@ async function syncSitemap() {
     }
 }
 
+/**
+ * Replaces the backend domain with the frontend domain
+ */
+function toFrontendDomain(xml) {
+    return xml.replace(
+        /https:\/\/todoevents-backend\.onrender\.com/g,
+        'https://todo-events.com'
+    );
+}
+
+/**
+ * Frontend domain plus the alternate event URL formats
+ */
+function enhanceSitemap(xml) {
+    return addAlternateEventUrls(toFrontendDomain(xml));
+}
+
 /**
  * Fetches content from a URL using https
  */